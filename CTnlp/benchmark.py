@@ -0,0 +1,381 @@
+"""Benchmark of the parsers on a synthetic corpus of clinical trials and patients.
+
+Usage::
+
+    python -m CTnlp.benchmark --files 10000 --patients 10000 --workers 4
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as StdET
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import defusedxml.ElementTree as ET
+
+from CTnlp.parsers import (
+    parse_clinical_trials_from_folder,
+    parse_criteria,
+    parse_eligibility,
+)
+from CTnlp.patient import load_patients_from_xml
+
+# structure of a ClinicalTrials.gov record, as in tests/test_data/trials
+_TRIAL_TEMPLATE = """<clinical_study>
+  <id_info>
+    <org_study_id></org_study_id>
+    <nct_id></nct_id>
+  </id_info>
+  <brief_title></brief_title>
+  <official_title></official_title>
+  <brief_summary>
+    <textblock></textblock>
+  </brief_summary>
+  <detailed_description>
+    <textblock></textblock>
+  </detailed_description>
+  <overall_status>Completed</overall_status>
+  <study_type>Interventional</study_type>
+  <primary_outcome>
+    <measure>Change from baseline</measure>
+  </primary_outcome>
+  <condition></condition>
+  <intervention>
+    <intervention_type>Drug</intervention_type>
+    <intervention_name></intervention_name>
+  </intervention>
+  <eligibility>
+    <criteria>
+      <textblock></textblock>
+    </criteria>
+    <gender></gender>
+    <minimum_age></minimum_age>
+    <maximum_age></maximum_age>
+    <healthy_volunteers></healthy_volunteers>
+  </eligibility>
+  <location_countries>
+    <country>United States</country>
+  </location_countries>
+</clinical_study>
+"""
+
+_CONDITIONS = [
+    "Type 2 Diabetes",
+    "Breast Cancer",
+    "Asthma",
+    "Heart Failure",
+    "Congenital Adrenal Hyperplasia",
+    "Chronic Kidney Disease",
+    "Major Depressive Disorder",
+    "Hypertension",
+]
+
+_DRUGS = ["Metformin", "Nifedipine", "Albuterol", "Placebo", "Sertraline"]
+
+_INCLUSION_CRITERIA = [
+    "diagnosed with {condition}",
+    "normal ECG during baseline evaluation",
+    "age 18 years or older",
+    "able to give written informed consent",
+    "HbA1c between 7% and 10%",
+    "stable dose of medication for at least 3 months",
+    "body mass index between 18.5 and 35 kg/m2",
+    "ECOG performance status 0 or 1",
+]
+
+_EXCLUSION_CRITERIA = [
+    "history of liver disease, or elevated liver function tests",
+    "history of cardiovascular disease",
+    "pregnant or breastfeeding women",
+    "participation in another clinical trial within 30 days",
+    "known hypersensitivity to {drug}",
+    "active infection requiring systemic therapy",
+    "estimated glomerular filtration rate below 30 mL/min",
+]
+
+_PATIENT_SENTENCES = [
+    "The patient is a {age}-year-old {sex} presenting with {condition}.",
+    "{pronoun} has a medical history of hypertension and {condition}.",
+    "{pronoun} has no history of smoking.",
+    "Family history is notable for {condition} in the mother.",
+    "Vital signs are within normal limits.",
+    "Physical examination reveals mild edema of the lower extremities.",
+    "Laboratory results show elevated inflammatory markers.",
+    "{pronoun} reports fatigue and shortness of breath on exertion.",
+]
+
+
+def _criteria_text(rng: random.Random, condition: str, drug: str) -> str:
+    inclusion = rng.sample(
+        _INCLUSION_CRITERIA, rng.randint(1, len(_INCLUSION_CRITERIA))
+    )
+    exclusion = rng.sample(
+        _EXCLUSION_CRITERIA, rng.randint(0, len(_EXCLUSION_CRITERIA))
+    )
+    lines = ["Inclusion Criteria:", ""]
+    lines += [f"  -  {criterion}\n" for criterion in inclusion]
+    if exclusion:
+        lines += ["Exclusion Criteria:", ""]
+        lines += [f"  -  {criterion}\n" for criterion in exclusion]
+    text = "\n".join(lines).format(condition=condition, drug=drug)
+    # a share of records without headers exercises the criteria fallback
+    if rng.random() < 0.05:
+        text = text.replace("Inclusion Criteria:", "Key Criteria:")
+    return text
+
+
+def generate_trial_corpus(
+    output_folder: str,
+    n_files: int,
+    templates: Optional[Sequence[str]] = None,
+    seed: int = 0,
+) -> List[str]:
+    """Writes n_files synthetic clinical trial xml files to the output folder.
+
+    Records are copies of the templates with new nct_ids and random titles,
+    conditions, criteria, genders and ages. Files are grouped in subfolders by
+    nct_id prefix, like in the ClinicalTrials.gov dump.
+
+    :param output_folder: folder to write the corpus to
+    :param n_files: number of files to write
+    :param templates: optional paths to xml files used as templates, by default
+        a record with the structure of the test data is used
+    :param seed: seed of the random generator
+    :return: list of paths to the written files
+    """
+    rng = random.Random(seed)
+    if templates:
+        template_roots = [ET.parse(template).getroot() for template in templates]
+    else:
+        template_roots = [ET.fromstring(_TRIAL_TEMPLATE)]
+
+    files = []
+    for number in range(n_files):
+        root = copy.deepcopy(template_roots[number % len(template_roots)])
+        nct_id = f"NCT{number:08d}"
+        condition = rng.choice(_CONDITIONS)
+        drug = rng.choice(_DRUGS)
+        minimum_age = rng.choice([6, 12, 18, 18, 40])
+        values = {
+            "id_info/org_study_id": f"SYN-{number}",
+            "id_info/nct_id": nct_id,
+            "brief_title": f"{drug} for {condition}",
+            "official_title": f"A Randomized Study of {drug} in {condition}",
+            "brief_summary/textblock": f"This study will test {drug} in {condition}.",
+            "detailed_description/textblock": (
+                f"This protocol is designed to assess the effects of {drug} "
+                f"in patients with {condition}. " * rng.randint(1, 20)
+            ),
+            "condition": condition,
+            "intervention/intervention_name": drug,
+            "eligibility/criteria/textblock": _criteria_text(rng, condition, drug),
+            "eligibility/gender": rng.choice(["All", "All", "Female", "Male"]),
+            "eligibility/minimum_age": f"{minimum_age} Years",
+            "eligibility/maximum_age": rng.choice(
+                [f"{minimum_age + rng.randint(10, 60)} Years", "N/A"]
+            ),
+            "eligibility/healthy_volunteers": rng.choice(
+                ["No", "Accepts Healthy Volunteers"]
+            ),
+        }
+        for path, text in values.items():
+            element = root.find(path)
+            if element is not None:
+                element.text = text
+
+        folder = os.path.join(output_folder, f"{nct_id[:7]}xxxx")
+        os.makedirs(folder, exist_ok=True)
+        file = os.path.join(folder, f"{nct_id}.xml")
+        StdET.ElementTree(root).write(file, encoding="utf-8")
+        files.append(file)
+    return files
+
+
+def generate_topics_file(path: str, n_patients: int, seed: int = 0) -> str:
+    """Writes a TREC-style topics file with n_patients synthetic patients.
+
+    :param path: path of the topics file
+    :param n_patients: number of patients
+    :param seed: seed of the random generator
+    :return: path of the topics file
+    """
+    rng = random.Random(seed)
+    root = StdET.Element("topics", task="synthetic")
+    for number in range(1, n_patients + 1):
+        sex, pronoun = rng.choice([("man", "He"), ("woman", "She")])
+        sentences = rng.sample(_PATIENT_SENTENCES[1:], rng.randint(2, 6))
+        description = " ".join([_PATIENT_SENTENCES[0]] + sentences).format(
+            age=rng.randint(1, 90),
+            sex=sex,
+            pronoun=pronoun,
+            condition=rng.choice(_CONDITIONS).lower(),
+        )
+        topic = StdET.SubElement(root, "topic", number=str(number))
+        topic.text = f"\n{description}\n"
+    StdET.ElementTree(root).write(path, encoding="utf-8")
+    return path
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Returns peak resident set size of this process and its finished children
+    in MB, or None if it cannot be measured on this platform."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _stage(seconds: float, items: int) -> Dict[str, float]:
+    return {
+        "seconds": seconds,
+        "items": items,
+        "items_per_second": items / seconds if seconds else float("inf"),
+    }
+
+
+def benchmark_eligibility(files: Iterable[str]) -> Dict[str, Dict[str, float]]:
+    """Times xml parsing, parse_eligibility and parse_criteria file by file."""
+    xml_seconds = eligibility_seconds = criteria_seconds = 0.0
+    n_files = n_criteria = 0
+    for file in files:
+        start = time.perf_counter()
+        root = ET.parse(file).getroot()
+        xml_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        parse_eligibility(root)
+        eligibility_seconds += time.perf_counter() - start
+
+        criteria = root.find("eligibility/criteria/textblock")
+        if criteria is not None and criteria.text:
+            start = time.perf_counter()
+            parse_criteria(criteria.text)
+            criteria_seconds += time.perf_counter() - start
+            n_criteria += 1
+        n_files += 1
+    return {
+        "xml_parse": _stage(xml_seconds, n_files),
+        "parse_eligibility": _stage(eligibility_seconds, n_files),
+        "parse_criteria": _stage(criteria_seconds, n_criteria),
+    }
+
+
+def run_benchmark(
+    n_files: int = 1000,
+    n_patients: int = 1000,
+    workers: int = 1,
+    folder: Optional[str] = None,
+    templates: Optional[Sequence[str]] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Generates a synthetic corpus and times the parsers on it.
+
+    :param n_files: number of synthetic clinical trial files
+    :param n_patients: number of synthetic patients
+    :param workers: number of worker processes of parse_clinical_trials_from_folder
+    :param folder: folder for the corpus, a temporary folder removed afterwards
+        by default
+    :param templates: optional paths to xml files used as trial templates
+    :param seed: seed of the random generator
+    :return: dictionary with timings of stages and peak RSS in MB
+    """
+    remove_folder = folder is None
+    if folder is None:
+        folder = tempfile.mkdtemp(prefix="ctnlp_benchmark_")
+    try:
+        trials_folder = os.path.join(folder, "trials")
+        start = time.perf_counter()
+        files = generate_trial_corpus(trials_folder, n_files, templates, seed)
+        topics_file = generate_topics_file(
+            os.path.join(folder, "topics.xml"), n_patients, seed
+        )
+        stages = {"generate_corpus": _stage(time.perf_counter() - start, n_files)}
+
+        start = time.perf_counter()
+        cts = parse_clinical_trials_from_folder(trials_folder, workers=workers)
+        stages["parse_clinical_trials_from_folder"] = _stage(
+            time.perf_counter() - start, len(cts or [])
+        )
+        del cts
+
+        stages.update(benchmark_eligibility(files))
+
+        start = time.perf_counter()
+        patients = load_patients_from_xml(topics_file)
+        stages["load_patients_from_xml"] = _stage(
+            time.perf_counter() - start, len(patients)
+        )
+    finally:
+        if remove_folder:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    return {
+        "files": n_files,
+        "patients": n_patients,
+        "workers": workers,
+        "stages": stages,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Formats the result of run_benchmark as a table."""
+    lines = [
+        f"files: {report['files']}, patients: {report['patients']}, "
+        f"workers: {report['workers']}",
+        f"{'stage':<36}{'seconds':>10}{'items':>10}{'items/s':>12}",
+    ]
+    for name, stage in report["stages"].items():
+        lines.append(
+            f"{name:<36}{stage['seconds']:>10.3f}{stage['items']:>10}"
+            f"{stage['items_per_second']:>12.1f}"
+        )
+    if report["peak_rss_mb"] is not None:
+        lines.append(f"peak RSS: {report['peak_rss_mb']:.1f} MB")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000, help="number of trials")
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--folder", help="folder for the corpus, kept after the benchmark"
+    )
+    parser.add_argument(
+        "--template",
+        action="append",
+        help="trial xml file used as a template, can be repeated",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this json file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        n_files=args.files,
+        n_patients=args.patients,
+        workers=args.workers,
+        folder=args.folder,
+        templates=args.template,
+        seed=args.seed,
+    )
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""Module containing a sparse BM25 retrieval index over clinical trials.
+
+The index is saved as a folder with a json vocabulary and binary postings which
+are memory-mapped on load, so large indexes are not read into memory.
+"""
+
+import heapq
+import json
+import math
+import mmap
+import os
+from array import array
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from CTnlp.clinical_trial import ClinicalTrial
+from CTnlp.patient import Patient
+from CTnlp.preprocessing import _tokenizer_name, tokenize
+
+# postings and document lengths are stored as arrays of unsigned ints
+_ARRAY_TYPE = "I"
+
+IntArray = Union[array, memoryview]
+
+
+def get_field_text(clinical_trial: ClinicalTrial, field: str) -> str:
+    """Returns text of the trial's field, list fields are joined with newlines."""
+    value = getattr(clinical_trial, field)
+    if isinstance(value, list):
+        return "\n".join(value)
+    return value or ""
+
+
+class BM25Index:
+    """Sparse BM25 index over a text field of clinical trials.
+
+    Usage::
+
+        index = BM25Index.build(iter_clinical_trials_from_folder(TRIALS_FOLDER))
+        index.save("bm25_index/")
+        index = BM25Index.load("bm25_index/")
+        results = index.search_patients(patients, k=100)
+    """
+
+    def __init__(
+        self,
+        doc_ids: List[str],
+        doc_lengths: IntArray,
+        vocabulary: Dict[str, Tuple[int, int]],
+        postings_docs: IntArray,
+        postings_tfs: IntArray,
+        field: str = "text",
+        k1: float = 1.2,
+        b: float = 0.75,
+        tokenizer: Callable[[str], List[str]] = tokenize,
+        tokenizer_name: Optional[str] = None,
+    ):
+        """
+        :param doc_ids: nct_ids of indexed trials
+        :param doc_lengths: number of tokens of every document
+        :param vocabulary: term -> (offset in postings, document frequency)
+        :param postings_docs: document numbers of postings grouped by term
+        :param postings_tfs: term frequencies aligned with postings_docs
+        :param field: indexed ClinicalTrial field
+        :param k1: BM25 term frequency saturation parameter
+        :param b: BM25 document length normalisation parameter
+        :param tokenizer: function which split documents into tokens, used for
+            queries
+        :param tokenizer_name: name of the tokenizer saved with the index,
+            defaults to the module and qualified name of tokenizer
+        """
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.vocabulary = vocabulary
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.field = field
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+        self.tokenizer_name = tokenizer_name or _tokenizer_name(tokenizer)
+        self._resources = ExitStack()
+
+        average_length = (sum(doc_lengths) / len(doc_lengths)) if doc_ids else 0.0
+        self.average_length = average_length or 1.0
+        self._length_norms = [
+            k1 * (1 - b + b * length / self.average_length) for length in doc_lengths
+        ]
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(
+        cls,
+        clinical_trials: Iterable[ClinicalTrial],
+        field: str = "text",
+        k1: float = 1.2,
+        b: float = 0.75,
+        tokenizer: Callable[[str], List[str]] = tokenize,
+        use_preprocessed: bool = False,
+        tokenizer_name: Optional[str] = None,
+    ) -> "BM25Index":
+        """Builds an in-memory index from clinical trials.
+
+        :param clinical_trials: iterable of ClinicalTrial objects, consumed lazily
+        :param field: ClinicalTrial field to index, e.g. text, inclusion or
+            exclusion
+        :param k1: BM25 term frequency saturation parameter
+        :param b: BM25 document length normalisation parameter
+        :param tokenizer: function splitting text into tokens
+        :param use_preprocessed: index text_preprocessed instead of tokenizing
+            text of trials which have it set; it is not checked, so it must
+            have been produced by tokenizer (see preprocess_clinical_trials)
+        :param tokenizer_name: name of the tokenizer saved with the index, see
+            load; required to tell apart e.g. lambdas or partials
+        :return: BM25Index
+        """
+        doc_ids: List[str] = []
+        doc_lengths = array(_ARRAY_TYPE)
+        term_postings: Dict[str, Tuple[array, array]] = defaultdict(
+            lambda: (array(_ARRAY_TYPE), array(_ARRAY_TYPE))
+        )
+        for doc, clinical_trial in enumerate(clinical_trials):
+            if (
+                use_preprocessed
+                and field == "text"
+                and clinical_trial.text_preprocessed is not None
+            ):
+                tokens = clinical_trial.text_preprocessed
+            else:
+                tokens = tokenizer(get_field_text(clinical_trial, field))
+            doc_ids.append(clinical_trial.nct_id)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                docs, tfs = term_postings[term]
+                docs.append(doc)
+                tfs.append(tf)
+
+        vocabulary: Dict[str, Tuple[int, int]] = {}
+        postings_docs = array(_ARRAY_TYPE)
+        postings_tfs = array(_ARRAY_TYPE)
+        for term in sorted(term_postings):
+            docs, tfs = term_postings.pop(term)
+            vocabulary[term] = (len(postings_docs), len(docs))
+            postings_docs.extend(docs)
+            postings_tfs.extend(tfs)
+
+        return cls(
+            doc_ids=doc_ids,
+            doc_lengths=doc_lengths,
+            vocabulary=vocabulary,
+            postings_docs=postings_docs,
+            postings_tfs=postings_tfs,
+            field=field,
+            k1=k1,
+            b=b,
+            tokenizer=tokenizer,
+            tokenizer_name=tokenizer_name,
+        )
+
+    @classmethod
+    def merge(cls, indexes: Sequence["BM25Index"]) -> "BM25Index":
+        """Merges indexes of disjoint sets of trials, e.g. indexes built on nodes
+        parsing separate shards, into one in-memory index.
+
+        Documents keep the order of the indexes, so the result equals the index
+        built from trials of all indexes one after another.
+
+        :param indexes: indexes with the same field, k1, b and tokenizer
+        :return: BM25Index
+        """
+        if not indexes:
+            raise ValueError("No BM25 indexes to merge")
+        parameters = {
+            (index.field, index.k1, index.b, index.tokenizer_name) for index in indexes
+        }
+        if len(parameters) > 1:
+            raise ValueError(
+                f"Cannot merge BM25 indexes with different (field, k1, b, "
+                f"tokenizer_name): {sorted(parameters)}"
+            )
+
+        doc_ids: List[str] = []
+        doc_lengths = array(_ARRAY_TYPE)
+        doc_offsets = []
+        for index in indexes:
+            doc_offsets.append(len(doc_ids))
+            doc_ids.extend(index.doc_ids)
+            doc_lengths.extend(index.doc_lengths)
+
+        vocabulary: Dict[str, Tuple[int, int]] = {}
+        postings_docs = array(_ARRAY_TYPE)
+        postings_tfs = array(_ARRAY_TYPE)
+        for term in sorted(set().union(*(index.vocabulary for index in indexes))):
+            start = len(postings_docs)
+            for index, doc_offset in zip(indexes, doc_offsets):
+                if term not in index.vocabulary:
+                    continue
+                offset, df = index.vocabulary[term]
+                postings_docs.extend(
+                    doc + doc_offset
+                    for doc in index.postings_docs[offset : offset + df]
+                )
+                postings_tfs.extend(index.postings_tfs[offset : offset + df])
+            vocabulary[term] = (start, len(postings_docs) - start)
+
+        field, k1, b, tokenizer_name = parameters.pop()
+        return cls(
+            doc_ids=doc_ids,
+            doc_lengths=doc_lengths,
+            vocabulary=vocabulary,
+            postings_docs=postings_docs,
+            postings_tfs=postings_tfs,
+            field=field,
+            k1=k1,
+            b=b,
+            tokenizer=indexes[0].tokenizer,
+            tokenizer_name=tokenizer_name,
+        )
+
+    def save(self, folder: str) -> None:
+        """Saves the index to the folder."""
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "meta.json"), "w") as f:
+            json.dump(
+                {
+                    "field": self.field,
+                    "k1": self.k1,
+                    "b": self.b,
+                    "tokenizer_name": self.tokenizer_name,
+                },
+                f,
+            )
+        with open(os.path.join(folder, "doc_ids.json"), "w") as f:
+            json.dump(self.doc_ids, f)
+        with open(os.path.join(folder, "vocabulary.json"), "w") as f:
+            json.dump(self.vocabulary, f)
+        for name in ["doc_lengths", "postings_docs", "postings_tfs"]:
+            with open(os.path.join(folder, f"{name}.bin"), "wb") as f:
+                f.write(memoryview(getattr(self, name)).cast("B"))
+
+    @classmethod
+    def load(
+        cls,
+        folder: str,
+        tokenizer: Callable[[str], List[str]] = tokenize,
+        tokenizer_name: Optional[str] = None,
+    ) -> "BM25Index":
+        """Loads an index saved with save, memory-mapping the binary files.
+
+        The returned index keeps the files open until close is called.
+
+        :param folder: folder with the saved index
+        :param tokenizer: tokenizer the index was built with, used for queries
+        :param tokenizer_name: name of the tokenizer, defaults to the module and
+            qualified name of tokenizer
+        :return: BM25Index
+        :raises ValueError: if the index was saved with another tokenizer
+        """
+        with open(os.path.join(folder, "meta.json")) as f:
+            meta = json.load(f)
+        tokenizer_name = tokenizer_name or _tokenizer_name(tokenizer)
+        # indexes saved before tokenizer names were stored are not checked
+        saved_tokenizer_name = meta.pop("tokenizer_name", tokenizer_name)
+        if saved_tokenizer_name != tokenizer_name:
+            raise ValueError(
+                f"Index in {folder} was built with tokenizer {saved_tokenizer_name}, "
+                f"not {tokenizer_name}"
+            )
+        with open(os.path.join(folder, "doc_ids.json")) as f:
+            doc_ids = json.load(f)
+        with open(os.path.join(folder, "vocabulary.json")) as f:
+            vocabulary = {
+                term: (offset, df) for term, (offset, df) in json.load(f).items()
+            }
+
+        resources = ExitStack()
+        arrays = {
+            name: _map_array(os.path.join(folder, f"{name}.bin"), resources)
+            for name in ["doc_lengths", "postings_docs", "postings_tfs"]
+        }
+        index = cls(
+            doc_ids=doc_ids,
+            vocabulary=vocabulary,
+            tokenizer=tokenizer,
+            tokenizer_name=tokenizer_name,
+            **arrays,
+            **meta,
+        )
+        index._resources = resources
+        return index
+
+    def close(self) -> None:
+        """Releases memory-mapped files of a loaded index."""
+        self.postings_docs = self.postings_tfs = self.doc_lengths = array(_ARRAY_TYPE)
+        self._resources.close()
+
+    def __enter__(self) -> "BM25Index":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (len(self.doc_ids) - df + 0.5) / (df + 0.5))
+
+    def score(self, query_tokens: Iterable[str]) -> Dict[int, float]:
+        """Returns BM25 scores of documents containing any of the query tokens."""
+        scores: Dict[int, float] = defaultdict(float)
+        length_norms = self._length_norms
+        k1_plus_one = self.k1 + 1
+        for term in set(query_tokens):
+            if term not in self.vocabulary:
+                continue
+            offset, df = self.vocabulary[term]
+            idf = self._idf(df)
+            docs = self.postings_docs[offset : offset + df]
+            tfs = self.postings_tfs[offset : offset + df]
+            for doc, tf in zip(docs, tfs):
+                scores[doc] += idf * tf * k1_plus_one / (tf + length_norms[doc])
+        return scores
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        tokenizer: Optional[Callable[[str], List[str]]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Returns top-k (nct_id, score) pairs for the query, best first.
+
+        :param query: query text
+        :param k: number of returned trials
+        :param tokenizer: optional tokenizer of the query, by default the one
+            the index was built with
+        :return: list of (nct_id, score) pairs
+        :raises ValueError: if tokenizer is not the one the index was built with
+        """
+        if tokenizer is None:
+            tokenizer = self.tokenizer
+        elif (
+            tokenizer is not self.tokenizer
+            and _tokenizer_name(tokenizer) != self.tokenizer_name
+        ):
+            raise ValueError(
+                f"Index was built with tokenizer {self.tokenizer_name}, "
+                f"not {_tokenizer_name(tokenizer)}"
+            )
+        scores = self.score(tokenizer(query))
+        top_k = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.doc_ids[doc], score) for doc, score in top_k]
+
+    def search_patients(
+        self,
+        patients: Sequence[Patient],
+        k: int = 1000,
+        tokenizer: Optional[Callable[[str], List[str]]] = None,
+    ) -> Dict[str, List[Tuple[str, float]]]:
+        """Runs Patient.description of every patient as a query.
+
+        :param patients: sequence of Patient objects
+        :param k: number of returned trials per patient
+        :param tokenizer: optional tokenizer of the queries, see search
+        :return: dictionary mapping patient's unique_id to top-k (nct_id, score)
+        """
+        return {
+            patient.unique_id: self.search(
+                patient.description, k=k, tokenizer=tokenizer
+            )
+            for patient in patients
+        }
+
+
+def _map_array(path: str, resources: ExitStack) -> IntArray:
+    """Memory-maps a binary file as a read-only array of unsigned ints."""
+    if os.path.getsize(path) == 0:
+        return array(_ARRAY_TYPE)
+    f = resources.enter_context(open(path, "rb"))
+    mapped = resources.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    view = memoryview(mapped).cast(_ARRAY_TYPE)
+    resources.callback(view.release)
+    return view
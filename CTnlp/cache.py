@@ -0,0 +1,197 @@
+"""Module containing on-disk caches of parsed and tokenized clinical trials."""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+from typing import List, Optional, Tuple
+
+from CTnlp.clinical_trial import ClinicalTrial
+
+# bump whenever ClinicalTrial or Intervention change in a way that breaks pickles
+CACHE_VERSION = 2
+
+
+def _file_key(file: str) -> Tuple[str, int, int]:
+    """Returns absolute path, modification time in ns and size of the file."""
+    stat = os.stat(file)
+    return os.path.abspath(file), stat.st_mtime_ns, stat.st_size
+
+
+class TrialCache:
+    """Persistent cache of parsed ClinicalTrial objects stored in a sqlite file.
+
+    Records are keyed by the absolute path of the source xml file together with
+    its modification time and size, so new or modified files are parsed again
+    while unchanged files are loaded from the cache.
+
+    Usage::
+
+        with TrialCache("trials.sqlite") as cache:
+            cts = parse_clinical_trials_from_folder(TRIALS_FOLDER, cache=cache)
+    """
+
+    def __init__(self, path: str, commit_every: int = 1000):
+        self.path = path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS trials ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, record BLOB)"
+        )
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version != CACHE_VERSION:
+            self._connection.execute("DELETE FROM trials")
+            self._connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self._connection.commit()
+
+    def get(self, file: str) -> Optional[ClinicalTrial]:
+        """Returns the cached trial for the file or None if the file was not cached
+        or changed since it was cached."""
+        path, mtime_ns, size = _file_key(file)
+        row = self._connection.execute(
+            "SELECT record FROM trials WHERE path = ? AND mtime_ns = ? AND size = ?",
+            (path, mtime_ns, size),
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0])
+
+    def put(self, file: str, clinical_trial: ClinicalTrial) -> None:
+        """Stores the trial parsed from the file, replacing any older record."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?)",
+            (
+                *_file_key(file),
+                pickle.dumps(clinical_trial, protocol=pickle.HIGHEST_PROTOCOL),
+            ),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def merge(self, *paths: str) -> int:
+        """Copies records of other trial caches, e.g. caches written by nodes
+        parsing separate shards, into this cache.
+
+        Records are keyed by absolute paths, so after merging caches written on
+        a shared filesystem, parsing the whole folder with the merged cache
+        loads all trials without parsing them again.
+
+        :param paths: paths to sqlite files of other TrialCache objects
+        :return: number of merged records
+        """
+        self.commit()
+        merged = 0
+        for path in paths:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"No trial cache {path}")
+            self._connection.execute("ATTACH DATABASE ? AS shard", (path,))
+            try:
+                (version,) = self._connection.execute(
+                    "PRAGMA shard.user_version"
+                ).fetchone()
+                if version != CACHE_VERSION:
+                    raise ValueError(
+                        f"Cannot merge cache {path} of version {version}, "
+                        f"expected version {CACHE_VERSION}"
+                    )
+                merged += self._connection.execute(
+                    "INSERT OR REPLACE INTO trials SELECT * FROM shard.trials"
+                ).rowcount
+                self._connection.commit()
+            finally:
+                self._connection.execute("DETACH DATABASE shard")
+        return merged
+
+    def commit(self) -> None:
+        self._connection.commit()
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        self.commit()
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM trials").fetchone()[0]
+
+    def __enter__(self) -> "TrialCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def text_hash(text: str) -> str:
+    """Returns a short stable hash of the text."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TokenCache:
+    """Persistent cache of tokenized trial texts stored in a sqlite file.
+
+    Tokens are keyed by nct_id, the name of the tokenizer and a hash of the
+    tokenized text, so trials whose text changed are tokenized again.
+
+    Usage::
+
+        with TokenCache("tokens.sqlite") as cache:
+            cts = list(preprocess_clinical_trials(cts, cache=cache))
+    """
+
+    def __init__(self, path: str, commit_every: int = 1000):
+        self.path = path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            "nct_id TEXT, tokenizer TEXT, text_hash TEXT, record BLOB, "
+            "PRIMARY KEY (nct_id, tokenizer))"
+        )
+        self._connection.commit()
+
+    def get(self, nct_id: str, tokenizer: str, text: str) -> Optional[List[str]]:
+        """Returns cached tokens or None if the text was not cached or changed
+        since it was cached."""
+        row = self._connection.execute(
+            "SELECT record FROM tokens "
+            "WHERE nct_id = ? AND tokenizer = ? AND text_hash = ?",
+            (nct_id, tokenizer, text_hash(text)),
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0])
+
+    def put(self, nct_id: str, tokenizer: str, text: str, tokens: List[str]) -> None:
+        """Stores tokens of the text, replacing any older record."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?)",
+            (
+                nct_id,
+                tokenizer,
+                text_hash(text),
+                pickle.dumps(tokens, protocol=pickle.HIGHEST_PROTOCOL),
+            ),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        self._connection.commit()
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        self.commit()
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+
+    def __enter__(self) -> "TokenCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
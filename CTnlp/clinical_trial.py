@@ -1,5 +1,6 @@
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+import sys
+from dataclasses import InitVar, dataclass, field, fields
+from typing import List, Optional, Dict, Any, Tuple, Union
 
 from CTnlp.utils import Gender
 
@@ -13,14 +14,30 @@ class Intervention:
     description: Optional[str]
 
 
+def _build_text(clinical_trial: Union["ClinicalTrial", "CompactClinicalTrial"]) -> str:
+    return (
+        f"{clinical_trial.brief_title.strip()} "
+        + f"{clinical_trial.official_title.strip()}\n"
+        + f"{clinical_trial.brief_summary.strip()} "
+        + f"{clinical_trial.detailed_description.strip()}\n"
+        + f"{clinical_trial.criteria.strip()}"
+    )
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 @dataclass
 class ClinicalTrial:
     """ClinicalTrial is a wrapper class that contains most important fields
     from the ClinicalTrials xml dump file.
 
     text is a variable containing elements from title, detailed_description
-        and criteria.
-    text_preprocessed contains tokenized and preprocessed text."""
+        and criteria. It is left empty if build_text is False.
+    text_preprocessed contains tokenized and preprocessed text.
+    inclusion_ids and exclusion_ids contain ids of criteria in a
+        CriteriaVocabulary."""
 
     org_study_id: str
     nct_id: str  # primary id
@@ -49,16 +66,161 @@ class ClinicalTrial:
 
     # text which was preprocessed and is already tokenized
     text_preprocessed: Optional[List[str]] = None
+    # ids of inclusion and exclusion criteria in a CriteriaVocabulary
+    inclusion_ids: Optional[List[int]] = None
+    exclusion_ids: Optional[List[int]] = None
     text: str = field(init=False)
+    build_text: InitVar[bool] = True
 
-    def __post_init__(self):
-        self.text = (
-            f"{self.brief_title.strip()} {self.official_title.strip()}\n"
-            + f"{self.brief_summary.strip()} {self.detailed_description.strip()}\n"
-            + f"{self.criteria.strip()}"
-        )
+    def __post_init__(self, build_text: bool):
+        self.text = _build_text(self) if build_text else ""
 
     def fom_dict(self, d: Dict[str, Any]):
         if d is not None:
             for key, value in d.items():
                 setattr(self, key, value)
+
+
+# ClinicalTrial fields passed to __init__, in the order of the dataclass
+_TRIAL_INIT_FIELDS: Tuple[str, ...] = tuple(
+    _field.name for _field in fields(ClinicalTrial) if _field.init
+)
+
+
+class CompactClinicalTrial:
+    """Memory-compact variant of ClinicalTrial with the same fields.
+
+    Instances use __slots__ instead of a per-instance __dict__, text is built
+    lazily on first access and then cached (or left empty if build_text is
+    False, like in ClinicalTrial), and low-cardinality values
+    (gender, study_type, conditions and intervention types) are interned so
+    they are shared between trials instead of copied."""
+
+    __slots__ = _TRIAL_INIT_FIELDS + ("_text",)
+
+    def __init__(
+        self,
+        org_study_id: str,
+        nct_id: str,
+        brief_title: str,
+        official_title: str,
+        brief_summary: str,
+        detailed_description: str,
+        study_type: Optional[str],
+        criteria: str,
+        inclusion: List[str],
+        exclusion: List[str],
+        gender: Gender,
+        minimum_age: Optional[float],
+        maximum_age: Optional[float],
+        accepts_healthy_volunteers: bool,
+        primary_outcomes: Optional[List[str]],
+        secondary_outcomes: Optional[List[str]],
+        conditions: Optional[List[str]],
+        interventions: Optional[List[Intervention]],
+        text_preprocessed: Optional[List[str]] = None,
+        inclusion_ids: Optional[List[int]] = None,
+        exclusion_ids: Optional[List[int]] = None,
+        build_text: bool = True,
+    ):
+        self.org_study_id = org_study_id
+        self.nct_id = nct_id
+        self.brief_title = brief_title
+        self.official_title = official_title
+        self.brief_summary = brief_summary
+        self.detailed_description = detailed_description
+        self.study_type = _intern(study_type)
+        self.criteria = criteria
+        self.inclusion = inclusion
+        self.exclusion = exclusion
+        self.gender = Gender(gender)
+        self.minimum_age = minimum_age
+        self.maximum_age = maximum_age
+        self.accepts_healthy_volunteers = accepts_healthy_volunteers
+        self.primary_outcomes = primary_outcomes
+        self.secondary_outcomes = secondary_outcomes
+        self.conditions = (
+            None if conditions is None else [_intern(c) for c in conditions]
+        )
+        self.interventions = (
+            None
+            if interventions is None
+            else [
+                Intervention(
+                    type=_intern(intervention.type),
+                    name=intervention.name,
+                    description=intervention.description,
+                )
+                for intervention in interventions
+            ]
+        )
+        self.text_preprocessed = text_preprocessed
+        self.inclusion_ids = inclusion_ids
+        self.exclusion_ids = exclusion_ids
+        if not build_text:
+            self._text = ""
+
+    @property
+    def text(self) -> str:
+        """text built from title, descriptions and criteria on first access."""
+        try:
+            return self._text
+        except AttributeError:
+            self._text = _build_text(self)
+            return self._text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._text = value
+
+    @classmethod
+    def from_clinical_trial(
+        cls, clinical_trial: ClinicalTrial
+    ) -> "CompactClinicalTrial":
+        # text of a ClinicalTrial is empty only if it was not built
+        return cls(
+            **{name: getattr(clinical_trial, name) for name in _TRIAL_INIT_FIELDS},
+            build_text=bool(clinical_trial.text),
+        )
+
+    def to_clinical_trial(self) -> ClinicalTrial:
+        # text which is not built yet is built by ClinicalTrial, not cached here
+        text = getattr(self, "_text", None)
+        clinical_trial = ClinicalTrial(
+            **{name: getattr(self, name) for name in _TRIAL_INIT_FIELDS},
+            build_text=text is None,
+        )
+        if text is not None:
+            clinical_trial.text = text
+        return clinical_trial
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in _TRIAL_INIT_FIELDS)
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        # text is pickled only if it was set to something else than the derived
+        # text, otherwise it is rebuilt lazily after unpickling
+        state = self._values()
+        try:
+            text = self._text
+        except AttributeError:
+            return state
+        return state if text == _build_text(self) else state + (text,)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        self.__init__(*state[: len(_TRIAL_INIT_FIELDS)])
+        if len(state) > len(_TRIAL_INIT_FIELDS):
+            self._text = state[-1]
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in _TRIAL_INIT_FIELDS
+        )
+        return f"{self.__class__.__name__}({values})"
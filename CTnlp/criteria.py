@@ -0,0 +1,126 @@
+"""Module containing a vocabulary of deduplicated eligibility criteria."""
+
+import re
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from CTnlp.clinical_trial import ClinicalTrial
+
+_WHITESPACE_REGEX = re.compile(r"\s+")
+# list markers and trailing punctuation which do not change a criterion; a
+# single letter is a marker only as "a)", "a." is usually a genus like "S. aureus"
+_BULLET_REGEX = re.compile(r"^(?:[-*•·]|\d{1,2}[.)]|[a-z]\))\s+")
+_TRAILING_PUNCTUATION = " .,;:"
+
+
+def fold_criterion(criterion: str) -> str:
+    """Returns criterion with collapsed whitespace and folded case, so that
+    criteria which differ only in case or whitespace are equal."""
+    return _WHITESPACE_REGEX.sub(" ", criterion).strip().casefold()
+
+
+def normalize_criterion(criterion: str) -> str:
+    """Returns criterion in a normalized form, so that criteria which differ only
+    in case, whitespace, list markers or trailing punctuation are equal."""
+    criterion = _BULLET_REGEX.sub("", fold_criterion(criterion))
+    return criterion.rstrip(_TRAILING_PUNCTUATION)
+
+
+class CriteriaVocabulary:
+    """Vocabulary interning normalized criteria to integer ids.
+
+    Every distinct normalized criterion gets an id, the first seen original
+    criterion is kept as its representative text and occurrences are counted,
+    so criteria classifiers can run once per id instead of once per trial.
+
+    Usage::
+
+        vocabulary = CriteriaVocabulary()
+        vocabulary.add_clinical_trials(cts)
+        vocabulary.most_common(10)
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.criteria: List[str] = []
+        self.normalized_criteria: List[str] = []
+        self.counts: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.criteria)
+
+    def __getitem__(self, criterion_id: int) -> str:
+        return self.criteria[criterion_id]
+
+    def __contains__(self, criterion: str) -> bool:
+        return normalize_criterion(criterion) in self.ids
+
+    def get_id(self, criterion: str) -> Optional[int]:
+        """Returns id of the criterion or None if it is not in the vocabulary."""
+        return self.ids.get(normalize_criterion(criterion))
+
+    def add(self, criterion: str) -> int:
+        """Adds an occurrence of the criterion and returns its id."""
+        normalized = normalize_criterion(criterion)
+        criterion_id = self.ids.get(normalized)
+        if criterion_id is None:
+            criterion_id = len(self.criteria)
+            self.ids[normalized] = criterion_id
+            self.criteria.append(criterion)
+            self.normalized_criteria.append(normalized)
+            self.counts.append(0)
+        self.counts[criterion_id] += 1
+        return criterion_id
+
+    def encode(self, criteria: Iterable[str]) -> List[int]:
+        """Adds occurrences of the criteria and returns their ids."""
+        return [self.add(criterion) for criterion in criteria]
+
+    def decode(self, criterion_ids: Iterable[int]) -> List[str]:
+        """Returns representative texts of the criteria ids."""
+        return [self.criteria[criterion_id] for criterion_id in criterion_ids]
+
+    def add_clinical_trials(
+        self, clinical_trials: Iterable[ClinicalTrial], share_strings: bool = True
+    ) -> None:
+        """Sets inclusion_ids and exclusion_ids of every trial.
+
+        :param clinical_trials: iterable of ClinicalTrial or CompactClinicalTrial
+        :param share_strings: intern criteria of trials, so exactly equal criteria
+            share a single string; criteria which only normalize equal are kept
+        """
+        for clinical_trial in clinical_trials:
+            clinical_trial.inclusion_ids = self.encode(clinical_trial.inclusion)
+            clinical_trial.exclusion_ids = self.encode(clinical_trial.exclusion)
+            if share_strings:
+                clinical_trial.inclusion = [
+                    sys.intern(criterion) for criterion in clinical_trial.inclusion
+                ]
+                clinical_trial.exclusion = [
+                    sys.intern(criterion) for criterion in clinical_trial.exclusion
+                ]
+
+    def frequency(self, criterion: str) -> int:
+        """Returns number of occurrences of the criterion."""
+        criterion_id = self.get_id(criterion)
+        return 0 if criterion_id is None else self.counts[criterion_id]
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Returns n most common criteria with their number of occurrences."""
+        counter = Counter(dict(enumerate(self.counts)))
+        return [
+            (self.criteria[criterion_id], count)
+            for criterion_id, count in counter.most_common(n)
+        ]
+
+    def stats(self) -> Dict[str, float]:
+        """Returns number of criteria occurrences, number of unique criteria, ratio
+        of duplicate occurrences and number of criteria occurring only once."""
+        total = sum(self.counts)
+        return {
+            "total": total,
+            "unique": len(self.criteria),
+            "duplicate_ratio": (1 - len(self.criteria) / total) if total else 0.0,
+            "singletons": sum(count == 1 for count in self.counts),
+        }
@@ -0,0 +1,201 @@
+"""Module containing streaming discovery of clinical trials xml files.
+
+Directories are listed with os.scandir in a thread pool, a few directories
+ahead of the consumer, so listing a large dump (e.g. ~450k files in NCTxxxx
+subfolders on a network filesystem) overlaps with parsing the files already
+found instead of preceding it.
+"""
+import functools
+import logging
+import os
+import re
+import zlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from CTnlp.utils import ordered_map
+
+# subfolders of the ClinicalTrials.gov dump, e.g. NCT0000xxxx
+_NCT_DIRECTORY_REGEX = re.compile(r"(NCT\d*)x+")
+
+
+def shard_of(name: str, shard_count: int) -> int:
+    """Returns the shard of a trial by a stable crc32 hash of its nct_id or file
+    name, so every node computes the same shards without coordination.
+
+    :param name: nct_id or path of the trial's xml file, the directory and
+        extension of a path are ignored
+    :param shard_count: number of shards
+    :return: shard index between 0 and shard_count - 1
+    """
+    nct_id = os.path.splitext(os.path.basename(name))[0]
+    return zlib.crc32(nct_id.encode("utf-8")) % shard_count
+
+
+def check_shard(shard_index: int, shard_count: int) -> None:
+    """Raises ValueError if the shard index is not one of shard_count shards."""
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(
+            f"Invalid shard {shard_index} of {shard_count} shards, shard index "
+            "must be between 0 and shard_count - 1"
+        )
+
+
+def _directory_may_match(name: str, prefixes: Optional[FrozenSet[str]]) -> bool:
+    """Returns False for NCTxxxx subfolders which cannot contain files starting
+    with any of the prefixes."""
+    if prefixes is None:
+        return True
+    match = _NCT_DIRECTORY_REGEX.fullmatch(name)
+    if match is None:
+        return True
+    stem = match[1]
+    return any(
+        prefix.startswith(stem) or stem.startswith(prefix) for prefix in prefixes
+    )
+
+
+def _scan_directory(
+    path: str,
+    sort: bool = True,
+    prefixes: Optional[FrozenSet[str]] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> Tuple[List[str], List[str]]:
+    """Lists xml files and subfolders of a directory.
+
+    :param path: path to the directory
+    :param sort: sort files and subfolders by name
+    :param prefixes: optional prefixes of file names to keep
+    :param shard_index: keep only files of this shard, see shard_of
+    :param shard_count: number of shards
+    :return: tuple with paths of xml files and paths of subfolders
+    """
+    files, directories = [], []
+    file_prefixes = "" if prefixes is None else tuple(prefixes)
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                # like os.walk, hidden folders are walked and symlinks to
+                # folders are not followed
+                if entry.is_dir(follow_symlinks=False):
+                    if _directory_may_match(entry.name, prefixes):
+                        directories.append(entry.path)
+                # like glob, hidden files are skipped
+                elif (
+                    entry.name.endswith(".xml")
+                    and entry.name.startswith(file_prefixes)
+                    and not entry.name.startswith(".")
+                ):
+                    files.append(entry.path)
+    except OSError as error:
+        # like os.walk, directories which cannot be listed are skipped
+        logging.warning("Cannot list directory %s: %s", path, error)
+    if shard_count > 1:
+        files = [file for file in files if shard_of(file, shard_count) == shard_index]
+    if sort:
+        files.sort()
+        directories.sort()
+    return files, directories
+
+
+def _walk(
+    directories: Iterable[str],
+    scan: functools.partial,
+    executor: Optional[Executor],
+    max_pending: int,
+) -> Iterator[str]:
+    """Yields xml files of directories depth-first, while the following
+    directories are scanned in the executor."""
+    for files, subdirectories in ordered_map(
+        scan, directories, executor=executor, chunk_size=1, max_pending=max_pending
+    ):
+        yield from files
+        yield from _walk(subdirectories, scan, executor, max_pending)
+
+
+def read_manifest(manifest: str, folder_name: Optional[str] = None) -> Iterator[str]:
+    """Yields paths of xml files listed in a manifest file.
+
+    The manifest has one path per line, empty lines and lines starting with #
+    are skipped.
+
+    :param manifest: path to the manifest file
+    :param folder_name: optional folder relative paths are resolved against
+    :return: iterator over paths in the order of the manifest
+    """
+    with open(manifest) as f:
+        for line in f:
+            path = line.strip()
+            if not path or path.startswith("#"):
+                continue
+            yield os.path.join(folder_name, path) if folder_name else path
+
+
+def iter_xml_files(
+    folder_name: str,
+    sort: Optional[bool] = None,
+    prefixes: Optional[Iterable[str]] = None,
+    manifest: Optional[str] = None,
+    workers: int = 8,
+    executor: Optional[Executor] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> Iterator[str]:
+    """Lazily yields paths of xml files in the folder and its subfolders.
+
+    Files of a folder are yielded before files of its subfolders. With sort, the
+    order is deterministic: files and subfolders are visited by name. Files of
+    a manifest are yielded in the order of the manifest unless sort is True.
+
+    :param folder_name: path to the folder with xml files
+    :param sort: visit files and subfolders sorted by name, by default True
+        when walking the folder and False for a manifest
+    :param prefixes: optional prefixes of file names to keep, e.g. ["NCT0001"]
+        to take a shard of the dump; NCTxxxx subfolders which cannot contain
+        such files are not listed at all
+    :param manifest: optional file listing the xml files (see read_manifest)
+        used instead of walking the folder; relative paths are resolved against
+        folder_name
+    :param workers: number of threads listing directories; with one worker
+        directories are listed one by one in the calling thread
+    :param executor: optional executor used instead of creating a thread pool
+    :param shard_index: yield only files of this shard, see shard_of
+    :param shard_count: number of shards the files are split into, e.g. the
+        number of nodes parsing the dump
+    :return: iterator over paths of xml files
+    """
+    check_shard(shard_index, shard_count)
+    if prefixes is not None:
+        prefixes = frozenset(prefixes)
+
+    if manifest is not None:
+        files = read_manifest(manifest, folder_name)
+        if prefixes is not None:
+            prefixes_tuple = tuple(prefixes)
+            files = (
+                file
+                for file in files
+                if os.path.basename(file).startswith(prefixes_tuple)
+            )
+        if shard_count > 1:
+            files = (
+                file for file in files if shard_of(file, shard_count) == shard_index
+            )
+        yield from sorted(files) if sort else files
+        return
+    if sort is None:
+        sort = True
+
+    with ExitStack() as stack:
+        if executor is None and workers > 1:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+        scan = functools.partial(
+            _scan_directory,
+            sort=sort,
+            prefixes=prefixes,
+            shard_index=shard_index,
+            shard_count=shard_count,
+        )
+        yield from _walk([folder_name], scan, executor, max_pending=2 * workers)
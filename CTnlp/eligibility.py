@@ -0,0 +1,133 @@
+"""Module containing a vectorized filter of patients against structured
+eligibility criteria of clinical trials (gender, age and healthy volunteers).
+
+Requires numpy (`pip install CTnlp[numpy]`).
+"""
+from typing import Dict, Iterable, List, Sequence
+
+from CTnlp.clinical_trial import ClinicalTrial
+from CTnlp.index import ELIGIBLE_TRIAL_GENDERS
+from CTnlp.patient import Patient
+from CTnlp.utils import Gender
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class StructuredEligibilityFilter:
+    """Batched filter packing trials' gender, minimum_age, maximum_age and
+    accepts_healthy_volunteers into NumPy arrays, so whole batches of patients
+    are checked against all trials with array operations.
+
+    Semantics are the same as in TrialIndex.query: unknown patient gender or
+    age does not filter trials, trials without an age limit accept every age
+    and healthy patients match only trials accepting healthy volunteers.
+
+    Usage::
+
+        eligibility_filter = StructuredEligibilityFilter(cts)
+        candidates = eligibility_filter.candidate_lists(patients)
+    """
+
+    def __init__(self, clinical_trials: Iterable[ClinicalTrial]):
+        if np is None:
+            raise ImportError(
+                "StructuredEligibilityFilter requires numpy, install it with "
+                "`pip install CTnlp[numpy]`"
+            )
+        self.clinical_trials: List[ClinicalTrial] = list(clinical_trials)
+        self.nct_ids: List[str] = [ct.nct_id for ct in self.clinical_trials]
+
+        genders = [ct.gender for ct in self.clinical_trials]
+        self.accepts_male = np.array(
+            [gender in ELIGIBLE_TRIAL_GENDERS[Gender.male] for gender in genders],
+            dtype=bool,
+        )
+        self.accepts_female = np.array(
+            [gender in ELIGIBLE_TRIAL_GENDERS[Gender.female] for gender in genders],
+            dtype=bool,
+        )
+        self.minimum_age = np.array(
+            [
+                -np.inf if ct.minimum_age is None else ct.minimum_age
+                for ct in self.clinical_trials
+            ],
+            dtype=np.float64,
+        )
+        self.maximum_age = np.array(
+            [
+                np.inf if ct.maximum_age is None else ct.maximum_age
+                for ct in self.clinical_trials
+            ],
+            dtype=np.float64,
+        )
+        self.accepts_healthy = np.array(
+            [ct.accepts_healthy_volunteers for ct in self.clinical_trials],
+            dtype=bool,
+        )
+
+    def __len__(self) -> int:
+        return len(self.clinical_trials)
+
+    def candidate_matrix(self, patients: Sequence[Patient]) -> "np.ndarray":
+        """Returns boolean matrix of shape (len(patients), len(trials)) where
+        True means that the trial's structured criteria match the patient.
+
+        :param patients: sequence of Patient objects
+        :return: numpy boolean array
+        """
+        is_male = np.array([p.gender == Gender.male for p in patients], dtype=bool)
+        is_female = np.array([p.gender == Gender.female for p in patients], dtype=bool)
+        ages = np.array(
+            [np.nan if p.age is None else p.age for p in patients], dtype=np.float64
+        )
+        is_healthy = np.array([bool(p.is_healthy) for p in patients], dtype=bool)
+
+        matrix = ~is_male[:, None] | self.accepts_male[None, :]
+        matrix &= ~is_female[:, None] | self.accepts_female[None, :]
+        matrix &= ~is_healthy[:, None] | self.accepts_healthy[None, :]
+        # comparisons with NaN (unknown age) are False, so they are handled apart
+        known_age = ~np.isnan(ages)
+        ages = np.where(known_age, ages, 0.0)
+        matrix &= ~known_age[:, None] | (
+            (self.minimum_age[None, :] <= ages[:, None])
+            & (ages[:, None] <= self.maximum_age[None, :])
+        )
+        return matrix
+
+    def candidate_lists(
+        self, patients: Sequence[Patient], batch_size: int = 256
+    ) -> List["np.ndarray"]:
+        """Returns positions of candidate trials for every patient.
+
+        Patients are processed in batches of batch_size, so that only a
+        (batch_size, len(trials)) matrix is kept in memory at once.
+
+        :param patients: sequence of Patient objects
+        :param batch_size: number of patients evaluated at once
+        :return: list with an array of trial positions per patient
+        """
+        candidates: List[np.ndarray] = []
+        for start in range(0, len(patients), batch_size):
+            matrix = self.candidate_matrix(patients[start : start + batch_size])
+            candidates.extend(np.flatnonzero(row) for row in matrix)
+        return candidates
+
+    def candidate_nct_ids(
+        self, patients: Sequence[Patient], batch_size: int = 256
+    ) -> Dict[str, List[str]]:
+        """Returns nct_ids of candidate trials keyed by patient's unique_id,
+        e.g. for TREC-style topic sets.
+
+        :param patients: sequence of Patient objects
+        :param batch_size: number of patients evaluated at once
+        :return: dictionary mapping unique_id to list of nct_ids
+        """
+        return {
+            patient.unique_id: [self.nct_ids[position] for position in positions]
+            for patient, positions in zip(
+                patients, self.candidate_lists(patients, batch_size=batch_size)
+            )
+        }
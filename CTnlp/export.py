@@ -0,0 +1,194 @@
+"""Module containing a columnar export of clinical trials.
+
+Trials are converted into one table with scalar trial fields and child tables
+for list fields, all keyed by nct_id, e.g. for writing Parquet files that can be
+loaded column by column in analytics tools.
+"""
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from CTnlp.clinical_trial import ClinicalTrial
+from CTnlp.utils import chunked
+
+Columns = Dict[str, List[Any]]
+
+# table name -> (column name, arrow type name)
+TABLES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "trials": (
+        ("nct_id", "string"),
+        ("org_study_id", "string"),
+        ("brief_title", "string"),
+        ("official_title", "string"),
+        ("brief_summary", "string"),
+        ("detailed_description", "string"),
+        ("study_type", "string"),
+        ("criteria", "string"),
+        ("gender", "string"),
+        ("minimum_age", "float64"),
+        ("maximum_age", "float64"),
+        ("accepts_healthy_volunteers", "bool_"),
+    ),
+    "inclusion_criteria": (
+        ("nct_id", "string"),
+        ("position", "int32"),
+        ("criterion", "string"),
+    ),
+    "exclusion_criteria": (
+        ("nct_id", "string"),
+        ("position", "int32"),
+        ("criterion", "string"),
+    ),
+    "outcomes": (
+        ("nct_id", "string"),
+        ("outcome_type", "string"),
+        ("position", "int32"),
+        ("measure", "string"),
+    ),
+    "conditions": (
+        ("nct_id", "string"),
+        ("position", "int32"),
+        ("condition", "string"),
+    ),
+    "interventions": (
+        ("nct_id", "string"),
+        ("position", "int32"),
+        ("intervention_type", "string"),
+        ("name", "string"),
+        ("description", "string"),
+    ),
+}
+
+
+def _empty_tables() -> Dict[str, Columns]:
+    return {
+        table: {column: [] for column, _ in columns}
+        for table, columns in TABLES.items()
+    }
+
+
+def _append_items(
+    table: Columns, nct_id: str, values: Iterable[Any], column: str
+) -> None:
+    for position, value in enumerate(values or []):
+        table["nct_id"].append(nct_id)
+        table["position"].append(position)
+        table[column].append(value)
+
+
+def trials_to_columns(clinical_trials: Iterable[ClinicalTrial]) -> Dict[str, Columns]:
+    """Converts clinical trials into column-oriented tables.
+
+    :param clinical_trials: iterable of ClinicalTrial objects
+    :return: dictionary mapping table name to a dictionary of column lists
+    """
+    tables = _empty_tables()
+    trials = tables["trials"]
+    outcomes = tables["outcomes"]
+    interventions = tables["interventions"]
+
+    for ct in clinical_trials:
+        nct_id = ct.nct_id
+        trials["nct_id"].append(nct_id)
+        trials["org_study_id"].append(ct.org_study_id)
+        trials["brief_title"].append(ct.brief_title)
+        trials["official_title"].append(ct.official_title)
+        trials["brief_summary"].append(ct.brief_summary)
+        trials["detailed_description"].append(ct.detailed_description)
+        trials["study_type"].append(ct.study_type)
+        trials["criteria"].append(ct.criteria)
+        trials["gender"].append(ct.gender.value)
+        trials["minimum_age"].append(ct.minimum_age)
+        trials["maximum_age"].append(ct.maximum_age)
+        trials["accepts_healthy_volunteers"].append(ct.accepts_healthy_volunteers)
+
+        _append_items(tables["inclusion_criteria"], nct_id, ct.inclusion, "criterion")
+        _append_items(tables["exclusion_criteria"], nct_id, ct.exclusion, "criterion")
+        _append_items(tables["conditions"], nct_id, ct.conditions, "condition")
+
+        for outcome_type, measures in (
+            ("primary", ct.primary_outcomes),
+            ("secondary", ct.secondary_outcomes),
+        ):
+            for position, measure in enumerate(measures or []):
+                outcomes["nct_id"].append(nct_id)
+                outcomes["outcome_type"].append(outcome_type)
+                outcomes["position"].append(position)
+                outcomes["measure"].append(measure)
+
+        for position, intervention in enumerate(ct.interventions or []):
+            interventions["nct_id"].append(nct_id)
+            interventions["position"].append(position)
+            interventions["intervention_type"].append(intervention.type)
+            interventions["name"].append(intervention.name)
+            interventions["description"].append(intervention.description)
+
+    return tables
+
+
+def iter_column_batches(
+    clinical_trials: Iterable[ClinicalTrial], batch_size: int = 10000
+) -> Iterator[Dict[str, Columns]]:
+    """Lazily converts clinical trials into column-oriented tables, batch_size
+    trials at a time, so that trials can be streamed from the parser.
+
+    :param clinical_trials: iterable of ClinicalTrial objects, consumed lazily
+    :param batch_size: number of trials in a single batch
+    :return: iterator over dictionaries returned by trials_to_columns
+    """
+    for batch in chunked(clinical_trials, batch_size):
+        yield trials_to_columns(batch)
+
+
+def write_parquet(
+    clinical_trials: Iterable[ClinicalTrial],
+    output_folder: str,
+    batch_size: int = 10000,
+    compression: str = "snappy",
+) -> Dict[str, int]:
+    """Streams clinical trials into one Parquet file per table in output_folder.
+
+    Requires pyarrow (`pip install CTnlp[parquet]`).
+
+    :param clinical_trials: iterable of ClinicalTrial objects, consumed lazily
+    :param output_folder: folder where <table>.parquet files are written
+    :param batch_size: number of trials converted and written at once
+    :param compression: Parquet compression codec
+    :return: dictionary mapping table name to number of written rows
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "write_parquet requires pyarrow, install it with "
+            "`pip install CTnlp[parquet]`"
+        ) from e
+
+    schemas = {
+        table: pa.schema(
+            [(column, getattr(pa, type_name)()) for column, type_name in columns]
+        )
+        for table, columns in TABLES.items()
+    }
+    os.makedirs(output_folder, exist_ok=True)
+    writers = {
+        table: pq.ParquetWriter(
+            os.path.join(output_folder, f"{table}.parquet"),
+            schema,
+            compression=compression,
+        )
+        for table, schema in schemas.items()
+    }
+    row_counts = {table: 0 for table in TABLES}
+    try:
+        for batch in iter_column_batches(clinical_trials, batch_size=batch_size):
+            for table, columns in batch.items():
+                writers[table].write_table(
+                    pa.Table.from_pydict(columns, schema=schemas[table])
+                )
+                row_counts[table] += len(columns["nct_id"])
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return row_counts
@@ -0,0 +1,224 @@
+"""Module containing an in-memory index over clinical trials for fast candidate
+retrieval by structured eligibility fields, conditions and interventions.
+
+Sets of trials are represented as bitmaps stored in Python ints, where bit i is
+set if the i-th indexed trial belongs to the set, so filters are combined with
+fast bitwise operations instead of scanning all trials.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from CTnlp.clinical_trial import ClinicalTrial
+from CTnlp.criteria import fold_criterion
+from CTnlp.patient import Patient
+from CTnlp.utils import Gender
+
+# trial genders eligible for a patient of a given gender
+ELIGIBLE_TRIAL_GENDERS: Dict[Gender, Tuple[Gender, ...]] = {
+    Gender.male: (Gender.male, Gender.all, Gender.unknown),
+    Gender.female: (Gender.female, Gender.all, Gender.unknown),
+}
+
+
+def _to_bitmap(positions: List[int]) -> int:
+    """Builds a bitmap from ascending positions in time linear in its size."""
+    if len(positions) < 16:
+        bitmap = 0
+        for position in positions:
+            bitmap |= 1 << position
+        return bitmap
+
+    data = bytearray((positions[-1] >> 3) + 1)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+def _iter_bits(bitmap: int) -> Iterator[int]:
+    """Yields positions of set bits in ascending order."""
+    bits = bin(bitmap)[:1:-1]  # least significant bit first, without "0b"
+    position = bits.find("1")
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
+
+class _UpperBoundedValues:
+    """Interval structure answering which trials have a value not greater than x.
+
+    For every distinct value a cumulative bitmap of trials is precomputed, so the
+    query is a single binary search. Trials without a value match every x.
+    """
+
+    def __init__(self, values: Sequence[Optional[float]]):
+        missing: List[int] = []
+        positions: Dict[float, List[int]] = defaultdict(list)
+        for position, value in enumerate(values):
+            if value is None:
+                missing.append(position)
+            else:
+                positions[value].append(position)
+
+        self.missing = _to_bitmap(missing)
+        self.values: List[float] = sorted(positions)
+        # cumulative[i] contains trials with value at most values[i]
+        self.cumulative: List[int] = []
+        bitmap = self.missing
+        for value in self.values:
+            bitmap |= _to_bitmap(positions[value])
+            self.cumulative.append(bitmap)
+
+    def not_greater_than(self, x: float) -> int:
+        index = bisect_right(self.values, x)
+        return self.cumulative[index - 1] if index else self.missing
+
+
+class TrialIndex:
+    """Index over clinical trials returning candidate trials for patients.
+
+    It contains:
+    - hash indexes from normalized condition and intervention names to trials,
+    - interval structures over minimum_age and maximum_age,
+    - bitmaps of trials per gender and of trials accepting healthy volunteers.
+
+    Usage::
+
+        index = TrialIndex(iter_clinical_trials_from_folder(TRIALS_FOLDER))
+        candidates = index.candidates(patient)
+    """
+
+    def __init__(self, clinical_trials: Iterable[ClinicalTrial]):
+        self.clinical_trials: List[ClinicalTrial] = list(clinical_trials)
+        self.all_trials = (1 << len(self.clinical_trials)) - 1
+
+        conditions: Dict[str, List[int]] = defaultdict(list)
+        interventions: Dict[str, List[int]] = defaultdict(list)
+        genders: Dict[Gender, List[int]] = defaultdict(list)
+        healthy_volunteers: List[int] = []
+
+        for position, clinical_trial in enumerate(self.clinical_trials):
+            for condition in {
+                fold_criterion(condition)
+                for condition in clinical_trial.conditions or []
+                if condition
+            }:
+                conditions[condition].append(position)
+            for intervention in {
+                fold_criterion(intervention.name)
+                for intervention in clinical_trial.interventions or []
+                if intervention.name
+            }:
+                interventions[intervention].append(position)
+            genders[clinical_trial.gender].append(position)
+            if clinical_trial.accepts_healthy_volunteers:
+                healthy_volunteers.append(position)
+
+        self.conditions: Dict[str, int] = {
+            key: _to_bitmap(positions) for key, positions in conditions.items()
+        }
+        self.interventions: Dict[str, int] = {
+            key: _to_bitmap(positions) for key, positions in interventions.items()
+        }
+        self.genders: Dict[Gender, int] = {
+            key: _to_bitmap(positions) for key, positions in genders.items()
+        }
+        self.healthy_volunteers = _to_bitmap(healthy_volunteers)
+
+        self.minimum_ages = _UpperBoundedValues(
+            [ct.minimum_age for ct in self.clinical_trials]
+        )
+        # maximum ages are negated, as trials with maximum_age >= age are needed
+        self.negated_maximum_ages = _UpperBoundedValues(
+            [
+                None if ct.maximum_age is None else -ct.maximum_age
+                for ct in self.clinical_trials
+            ]
+        )
+
+    @classmethod
+    def merge(cls, indexes: Iterable["TrialIndex"]) -> "TrialIndex":
+        """Merges indexes, e.g. built on nodes parsing separate shards, into an
+        index over trials of all indexes one after another.
+
+        Bitmaps are rebuilt, which is linear in the total number of trials.
+        """
+        return cls(
+            clinical_trial
+            for index in indexes
+            for clinical_trial in index.clinical_trials
+        )
+
+    def __len__(self) -> int:
+        return len(self.clinical_trials)
+
+    def _names_bitmap(self, index: Dict[str, int], names: Iterable[str]) -> int:
+        bitmap = 0
+        for name in names:
+            bitmap |= index.get(fold_criterion(name), 0)
+        return bitmap
+
+    def _genders_bitmap(self, genders: Iterable[Gender]) -> int:
+        bitmap = 0
+        for gender in genders:
+            bitmap |= self.genders.get(gender, 0)
+        return bitmap
+
+    def query(
+        self,
+        gender: Optional[Gender] = None,
+        age: Optional[float] = None,
+        is_healthy: Optional[bool] = None,
+        conditions: Optional[Iterable[str]] = None,
+        interventions: Optional[Iterable[str]] = None,
+    ) -> int:
+        """Returns bitmap of trials matching all given criteria.
+
+        :param gender: patient's gender; unknown gender matches all trials
+        :param age: patient's age in years, trials with age limits excluding
+            it are filtered out
+        :param is_healthy: if True, only trials accepting healthy volunteers
+        :param conditions: keep only trials with any of the conditions
+        :param interventions: keep only trials with any of the interventions
+        :return: bitmap with bits set at positions of matching trials
+        """
+        bitmap = self.all_trials
+        if gender in ELIGIBLE_TRIAL_GENDERS:
+            bitmap &= self._genders_bitmap(ELIGIBLE_TRIAL_GENDERS[gender])
+        if age is not None:
+            bitmap &= self.minimum_ages.not_greater_than(age)
+            bitmap &= self.negated_maximum_ages.not_greater_than(-age)
+        if is_healthy:
+            bitmap &= self.healthy_volunteers
+        if conditions is not None:
+            bitmap &= self._names_bitmap(self.conditions, conditions)
+        if interventions is not None:
+            bitmap &= self._names_bitmap(self.interventions, interventions)
+        return bitmap
+
+    def positions(self, bitmap: int) -> List[int]:
+        """Returns positions of trials in the bitmap."""
+        return list(_iter_bits(bitmap))
+
+    def trials(self, bitmap: int) -> List[ClinicalTrial]:
+        """Returns trials in the bitmap in the order they were indexed."""
+        return [self.clinical_trials[position] for position in _iter_bits(bitmap)]
+
+    def candidates(
+        self, patient: Patient, match_conditions: bool = False
+    ) -> List[ClinicalTrial]:
+        """Returns trials whose structured eligibility criteria match the patient.
+
+        :param patient: Patient object
+        :param match_conditions: additionally require any of patient.conditions
+            to be one of the trial's conditions
+        :return: list of candidate trials
+        """
+        return self.trials(
+            self.query(
+                gender=patient.gender,
+                age=patient.age,
+                is_healthy=patient.is_healthy,
+                conditions=patient.conditions if match_conditions else None,
+            )
+        )
@@ -0,0 +1,377 @@
+"""Module containing instrumentation of the clinical trials ingest pipeline."""
+import heapq
+import json
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from CTnlp.utils import Gender
+
+# stages of parsing a single file, in order
+STAGES = ("read", "xml_parse", "eligibility", "criteria", "build")
+
+# fields of parsed trials whose missing rates are reported
+REPORTED_FIELDS = (
+    "org_study_id",
+    "brief_title",
+    "official_title",
+    "brief_summary",
+    "detailed_description",
+    "study_type",
+    "criteria",
+    "inclusion",
+    "exclusion",
+    "gender",
+    "minimum_age",
+    "maximum_age",
+    "primary_outcomes",
+    "secondary_outcomes",
+    "conditions",
+    "interventions",
+)
+
+# placeholder values the parser uses for missing elements
+_MISSING_VALUES = {"empty_org_study_id", "empty_nct_id"}
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None or value is Gender.unknown:
+        return True
+    if isinstance(value, str):
+        return not value.strip() or value in _MISSING_VALUES
+    if isinstance(value, list):
+        return not value
+    return False
+
+
+def missing_fields(
+    clinical_trial: Any, fields: Optional[Iterable[str]] = None
+) -> Tuple[str, ...]:
+    """Returns names of REPORTED_FIELDS which are empty in the trial.
+
+    :param clinical_trial: ClinicalTrial or CompactClinicalTrial
+    :param fields: optional fields the trial was parsed with, other fields are
+        not reported as missing
+    """
+    reported = REPORTED_FIELDS
+    if fields is not None:
+        reported = tuple(name for name in reported if name in fields)
+    return tuple(
+        name for name in reported if _is_missing(getattr(clinical_trial, name))
+    )
+
+
+@dataclass
+class FileMetrics:
+    """Metrics of a single parsed file, collected in the worker parsing it.
+
+    stage_seconds maps names of STAGES to seconds spent in them. Files loaded
+    from a TrialCache are marked as cached and have no stage timings.
+    criteria_split_failed, unparseable_ages and missing_fields describe data
+    quality of the parsed trial."""
+
+    source: str
+    bytes_read: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    skip_reason: Optional[str] = None
+    cached: bool = False
+    criteria_split_failed: bool = False
+    unparseable_ages: List[str] = field(default_factory=list)
+    missing_fields: Tuple[str, ...] = ()
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stage_seconds.values())
+
+    @property
+    def skipped(self) -> bool:
+        return self.skip_reason is not None
+
+
+class Histogram:
+    """Histogram of durations with logarithmic buckets.
+
+    Bucket i counts durations up to SMALLEST * 2**i seconds, so a few dozen
+    buckets cover durations from microseconds to hours."""
+
+    SMALLEST = 1e-6
+
+    def __init__(self):
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        if seconds <= self.SMALLEST:
+            bucket = 0
+        else:
+            bucket = math.ceil(math.log2(seconds / self.SMALLEST))
+        if bucket >= len(self.counts):
+            self.counts.extend([0] * (bucket + 1 - len(self.counts)))
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "Histogram") -> None:
+        """Adds durations counted by the other histogram."""
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for bucket, count in enumerate(other.counts):
+            self.counts[bucket] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Returns the upper bound of the bucket containing the q-th percentile,
+        capped at the largest recorded duration."""
+        rank = math.ceil(self.count * q / 100)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self.SMALLEST * 2**bucket, self.max)
+        return 0.0
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Returns (upper bound in seconds, count) pairs of non-empty buckets."""
+        return [
+            (self.SMALLEST * 2**bucket, count)
+            for bucket, count in enumerate(self.counts)
+            if count
+        ]
+
+
+class IngestStats:
+    """Statistics of an ingest run, filled from FileMetrics of parsed files.
+
+    Usage::
+
+        stats = IngestStats()
+        cts = parse_clinical_trials_from_folder(TRIALS_FOLDER, stats=stats)
+        print(stats.format())
+
+    Statistics of shards parsed on separate nodes are combined with save, load
+    and merge.
+    """
+
+    def __init__(self, slowest_n: int = 10):
+        """
+        :param slowest_n: number of slowest files to keep
+        """
+        self.slowest_n = slowest_n
+        self.files = 0
+        self.parsed = 0
+        self.cached = 0
+        self.bytes_read = 0
+        self.skipped: List[Tuple[str, str]] = []
+        self.xml_failures = 0
+        self.criteria_split_failures = 0
+        # counts of age strings which parse_age could not parse
+        self.unparseable_ages: Counter = Counter()
+        # numbers of parsed or cached trials missing each of REPORTED_FIELDS
+        self.missing_fields: Counter = Counter()
+        self.stages: Dict[str, Histogram] = {
+            stage: Histogram() for stage in STAGES + ("total",)
+        }
+        # min-heap of (seconds, source) of the slowest files
+        self._slowest: List[Tuple[float, str]] = []
+
+    def record(self, metrics: FileMetrics) -> None:
+        """Adds metrics of a single file."""
+        self.files += 1
+        self.missing_fields.update(metrics.missing_fields)
+        if metrics.cached:
+            self.cached += 1
+            return
+        self.bytes_read += metrics.bytes_read
+        if metrics.skipped:
+            self.skipped.append((metrics.source, metrics.skip_reason))
+            if metrics.skip_reason.startswith("xml parse error"):
+                self.xml_failures += 1
+        else:
+            self.parsed += 1
+        self.criteria_split_failures += metrics.criteria_split_failed
+        self.unparseable_ages.update(metrics.unparseable_ages)
+        for stage, seconds in metrics.stage_seconds.items():
+            self.stages[stage].add(seconds)
+        total_seconds = metrics.total_seconds
+        self.stages["total"].add(total_seconds)
+        self._push_slowest(total_seconds, metrics.source)
+
+    def _push_slowest(self, seconds: float, source: str) -> None:
+        if len(self._slowest) < self.slowest_n:
+            heapq.heappush(self._slowest, (seconds, source))
+        elif self._slowest and seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, source))
+
+    @property
+    def slowest_files(self) -> List[Tuple[str, float]]:
+        """Returns (source, seconds) of the slowest files, slowest first."""
+        return [
+            (source, seconds) for seconds, source in sorted(self._slowest, reverse=True)
+        ]
+
+    @property
+    def missing_rates(self) -> Dict[str, float]:
+        """Returns fractions of parsed and cached trials missing each of
+        REPORTED_FIELDS."""
+        trials = self.parsed + self.cached
+        return {
+            name: self.missing_fields[name] / trials if trials else 0.0
+            for name in REPORTED_FIELDS
+        }
+
+    @property
+    def criteria_split_rate(self) -> float:
+        """Returns the fraction of parsed trials whose criteria were split into
+        inclusion and exclusion criteria or were empty."""
+        if not self.parsed:
+            return 0.0
+        return 1 - self.criteria_split_failures / self.parsed
+
+    def merge(self, other: "IngestStats") -> None:
+        """Adds statistics of another run, e.g. of another shard."""
+        self.files += other.files
+        self.parsed += other.parsed
+        self.cached += other.cached
+        self.bytes_read += other.bytes_read
+        self.skipped.extend(other.skipped)
+        self.xml_failures += other.xml_failures
+        self.criteria_split_failures += other.criteria_split_failures
+        self.unparseable_ages.update(other.unparseable_ages)
+        self.missing_fields.update(other.missing_fields)
+        for stage, histogram in other.stages.items():
+            self.stages.setdefault(stage, Histogram()).merge(histogram)
+        for seconds, source in other._slowest:
+            self._push_slowest(seconds, source)
+
+    def save(self, path: str) -> None:
+        """Saves the statistics to a json file, e.g. a report of one shard which
+        is merged with reports of other shards after loading."""
+        state = {
+            "slowest_n": self.slowest_n,
+            "files": self.files,
+            "parsed": self.parsed,
+            "cached": self.cached,
+            "bytes_read": self.bytes_read,
+            "skipped": self.skipped,
+            "xml_failures": self.xml_failures,
+            "criteria_split_failures": self.criteria_split_failures,
+            "unparseable_ages": self.unparseable_ages,
+            "missing_fields": self.missing_fields,
+            "stages": {
+                stage: {
+                    "counts": histogram.counts,
+                    "count": histogram.count,
+                    "total": histogram.total,
+                    "max": histogram.max,
+                }
+                for stage, histogram in self.stages.items()
+            },
+            "slowest": self._slowest,
+        }
+        with open(path, "w") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path: str) -> "IngestStats":
+        """Loads statistics saved with save."""
+        with open(path) as f:
+            state = json.load(f)
+        stats = cls(slowest_n=state["slowest_n"])
+        for name in [
+            "files",
+            "parsed",
+            "cached",
+            "bytes_read",
+            "xml_failures",
+            "criteria_split_failures",
+        ]:
+            setattr(stats, name, state[name])
+        stats.skipped = [(source, reason) for source, reason in state["skipped"]]
+        stats.unparseable_ages = Counter(state["unparseable_ages"])
+        stats.missing_fields = Counter(state["missing_fields"])
+        for stage, histogram_state in state["stages"].items():
+            histogram = stats.stages.setdefault(stage, Histogram())
+            histogram.counts = histogram_state["counts"]
+            histogram.count = histogram_state["count"]
+            histogram.total = histogram_state["total"]
+            histogram.max = histogram_state["max"]
+        stats._slowest = [(seconds, source) for seconds, source in state["slowest"]]
+        heapq.heapify(stats._slowest)
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns the statistics as a json-serializable dictionary."""
+        return {
+            "files": self.files,
+            "parsed": self.parsed,
+            "cached": self.cached,
+            "skipped": len(self.skipped),
+            "bytes_read": self.bytes_read,
+            "stages": {
+                stage: {
+                    "count": histogram.count,
+                    "total_seconds": histogram.total,
+                    "mean_seconds": histogram.mean,
+                    "p50_seconds": histogram.percentile(50),
+                    "p99_seconds": histogram.percentile(99),
+                    "max_seconds": histogram.max,
+                }
+                for stage, histogram in self.stages.items()
+            },
+            "slowest_files": self.slowest_files,
+            "skipped_files": self.skipped,
+            **self.report(),
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """Returns data quality counters as a json-serializable dictionary."""
+        return {
+            "xml_failures": self.xml_failures,
+            "criteria_split_failures": self.criteria_split_failures,
+            "criteria_split_rate": self.criteria_split_rate,
+            "unparseable_ages": dict(self.unparseable_ages),
+            "missing_rates": self.missing_rates,
+        }
+
+    def format(self) -> str:
+        """Formats the statistics as a human-readable table."""
+        lines = [
+            f"files: {self.files}, parsed: {self.parsed}, cached: {self.cached}, "
+            f"skipped: {len(self.skipped)}, bytes read: {self.bytes_read}",
+            f"{'stage':<12}{'total s':>10}{'mean ms':>10}{'p99 ms':>10}{'max ms':>10}",
+        ]
+        for stage, histogram in self.stages.items():
+            lines.append(
+                f"{stage:<12}{histogram.total:>10.3f}{histogram.mean * 1e3:>10.3f}"
+                f"{histogram.percentile(99) * 1e3:>10.3f}{histogram.max * 1e3:>10.3f}"
+            )
+        lines += [
+            f"slow: {source} {seconds:.4f}s" for source, seconds in self.slowest_files
+        ]
+        lines += [f"skipped: {source} ({reason})" for source, reason in self.skipped]
+        lines.append(
+            f"xml failures: {self.xml_failures}, criteria split failures: "
+            f"{self.criteria_split_failures} "
+            f"(split rate {self.criteria_split_rate:.2%}), unparseable ages: "
+            f"{sum(self.unparseable_ages.values())}"
+        )
+        lines += [
+            f"unparseable age: {age!r} x{count}"
+            for age, count in self.unparseable_ages.most_common()
+        ]
+        lines += [
+            f"missing {name}: {rate:.2%}"
+            for name, rate in self.missing_rates.items()
+            if rate
+        ]
+        return "\n".join(lines)
@@ -1,16 +1,49 @@
 """Module containing parsers for clinical trials file"""
-import copy
+import asyncio
+import functools
+import io
+import itertools
 import logging
-import os
+import operator
+import posixpath
 import re
-from glob import glob
-from typing import List, Optional, Tuple, Dict
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from xml.etree.ElementTree import Element
 
 import defusedxml.ElementTree as ET
 import tqdm
 
-from CTnlp.clinical_trial import ClinicalTrial, Intervention
-from CTnlp.utils import Gender
+from CTnlp.cache import TrialCache
+from CTnlp.clinical_trial import ClinicalTrial, CompactClinicalTrial, Intervention
+from CTnlp.criteria import fold_criterion
+from CTnlp.discovery import check_shard, iter_xml_files, shard_of
+from CTnlp.metrics import FileMetrics, IngestStats, missing_fields
+from CTnlp.utils import Gender, chunked, ordered_map_misses
+
+T = TypeVar("T")
 
 
 def _safe_get_item(root: ET, tag_name: str, default: str = "") -> str:
@@ -33,6 +66,36 @@ def _safe_get_nested_item(root: ET, tag_name: str, default: str = "") -> str:
     return result
 
 
+# regular expressions are compiled once at import instead of on every call
+_CRITERIA_SPLIT_REGEX = re.compile(r" - | \d\. ")
+_WHITESPACE_REGEX = re.compile(r"[\r\n\t ]+")
+
+INCLUSION_HEADERS = (
+    "inclusion criteria",
+    "inclusive criteria",
+)
+EXCLUSION_HEADERS = (
+    "eclusion criteria",
+    "exclusion critieria",
+    "exclusion criteria",
+    "exclusive criteria",
+)
+
+
+# age patterns with denominators converting the value to years
+_AGE_PATTERNS: Tuple[Tuple[Pattern, int], ...] = tuple(
+    (re.compile(pattern, flags=re.IGNORECASE), denominator)
+    for pattern, denominator in {
+        r"(\d{1,3}) Year[s]?": 1,
+        r"(\d{1,3}) Month[s]?": 12,
+        r"(\d{1,3}) Week[s]?": 52,
+        r"(\d{1,3}) Day[s]?": 365,
+        r"(\d{1,3}) Hour[s]?": 8766,
+        r"(\d{1,3}) Minute[s]?": 525960,
+    }.items()
+)
+
+
 def get_criteria(criteria_string: str) -> List[str]:
     """Parses inclusion or exclusion criteria string and returns a list of criteria.
 
@@ -42,15 +105,39 @@ def get_criteria(criteria_string: str) -> List[str]:
     criteria_list: List[str] = []
 
     if criteria_string.strip():
-        for criterion in re.split(r" - | \d\. ", criteria_string):
+        for criterion in _CRITERIA_SPLIT_REGEX.split(criteria_string):
             if criterion.strip() and criterion.strip() != ":":
-                criterion = re.sub(r"[\r\n\t ]+", " ", criterion)
+                criterion = _WHITESPACE_REGEX.sub(" ", criterion)
                 criteria_list.append(criterion.strip())
 
     return criteria_list
 
 
-def parse_criteria(criteria: str) -> Optional[Tuple[List[str], List[str]]]:
+@functools.lru_cache(maxsize=None)
+def _criteria_headers_regex(
+    inclusion_headers: Tuple[str, ...], exclusion_headers: Tuple[str, ...]
+) -> Pattern:
+    """Compiles a single alternation matching any inclusion or exclusion header,
+    with the matched kind available as match.lastgroup."""
+
+    def _alternation(headers: Tuple[str, ...]) -> str:
+        # longer headers first so that a header is never shadowed by its prefix
+        return "|".join(
+            re.escape(header) for header in sorted(headers, key=len, reverse=True)
+        )
+
+    return re.compile(
+        f"(?P<inclusion>{_alternation(inclusion_headers)})"
+        f"|(?P<exclusion>{_alternation(exclusion_headers)})",
+        re.IGNORECASE,
+    )
+
+
+def parse_criteria(
+    criteria: str,
+    inclusion_headers: Iterable[str] = INCLUSION_HEADERS,
+    exclusion_headers: Iterable[str] = EXCLUSION_HEADERS,
+) -> Optional[Tuple[List[str], List[str]]]:
     """Parses the criteria xml element to find and extract inclusion and
     exclusion criteria for a study.
 
@@ -58,58 +145,46 @@ def parse_criteria(criteria: str) -> Optional[Tuple[List[str], List[str]]]:
     - incl/excl criteria start with a header and are sorted inclusion first,
     - every criterion starts from a newline with a number or a '-' character.
 
+    Headers are located in a single scan of the text with one precompiled
+    regular expression, regardless of the number of header variants.
+
     :param criteria: element with criteria string
+    :param inclusion_headers: case-insensitive headers starting inclusion criteria
+    :param exclusion_headers: case-insensitive headers starting exclusion criteria
     :return: tuple with inclusion and exclusion criteria lists. If criteria
              cannot be parsed, returns None.
     """
+    regex_headers = _criteria_headers_regex(
+        tuple(inclusion_headers), tuple(exclusion_headers)
+    )
 
-    def _split_criteria(text: str, header: str) -> Tuple[str, str]:
-        """Splits the criteria text based on the given header."""
-        regex_header = re.compile(re.escape(header), re.IGNORECASE)
-        match = regex_header.search(text)
-        if match:
-            start_index = match.start()
-            return text[:start_index], text[start_index + len(match.group()) :]
-        return text, ""
-
-    inclusion_headers = [
-        "inclusion criteria",
-        "inclusive criteria",
-    ]
-    exclusion_headers = [
-        "eclusion criteria",
-        "exclusion critieria",
-        "exclusion criteria",
-        "exclusive criteria",
-    ]
-    criteria_text = copy.copy(criteria)
-
-    # Splitting the text based on inclusion headers
-    inclusion_text = ""
-    pre_inclusion_text = ""
-    for inclusion_header in inclusion_headers:
-        pre_inclusion_text, inclusion_text = _split_criteria(
-            criteria_text, inclusion_header
-        )
-        if inclusion_text:
+    inclusion_match = None
+    exclusion_match = None
+    for match in regex_headers.finditer(criteria):
+        if inclusion_match is None:
+            if match.lastgroup == "inclusion":
+                inclusion_match = match
+        elif match.lastgroup == "exclusion":
+            exclusion_match = match
             break
 
+    pre_inclusion_text = criteria
+    if inclusion_match:
+        pre_inclusion_text = criteria[: inclusion_match.start()]
     if pre_inclusion_text.strip().lower() not in ["", "key", "-", "main"]:
         logging.debug(
             "parse_criteria: parser is skipping text found before inclusion split: %s",
             pre_inclusion_text.strip(),
         )
-    if not inclusion_text:
+    if not inclusion_match or inclusion_match.end() == len(criteria):
         return None
 
-    # Splitting the remaining text based on exclusion headers
-    exclusion_text = ""
-    for exclusion_header in exclusion_headers:
-        inclusion_text, exclusion_text = _split_criteria(
-            inclusion_text, exclusion_header
-        )
-        if exclusion_text:
-            break
+    if exclusion_match:
+        inclusion_text = criteria[inclusion_match.end() : exclusion_match.start()]
+        exclusion_text = criteria[exclusion_match.end() :]
+    else:
+        inclusion_text = criteria[inclusion_match.end() :]
+        exclusion_text = ""
 
     inclusion_criteria = get_criteria(inclusion_text)
     exclusion_criteria = get_criteria(exclusion_text)
@@ -117,9 +192,132 @@ def parse_criteria(criteria: str) -> Optional[Tuple[List[str], List[str]]]:
     return inclusion_criteria, exclusion_criteria
 
 
+class CriterionCache:
+    """Memoizes an expensive criterion-processing function, e.g. a classifier.
+
+    Results are cached on the criterion text with collapsed whitespace and
+    folded case (see fold_criterion), so criteria repeated across trials are
+    processed only once. At most maxsize results are kept in memory with least
+    recently used eviction. An optional persistent store, any MutableMapping
+    with string keys such as a shelve, is checked on in-memory misses and
+    updated with new results.
+
+    Usage::
+
+        with shelve.open("criteria.shelve") as store:
+            classify = CriterionCache(classifier, store=store)
+            labels = [classify(criterion) for criterion in ct.inclusion]
+            print(classify.stats())
+    """
+
+    def __init__(
+        self,
+        function: Callable[[str], Any],
+        maxsize: Optional[int] = 100_000,
+        store: Optional[MutableMapping[str, Any]] = None,
+        normalize: Callable[[str], str] = fold_criterion,
+    ):
+        """
+        :param function: function called with the original criterion text
+        :param maxsize: maximum number of results kept in memory, None means
+            unbounded
+        :param store: optional persistent mapping from cache keys of criteria to
+            results
+        :param normalize: function computing the cache key of a criterion
+        """
+        self.function = function
+        self.maxsize = maxsize
+        self.store = store
+        self.normalize = normalize
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+
+    def __call__(self, criterion: str) -> Any:
+        key = self.normalize(criterion)
+        try:
+            result = self._cache[key]
+        except KeyError:
+            pass
+        else:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return result
+
+        if self.store is not None and key in self.store:
+            result = self.store[key]
+            self.store_hits += 1
+        else:
+            result = self.function(criterion)
+            self.misses += 1
+            if self.store is not None:
+                self.store[key] = result
+
+        self._cache[key] = result
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return result
+
+    def map(self, criteria: Iterable[str]) -> List[Any]:
+        """Returns results for every criterion."""
+        return [self(criterion) for criterion in criteria]
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def hit_rate(self) -> float:
+        """Ratio of calls answered from memory or from the store."""
+        calls = self.hits + self.store_hits + self.misses
+        return (self.hits + self.store_hits) / calls if calls else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Returns numbers of hits, store hits, misses, cached results and the
+        hit rate."""
+        return {
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "hit_rate": self.hit_rate,
+        }
+
+    def clear(self) -> None:
+        """Clears results kept in memory and statistics, but not the store."""
+        self._cache.clear()
+        self.hits = self.store_hits = self.misses = 0
+
+
+def classify_criteria(
+    criteria: str, function: Callable[[str], Any]
+) -> Optional[Tuple[List[Any], List[Any]]]:
+    """Parses criteria with parse_criteria and applies the function, e.g. a
+    CriterionCache, to every inclusion and exclusion criterion.
+
+    :param criteria: criteria string
+    :param function: criterion-processing function
+    :return: tuple with results for inclusion and exclusion criteria. If criteria
+             cannot be parsed, returns None.
+    """
+    parsed_criteria = parse_criteria(criteria)
+    if parsed_criteria is None:
+        return None
+    inclusion_criteria, exclusion_criteria = parsed_criteria
+    return (
+        [function(criterion) for criterion in inclusion_criteria],
+        [function(criterion) for criterion in exclusion_criteria],
+    )
+
+
+@functools.lru_cache(maxsize=4096)
 def parse_age(age_string: str) -> Optional[float]:
     """Parses age from string to a float number of years.
 
+    Results are memoized, as age strings have very low cardinality
+    (e.g. "18 Years"), so a warning about an unparseable string is logged only
+    the first time it is seen.
+
     :param age_string: string with age from clinical trial
     :return: Returns age or None if age cannot be parsed or does not exist.
     """
@@ -128,16 +326,8 @@ def parse_age(age_string: str) -> Optional[float]:
     if age_string in {"N/A", "None"}:
         return None
 
-    age_patterns: Dict[str, int] = {
-        r"(\d{1,3}) Year[s]?": 1,
-        r"(\d{1,3}) Month[s]?": 12,
-        r"(\d{1,3}) Week[s]?": 52,
-        r"(\d{1,3}) Day[s]?": 365,
-        r"(\d{1,3}) Hour[s]?": 8766,
-        r"(\d{1,3}) Minute[s]?": 525960,
-    }
-    for pattern, denominator in age_patterns.items():
-        match = re.search(re.compile(pattern, flags=re.IGNORECASE), age_string)
+    for pattern, denominator in _AGE_PATTERNS:
+        match = pattern.search(age_string)
         if match is not None:
             return int(match[1]) / denominator
 
@@ -172,16 +362,16 @@ def parse_health_status(healthy_volunteers: Optional[str]) -> bool:  # sourcery
         return True
 
 
-def parse_eligibility(
-    root: ET,
+def _parse_eligibility_element(
+    eligibility: Optional[Element], split_criteria: bool = True
 ) -> Tuple[Gender, Optional[float], Optional[float], bool, str, List[str], List[str]]:
     inclusion: List[str] = []
     exclusion: List[str] = []
-    if eligibility := root.find("eligibility"):
+    if eligibility:
         criteria = eligibility.find("criteria")
         if criteria:
             criteria = criteria[0].text
-            if result := parse_criteria(criteria=criteria):
+            if split_criteria and (result := parse_criteria(criteria=criteria)):
                 inclusion = result[0]
                 exclusion = result[1]
         else:
@@ -216,19 +406,32 @@ def parse_eligibility(
     )
 
 
-def get_outcomes(root: ET) -> Tuple[List[str], List[str]]:
-    primary_outcomes: List[str] = []
-    secondary_outcomes: List[str] = []
-    if primarys := root.findall("primary_outcome"):
-        primary_outcomes.extend(
-            getattr(primary.find("measure"), "text", "") for primary in primarys
-        )
+def parse_eligibility(
+    root: ET,
+) -> Tuple[Gender, Optional[float], Optional[float], bool, str, List[str], List[str]]:
+    return _parse_eligibility_element(root.find("eligibility"))
+
+
+def _get_outcome_measure(outcome: ET) -> str:
+    return getattr(outcome.find("measure"), "text", "")
 
-    if secondarys := root.findall("secondary_outcome"):
-        secondary_outcomes.extend(
-            getattr(secondary.find("measure"), "text", "") for secondary in secondarys
-        )
 
+def _get_intervention(intervention: ET) -> Intervention:
+    return Intervention(
+        type=_safe_get_item(root=intervention, tag_name="intervention_type"),
+        name=_safe_get_item(root=intervention, tag_name="intervention_name"),
+        description=_safe_get_item(root=intervention, tag_name="description"),
+    )
+
+
+def get_outcomes(root: ET) -> Tuple[List[str], List[str]]:
+    primary_outcomes = [
+        _get_outcome_measure(primary) for primary in root.findall("primary_outcome")
+    ]
+    secondary_outcomes = [
+        _get_outcome_measure(secondary)
+        for secondary in root.findall("secondary_outcome")
+    ]
     return primary_outcomes, secondary_outcomes
 
 
@@ -238,95 +441,1006 @@ def get_conditions(root: ET) -> List[str]:
 
 def get_interventions(root: ET) -> List[Intervention]:
     return [
-        Intervention(
-            type=_safe_get_item(root=_intervention, tag_name="intervention_type"),
-            name=_safe_get_item(root=_intervention, tag_name="intervention_name"),
-            description=_safe_get_item(root=_intervention, tag_name="description"),
-        )
+        _get_intervention(_intervention)
         for _intervention in root.findall("intervention")
     ]
 
 
-def parse_clinical_trial(root: ET) -> ClinicalTrial:
-    org_study_id = getattr(
-        root.find("id_info").find("org_study_id"), "text", "empty_org_study_id"
+def _handle_id_info(element: ET, values: Dict[str, Any]) -> None:
+    values["org_study_id"] = getattr(
+        element.find("org_study_id"), "text", "empty_org_study_id"
     )
-    nct_id = getattr(root.find("id_info").find("nct_id"), "text", "empty_nct_id")
+    values["nct_id"] = getattr(element.find("nct_id"), "text", "empty_nct_id")
 
-    brief_summary = _safe_get_nested_item(root=root, tag_name="brief_summary")
-    description = _safe_get_nested_item(root=root, tag_name="detailed_description")
-    brief_title = _safe_get_item(root=root, tag_name="brief_title")
-    official_title = _safe_get_item(root=root, tag_name="official_title")
-    study_type = _safe_get_item(root=root, tag_name="study_type")
 
-    conditions = get_conditions(root=root)
-    interventions = get_interventions(root=root)
+def _handle_eligibility(
+    element: Optional[Element], values: Dict[str, Any], split_criteria: bool = True
+) -> None:
+    (
+        values["gender"],
+        values["minimum_age"],
+        values["maximum_age"],
+        values["accepts_healthy_volunteers"],
+        values["criteria"],
+        values["inclusion"],
+        values["exclusion"],
+    ) = _parse_eligibility_element(element, split_criteria=split_criteria)
 
-    primary_outcomes, secondary_outcomes = get_outcomes(root=root)
 
-    (
-        gender,
-        minimum_age,
-        maximum_age,
-        healthy_volunteers,
-        criteria,
-        inclusion,
-        exclusion,
-    ) = parse_eligibility(root=root)
-
-    return ClinicalTrial(
-        org_study_id=org_study_id,
-        nct_id=nct_id,
-        brief_summary=brief_summary,
-        detailed_description=description,
-        criteria=criteria,
-        gender=gender,
-        minimum_age=minimum_age,
-        maximum_age=maximum_age,
-        accepts_healthy_volunteers=healthy_volunteers,
-        inclusion=inclusion,
-        exclusion=exclusion,
-        brief_title=brief_title,
-        official_title=official_title,
-        primary_outcomes=primary_outcomes,
-        secondary_outcomes=secondary_outcomes,
-        study_type=study_type,
-        conditions=conditions,
-        interventions=interventions,
+def _text_handler(field_name: str) -> Callable[[Element, Dict[str, Any]], None]:
+    def _handler(element: ET, values: Dict[str, Any]) -> None:
+        values[field_name] = element.text
+
+    return _handler
+
+
+def _nested_text_handler(field_name: str) -> Callable[[Element, Dict[str, Any]], None]:
+    def _handler(element: ET, values: Dict[str, Any]) -> None:
+        values[field_name] = (element[0].text if element else None) or ""
+
+    return _handler
+
+
+def _list_handler(
+    field_name: str, get_item: Callable[[Element], Any]
+) -> Callable[[Element, Dict[str, Any]], None]:
+    def _handler(element: ET, values: Dict[str, Any]) -> None:
+        values[field_name].append(get_item(element))
+
+    return _handler
+
+
+# handlers of the root's children elements, called for the first element with a tag
+_TRIAL_ELEMENT_HANDLERS: Dict[str, Callable[[Element, Dict[str, Any]], None]] = {
+    "id_info": _handle_id_info,
+    "brief_title": _text_handler("brief_title"),
+    "official_title": _text_handler("official_title"),
+    "brief_summary": _nested_text_handler("brief_summary"),
+    "detailed_description": _nested_text_handler("detailed_description"),
+    "study_type": _text_handler("study_type"),
+    "eligibility": _handle_eligibility,
+}
+
+# handlers of the root's children elements, called for every element with a tag
+_TRIAL_REPEATED_ELEMENT_HANDLERS: Dict[
+    str, Callable[[Element, Dict[str, Any]], None]
+] = {
+    "condition": _list_handler("conditions", operator.attrgetter("text")),
+    "intervention": _list_handler("interventions", _get_intervention),
+    "primary_outcome": _list_handler("primary_outcomes", _get_outcome_measure),
+    "secondary_outcome": _list_handler("secondary_outcomes", _get_outcome_measure),
+}
+
+# tags of the root's children used by parse_clinical_trial
+TRIAL_ELEMENT_TAGS = frozenset(_TRIAL_ELEMENT_HANDLERS) | frozenset(
+    _TRIAL_REPEATED_ELEMENT_HANDLERS
+)
+
+# ClinicalTrial fields filled by the handler of each tag
+_TRIAL_ELEMENT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "id_info": ("org_study_id", "nct_id"),
+    "brief_title": ("brief_title",),
+    "official_title": ("official_title",),
+    "brief_summary": ("brief_summary",),
+    "detailed_description": ("detailed_description",),
+    "study_type": ("study_type",),
+    "eligibility": (
+        "gender",
+        "minimum_age",
+        "maximum_age",
+        "accepts_healthy_volunteers",
+        "criteria",
+        "inclusion",
+        "exclusion",
+    ),
+    "condition": ("conditions",),
+    "intervention": ("interventions",),
+    "primary_outcome": ("primary_outcomes",),
+    "secondary_outcome": ("secondary_outcomes",),
+}
+
+# ClinicalTrial fields needed to build ClinicalTrial.text
+_TEXT_FIELDS = (
+    "brief_title",
+    "official_title",
+    "brief_summary",
+    "detailed_description",
+    "criteria",
+)
+
+# field names accepted by the `fields` projection of the parsers
+TRIAL_FIELDS = frozenset(
+    itertools.chain.from_iterable(_TRIAL_ELEMENT_FIELDS.values())
+) | {"text"}
+
+
+def _resolve_fields(fields: Iterable[str]) -> FrozenSet[str]:
+    """Validates requested field names and adds fields they depend on."""
+    fields = frozenset(fields)
+    if unknown_fields := fields - TRIAL_FIELDS:
+        raise ValueError(
+            f"Unknown ClinicalTrial fields: {sorted(unknown_fields)}. "
+            f"Available fields: {sorted(TRIAL_FIELDS)}"
+        )
+    fields |= {"nct_id"}
+    if "text" in fields:
+        fields |= set(_TEXT_FIELDS)
+    return fields
+
+
+@functools.lru_cache(maxsize=None)
+def _projected_handlers(
+    fields: FrozenSet[str],
+) -> Tuple[Dict[str, Callable], Dict[str, Callable]]:
+    """Returns element handlers limited to tags which fill any of the fields."""
+
+    def _project(handlers: Dict[str, Callable]) -> Dict[str, Callable]:
+        return {
+            tag: handler
+            for tag, handler in handlers.items()
+            if fields.intersection(_TRIAL_ELEMENT_FIELDS[tag])
+        }
+
+    handlers = _project(_TRIAL_ELEMENT_HANDLERS)
+    if "eligibility" in handlers and not fields & {"inclusion", "exclusion"}:
+        handlers["eligibility"] = functools.partial(
+            _handle_eligibility, split_criteria=False
+        )
+    return handlers, _project(_TRIAL_REPEATED_ELEMENT_HANDLERS)
+
+
+def trial_element_tags(fields: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+    """Returns tags of the root's children needed to parse the given fields.
+
+    :param fields: ClinicalTrial field names or None for all fields
+    :return: set of tags
+    """
+    if fields is None:
+        return TRIAL_ELEMENT_TAGS
+    handlers, repeated_handlers = _projected_handlers(_resolve_fields(fields))
+    return frozenset(handlers) | frozenset(repeated_handlers)
+
+
+def parse_clinical_trial(
+    root: ET, fields: Optional[Iterable[str]] = None, compact: bool = False
+) -> Union[ClinicalTrial, CompactClinicalTrial]:
+    """Parses a clinical trial from the root element of a ClinicalTrials.gov xml.
+
+    Children of the root are visited once and dispatched by tag to field
+    handlers, instead of searching the root separately for every field.
+
+    :param root: root element of the clinical trial xml
+    :param fields: optional names of ClinicalTrial fields to parse (see
+        TRIAL_FIELDS). Elements which fill none of the requested fields are
+        skipped and their fields keep empty defaults, criteria are split only
+        if inclusion or exclusion is requested and ClinicalTrial.text is built
+        only if "text" is requested. nct_id is always parsed.
+    :param compact: return a memory-compact CompactClinicalTrial with lazily
+        built text instead of ClinicalTrial
+    :return: ClinicalTrial or CompactClinicalTrial object
+    """
+    return _parse_clinical_trial(root, fields=fields, compact=compact)
+
+
+def _handle_eligibility_with_metrics(
+    element: ET, values: Dict[str, Any], split_criteria: bool, metrics: FileMetrics
+) -> None:
+    """Eligibility handler adding seconds spent in parse_criteria to the criteria
+    stage and the rest to the eligibility stage, and recording criteria which
+    cannot be split and ages which cannot be parsed."""
+    start = time.perf_counter()
+    _handle_eligibility(element, values, split_criteria=False)
+    eligibility_end = time.perf_counter()
+    if split_criteria and values["criteria"]:
+        if result := parse_criteria(criteria=values["criteria"]):
+            values["inclusion"], values["exclusion"] = result
+        else:
+            metrics.criteria_split_failed = values["criteria"].strip() != ""
+    metrics.stage_seconds["eligibility"] = eligibility_end - start
+    metrics.stage_seconds["criteria"] = time.perf_counter() - eligibility_end
+
+    # only ages which parse_age returned None for are looked up again
+    for tag in ("minimum_age", "maximum_age"):
+        if values[tag] is None:
+            age_string = element.findtext(tag)
+            if age_string and age_string not in {"N/A", "None"}:
+                metrics.unparseable_ages.append(age_string)
+
+
+def _parse_clinical_trial(
+    root: ET,
+    fields: Optional[Iterable[str]] = None,
+    compact: bool = False,
+    metrics: Optional[FileMetrics] = None,
+) -> Union[ClinicalTrial, CompactClinicalTrial]:
+    """Parses a clinical trial, see parse_clinical_trial.
+
+    If metrics is given, seconds spent in the eligibility, criteria and build
+    (everything else) stages and data quality problems are recorded in it.
+    """
+    if metrics is not None:
+        start = time.perf_counter()
+
+    if fields is None:
+        handlers = _TRIAL_ELEMENT_HANDLERS
+        repeated_handlers = _TRIAL_REPEATED_ELEMENT_HANDLERS
+        build_text = True
+    else:
+        fields = _resolve_fields(fields)
+        handlers, repeated_handlers = _projected_handlers(fields)
+        build_text = "text" in fields
+
+    if metrics is not None and "eligibility" in handlers:
+        split_criteria = fields is None or bool(fields & {"inclusion", "exclusion"})
+        handlers = {
+            **handlers,
+            "eligibility": functools.partial(
+                _handle_eligibility_with_metrics,
+                split_criteria=split_criteria,
+                metrics=metrics,
+            ),
+        }
+
+    values: Dict[str, Any] = {
+        "org_study_id": "empty_org_study_id",
+        "nct_id": "empty_nct_id",
+        "brief_summary": "",
+        "detailed_description": "",
+        "brief_title": "",
+        "official_title": "",
+        "study_type": "",
+        "conditions": [],
+        "interventions": [],
+        "primary_outcomes": [],
+        "secondary_outcomes": [],
+    }
+    seen_tags: Set[str] = set()
+    for element in root:
+        tag = element.tag
+        if handler := repeated_handlers.get(tag):
+            handler(element, values)
+        elif tag not in seen_tags and (handler := handlers.get(tag)):
+            seen_tags.add(tag)
+            handler(element, values)
+
+    if "eligibility" not in seen_tags:
+        _handle_eligibility(None, values)
+
+    if compact:
+        clinical_trial = CompactClinicalTrial(**values, build_text=build_text)
+    else:
+        clinical_trial = ClinicalTrial(**values, build_text=build_text)
+
+    if metrics is not None:
+        stage_seconds = metrics.stage_seconds
+        stage_seconds["build"] = (
+            time.perf_counter()
+            - start
+            - stage_seconds.get("eligibility", 0.0)
+            - stage_seconds.get("criteria", 0.0)
+        )
+        metrics.missing_fields = missing_fields(clinical_trial, fields)
+    return clinical_trial
+
+
+def iterparse_clinical_trial_root(
+    source: Union[str, BinaryIO], tags: FrozenSet[str] = TRIAL_ELEMENT_TAGS
+) -> ET:
+    """Incrementally parses a clinical trial xml keeping only the root's children
+    used by parse_clinical_trial.
+
+    All other elements (e.g. locations, results, references, sponsors) are
+    cleared and detached from the root as soon as they are parsed, so large
+    sections never stay in memory.
+
+    :param source: path to the xml file or a binary file object
+    :param tags: tags of the root's children to keep, see trial_element_tags
+    :return: root element with only the needed children
+    """
+    root = None
+    depth = 0
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1 and element.tag not in tags:
+            element.clear()
+            root.remove(element)
+    return root
+
+
+def _load_root(
+    source: Union[str, bytes],
+    iterparse: bool = False,
+    fields: Optional[FrozenSet[str]] = None,
+    metrics: Optional[FileMetrics] = None,
+) -> Optional[Element]:
+    """Parses the root element of a clinical trial xml.
+
+    :param source: path to the xml file or its content
+    :param iterparse: use iterparse_clinical_trial_root instead of building
+        the full element tree
+    :param fields: optional names of ClinicalTrial fields to parse
+    :param metrics: optional FileMetrics recording why an invalid xml is skipped
+    :return: root element or None if the source is not a valid xml.
+    """
+    try:
+        if iterparse:
+            if isinstance(source, bytes):
+                source = io.BytesIO(source)
+            return iterparse_clinical_trial_root(source, trial_element_tags(fields))
+        if isinstance(source, bytes):
+            return ET.fromstring(source)
+        return ET.parse(source).getroot()
+    except ET.ParseError as error:
+        if metrics is not None:
+            metrics.skip_reason = f"xml parse error: {error}"
+        return None
+
+
+def _parse_file(
+    file: str,
+    iterparse: bool = False,
+    fields: Optional[FrozenSet[str]] = None,
+    compact: bool = False,
+) -> Optional[ClinicalTrial]:
+    """Parses a single clinical trial xml file.
+
+    :param file: path to the xml file
+    :param iterparse: use iterparse_clinical_trial_root instead of building
+        the full element tree
+    :param fields: optional names of ClinicalTrial fields to parse
+    :param compact: return CompactClinicalTrial instead of ClinicalTrial
+    :return: ClinicalTrial or None if the file is not a valid xml.
+    """
+    root = _load_root(file, iterparse, fields)
+    if root is None:
+        return None
+    return parse_clinical_trial(root=root, fields=fields, compact=compact)
+
+
+def _parse_with_metrics(
+    source_name: str,
+    read: Callable[[], bytes],
+    iterparse: bool = False,
+    fields: Optional[FrozenSet[str]] = None,
+    compact: bool = False,
+) -> Tuple[Optional[ClinicalTrial], FileMetrics]:
+    """Reads and parses a single clinical trial, timing every stage and recording
+    data quality problems.
+
+    :param source_name: name of the file or archive member
+    :param read: function returning the xml content
+    :param iterparse: use iterparse_clinical_trial_root instead of building
+        the full element tree
+    :param fields: optional names of ClinicalTrial fields to parse
+    :param compact: return CompactClinicalTrial instead of ClinicalTrial
+    :return: tuple of ClinicalTrial (or None if the content is not a valid xml)
+        and FileMetrics
+    """
+    metrics = FileMetrics(source_name)
+    stage_seconds = metrics.stage_seconds
+
+    start = time.perf_counter()
+    content = read()
+    metrics.bytes_read = len(content)
+    read_end = time.perf_counter()
+    stage_seconds["read"] = read_end - start
+
+    root = _load_root(content, iterparse, fields, metrics)
+    stage_seconds["xml_parse"] = time.perf_counter() - read_end
+    if root is None:
+        return None, metrics
+
+    clinical_trial = _parse_clinical_trial(
+        root, fields=fields, compact=compact, metrics=metrics
+    )
+    return clinical_trial, metrics
+
+
+def _read_file(file: str) -> bytes:
+    with open(file, "rb") as f:
+        return f.read()
+
+
+def _parse_file_with_metrics(
+    file: str,
+    iterparse: bool = False,
+    fields: Optional[FrozenSet[str]] = None,
+    compact: bool = False,
+) -> Tuple[Optional[ClinicalTrial], FileMetrics]:
+    """Parses a single clinical trial xml file, see _parse_with_metrics."""
+    return _parse_with_metrics(
+        file, functools.partial(_read_file, file), iterparse, fields, compact
+    )
+
+
+def _file_parser(
+    iterparse: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    compact: bool = False,
+    metrics: bool = False,
+) -> Callable[[str], Any]:
+    """Returns a picklable function parsing a single file with given options.
+
+    With metrics the function returns tuples of the trial and its FileMetrics.
+    """
+    return functools.partial(
+        _parse_file_with_metrics if metrics else _parse_file,
+        iterparse=iterparse,
+        fields=None if fields is None else _resolve_fields(fields),
+        compact=compact,
+    )
+
+
+def _discover_files(
+    folder_name: str,
+    first_n: Optional[int],
+    manifest: Optional[str],
+    prefixes: Optional[Iterable[str]],
+    shard_index: int,
+    shard_count: int,
+    caller: str,
+) -> Optional[Iterator[str]]:
+    """Returns a lazy iterator over xml files to parse (see iter_xml_files) or
+    None if there are none, so parsing starts while folders are still listed."""
+    files = iter_xml_files(
+        folder_name,
+        prefixes=prefixes,
+        manifest=manifest,
+        shard_index=shard_index,
+        shard_count=shard_count,
+    )
+    if first_n:
+        files = itertools.islice(files, first_n)
+    first_file = next(files, None)
+    if first_file is None:
+        logging.error("No files in a folder %s. Stopping %s", folder_name, caller)
+        return None
+    return itertools.chain([first_file], files)
+
+
+def _parse_bytes(
+    member: Tuple[str, bytes],
+    iterparse: bool = False,
+    fields: Optional[FrozenSet[str]] = None,
+    compact: bool = False,
+) -> Optional[ClinicalTrial]:
+    """Parses a single clinical trial from a (name, xml content) pair of a file
+    or an archive member read before.
+
+    :param member: tuple with name and content of a file or an archive member
+    :param iterparse: use iterparse_clinical_trial_root instead of building
+        the full element tree
+    :param fields: optional names of ClinicalTrial fields to parse
+    :param compact: return CompactClinicalTrial instead of ClinicalTrial
+    :return: ClinicalTrial or None if the content is not a valid xml.
+    """
+    root = _load_root(member[1], iterparse, fields)
+    if root is None:
+        return None
+    return parse_clinical_trial(root=root, fields=fields, compact=compact)
+
+
+def _parse_bytes_with_metrics(
+    member: Tuple[str, bytes],
+    iterparse: bool = False,
+    fields: Optional[FrozenSet[str]] = None,
+    compact: bool = False,
+) -> Tuple[Optional[ClinicalTrial], FileMetrics]:
+    """Parses a single clinical trial from a (name, xml content) pair, see
+    _parse_with_metrics. Contents are read before, so their read stage is
+    empty."""
+    name, content = member
+    return _parse_with_metrics(name, lambda: content, iterparse, fields, compact)
+
+
+def _to_compact(
+    clinical_trial: Optional[ClinicalTrial],
+) -> Optional[CompactClinicalTrial]:
+    if isinstance(clinical_trial, ClinicalTrial):
+        return CompactClinicalTrial.from_clinical_trial(clinical_trial)
+    return clinical_trial
+
+
+def _iter_clinical_trials(
+    sources: Iterable[T],
+    parse_function: Callable[[T], Optional[ClinicalTrial]] = _parse_file,
+    source_name: Callable[[T], str] = str,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 64,
+    cache: Optional[TrialCache] = None,
+    update_cache: bool = True,
+    compact: bool = False,
+    stats: Optional[IngestStats] = None,
+    on_file: Optional[Callable[[FileMetrics], None]] = None,
+) -> Iterator[ClinicalTrial]:
+    """Lazily parses sources, optionally in a process pool, skipping invalid ones.
+
+    If cache is given, sources are looked up in the cache first and only the
+    missing ones are parsed (and then stored in the cache if update_cache).
+    Cached trials are converted to CompactClinicalTrial if compact.
+
+    If stats or on_file is given, parse_function must return tuples of the trial
+    and its FileMetrics, which are recorded in stats and passed to on_file.
+    """
+    collect_metrics = stats is not None or on_file is not None
+    with ExitStack() as stack:
+        if executor is None and workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+
+        if cache is None:
+            lookups = ((source, None) for source in sources)
+        else:
+            lookups = ((source, cache.get(source)) for source in sources)
+            if compact:
+                lookups = (
+                    (source, _to_compact(clinical_trial))
+                    for source, clinical_trial in lookups
+                )
+        results = ordered_map_misses(
+            parse_function,
+            lookups,
+            executor=executor,
+            chunk_size=chunk_size,
+            max_pending=2 * max(workers, 1),
+        )
+        for source, clinical_trial, cached in results:
+            metrics = None
+            if not cached:
+                if collect_metrics:
+                    clinical_trial, metrics = clinical_trial
+                if clinical_trial is not None and cache is not None and update_cache:
+                    cache.put(source, clinical_trial)
+            elif collect_metrics:
+                metrics = FileMetrics(
+                    source_name(source),
+                    cached=True,
+                    missing_fields=missing_fields(clinical_trial),
+                )
+
+            if metrics is not None:
+                if stats is not None:
+                    stats.record(metrics)
+                if on_file is not None:
+                    on_file(metrics)
+
+            if clinical_trial is None:
+                logging.error("Skipping file %s", source_name(source))
+                continue
+            yield clinical_trial
+
+        if cache is not None:
+            cache.commit()
+
+
+def iter_clinical_trials_from_folder(
+    folder_name: str,
+    first_n: Optional[int] = None,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 64,
+    iterparse: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    compact: bool = False,
+    cache: Optional[TrialCache] = None,
+    stats: Optional[IngestStats] = None,
+    on_file: Optional[Callable[[FileMetrics], None]] = None,
+    manifest: Optional[str] = None,
+    prefixes: Optional[Iterable[str]] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> Iterator[ClinicalTrial]:
+    """Lazily parses clinical trials xml files found in the folder and its
+    subfolders, yielding trials one by one as files are parsed.
+
+    Only a bounded number of parsed trials is kept in memory, so the iterator
+    can be piped directly into indexing or serialization.
+
+    :param folder_name: path to the folder with xml files
+    :param first_n: parse only first n files
+    :param workers: number of worker processes; with more than one worker files
+        are parsed in a process pool
+    :param executor: optional executor used instead of creating a process pool
+    :param chunk_size: number of files sent to a worker in a single task
+    :param iterparse: build only the needed part of every xml tree with
+        iterparse_clinical_trial_root, lowers peak memory for large records
+    :param fields: optional names of ClinicalTrial fields to parse, see
+        parse_clinical_trial
+    :param compact: yield memory-compact CompactClinicalTrial objects
+    :param cache: optional TrialCache; only new or modified files are parsed.
+        Trials parsed with a fields projection or compact are not stored in the
+        cache.
+    :param stats: optional IngestStats filled with per-stage timings, bytes read,
+        skipped files, the slowest files and data quality counters
+    :param on_file: optional callback called with FileMetrics of every file
+    :param manifest: optional file listing xml files to parse instead of walking
+        the folder, see iter_xml_files
+    :param prefixes: optional prefixes of file names to parse, e.g. ["NCT0001"]
+    :param shard_index: parse only files of this shard, assigned by a stable
+        hash of the file name (see shard_of), e.g. the index of the node
+    :param shard_count: number of shards, e.g. the number of nodes
+    :return: iterator over ClinicalTrial objects in the order of files, which
+        are visited sorted by path or in the order of the manifest.
+    """
+    files = _discover_files(
+        folder_name,
+        first_n,
+        manifest,
+        prefixes,
+        shard_index,
+        shard_count,
+        "iter_clinical_trials_from_folder",
+    )
+    if files is None:
+        return
+
+    yield from _iter_clinical_trials(
+        files,
+        parse_function=_file_parser(
+            iterparse=iterparse,
+            fields=fields,
+            compact=compact,
+            metrics=stats is not None or on_file is not None,
+        ),
+        workers=workers,
+        executor=executor,
+        chunk_size=chunk_size,
+        cache=cache,
+        update_cache=fields is None and not compact,
+        compact=compact,
+        stats=stats,
+        on_file=on_file,
     )
 
 
 def parse_clinical_trials_from_folder(
-    folder_name: str, first_n: Optional[int] = None
+    folder_name: str,
+    first_n: Optional[int] = None,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 64,
+    iterparse: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    compact: bool = False,
+    cache: Optional[TrialCache] = None,
+    stats: Optional[IngestStats] = None,
+    on_file: Optional[Callable[[FileMetrics], None]] = None,
+    manifest: Optional[str] = None,
+    prefixes: Optional[Iterable[str]] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
 ) -> Optional[List[ClinicalTrial]]:
-    files = [y for x in os.walk(folder_name) for y in glob(os.path.join(x[0], "*.xml"))]
+    """Parses all clinical trials xml files found in the folder and its subfolders.
 
-    if not files:
-        logging.error(
-            "No files in a folder %s. Stopping parse_clinical_trials_from_folder",
+    See iter_clinical_trials_from_folder for a lazy counterpart and description
+    of parameters. If stats is given, data quality counters are logged after
+    parsing.
+
+    :return: list of ClinicalTrial objects in the order of files (sorted by path
+        or in the order of the manifest) or None if the folder contains no xml
+        files.
+    """
+    clinical_trials = list(
+        tqdm.tqdm(
+            iter_clinical_trials_from_folder(
+                folder_name,
+                first_n=first_n,
+                workers=workers,
+                executor=executor,
+                chunk_size=chunk_size,
+                iterparse=iterparse,
+                fields=fields,
+                compact=compact,
+                cache=cache,
+                stats=stats,
+                on_file=on_file,
+                manifest=manifest,
+                prefixes=prefixes,
+                shard_index=shard_index,
+                shard_count=shard_count,
+            ),
+            total=first_n,
+        )
+    )
+    if not clinical_trials and not any(
+        iter_xml_files(
             folder_name,
+            prefixes=prefixes,
+            manifest=manifest,
+            shard_index=shard_index,
+            shard_count=shard_count,
         )
+    ):
         return None
 
+    if stats is not None:
+        logging.info(
+            "percentage of successfully parsed criteria: %f",
+            stats.criteria_split_rate,
+        )
+        logging.info("ingest report: %s", stats.report())
+
+    return clinical_trials
+
+
+def _read_files(files: List[str]) -> List[Tuple[str, bytes]]:
+    """Reads (path, xml content) pairs of the files."""
+    return [(file, _read_file(file)) for file in files]
+
+
+def _parse_members(
+    parse_function: Callable[[Tuple[str, bytes]], Any],
+    members: List[Tuple[str, bytes]],
+) -> List[Any]:
+    return [parse_function(member) for member in members]
+
+
+async def aiter_clinical_trials_from_folder(
+    folder_name: str,
+    first_n: Optional[int] = None,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 16,
+    io_workers: int = 8,
+    read_ahead: int = 8,
+    iterparse: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    compact: bool = False,
+    stats: Optional[IngestStats] = None,
+    on_file: Optional[Callable[[FileMetrics], None]] = None,
+    manifest: Optional[str] = None,
+    prefixes: Optional[Iterable[str]] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> AsyncIterator[ClinicalTrial]:
+    """Asynchronously parses clinical trials xml files found in the folder and its
+    subfolders, without blocking the event loop.
+
+    Files are listed and read in a thread pool, up to read_ahead chunks ahead of
+    parsing, while already read chunks are parsed in a process pool, so slow
+    storage and parsing overlap. Usage::
+
+        async for ct in aiter_clinical_trials_from_folder(TRIALS_FOLDER, workers=4):
+            ...
+
+    :param folder_name: path to the folder with xml files
+    :param first_n: parse only first n files
+    :param workers: number of worker processes parsing files; with one worker
+        files are parsed in the default executor of the event loop
+    :param executor: optional executor used for parsing instead of creating a
+        process pool
+    :param chunk_size: number of files read and parsed in a single task
+    :param io_workers: number of threads listing and reading files
+    :param read_ahead: maximum number of chunks read ahead of parsing
+    :param iterparse: build only the needed part of every xml tree with
+        iterparse_clinical_trial_root, lowers peak memory for large records
+    :param fields: optional names of ClinicalTrial fields to parse, see
+        parse_clinical_trial
+    :param compact: yield memory-compact CompactClinicalTrial objects
+    :param stats: optional IngestStats filled with per-stage timings, bytes read,
+        skipped files, the slowest files and data quality counters; files are
+        read ahead, so their read stage is empty
+    :param on_file: optional callback called with FileMetrics of every file
+    :param manifest: optional file listing xml files to parse instead of walking
+        the folder, see iter_xml_files
+    :param prefixes: optional prefixes of file names to parse, e.g. ["NCT0001"]
+    :param shard_index: parse only files of this shard, see shard_of
+    :param shard_count: number of shards
+    :return: async iterator over ClinicalTrial objects in the order of files.
+    """
+    collect_metrics = stats is not None or on_file is not None
+    parse_function = functools.partial(
+        _parse_bytes_with_metrics if collect_metrics else _parse_bytes,
+        iterparse=iterparse,
+        fields=None if fields is None else _resolve_fields(fields),
+        compact=compact,
+    )
+    discovered_files = iter_xml_files(
+        folder_name,
+        prefixes=prefixes,
+        manifest=manifest,
+        shard_index=shard_index,
+        shard_count=shard_count,
+    )
+    files = discovered_files
     if first_n:
-        files = files[:first_n]
+        files = itertools.islice(files, first_n)
+    chunks = chunked(files, chunk_size)
 
-    clinical_trials = []
-    for file in tqdm.tqdm(files):
-        try:
-            tree = ET.parse(file)
-        except ET.ParseError:
-            logging.error("Skipping file %s", file)
+    loop = asyncio.get_running_loop()
+    io_executor = ThreadPoolExecutor(max_workers=io_workers)
+    owned_executors = [io_executor]
+    if executor is None and workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        owned_executors.append(executor)
+    max_pending = 2 * max(workers, 1)
+
+    reads: Deque[asyncio.Future] = deque()
+    # pairs of files of a chunk and the future of their parsing
+    parses: Deque[Tuple[List[str], asyncio.Future]] = deque()
+    files_left = True
+    found_files = False
+    try:
+        while True:
+            while files_left and len(reads) < read_ahead:
+                chunk = await loop.run_in_executor(io_executor, next, chunks, None)
+                if chunk is None:
+                    files_left = False
+                else:
+                    found_files = True
+                    reads.append(
+                        loop.run_in_executor(io_executor, _read_files, chunk)
+                    )
+            if reads and len(parses) < max_pending:
+                members = await reads.popleft()
+                parse = loop.run_in_executor(
+                    executor, _parse_members, parse_function, members
+                )
+                parses.append(([file for file, _ in members], parse))
+                continue
+            if not parses:
+                break
+
+            chunk, parse = parses.popleft()
+            for file, result in zip(chunk, await parse):
+                clinical_trial = result
+                if collect_metrics:
+                    clinical_trial, metrics = result
+                    if stats is not None:
+                        stats.record(metrics)
+                    if on_file is not None:
+                        on_file(metrics)
+                if clinical_trial is None:
+                    logging.error("Skipping file %s", file)
+                    continue
+                yield clinical_trial
+    finally:
+        for future in itertools.chain(reads, (parse for _, parse in parses)):
+            future.cancel()
+        # waiting for running tasks happens in a thread, not blocking the loop
+        for owned_executor in owned_executors:
+            await loop.run_in_executor(None, owned_executor.shutdown)
+        # discovery is closed once no io thread runs it, which shuts down its
+        # thread pool when iteration stopped early, e.g. with break or aclose()
+        await loop.run_in_executor(None, discovered_files.close)
+
+    if not found_files:
+        logging.error(
+            "No files in a folder %s. Stopping aiter_clinical_trials_from_folder",
+            folder_name,
+        )
+
+
+def _iter_zip_members(
+    archive: zipfile.ZipFile,
+    nct_ids: Optional[Set[str]] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> Iterator[Tuple[str, bytes]]:
+    """Yields names and contents of xml members of the archive in archive order,
+    optionally keeping only members whose file name is one of nct_ids and which
+    belong to the shard."""
+    for info in archive.infolist():
+        if info.is_dir() or not info.filename.endswith(".xml"):
             continue
-        root = tree.getroot()
-        clinical_trial = parse_clinical_trial(root=root)
-        clinical_trials.append(clinical_trial)
+        if nct_ids is not None:
+            nct_id = posixpath.splitext(posixpath.basename(info.filename))[0]
+            if nct_id not in nct_ids:
+                continue
+        if shard_count > 1 and shard_of(info.filename, shard_count) != shard_index:
+            continue
+        yield info.filename, archive.read(info)
 
-    if len(files) > 0:
-        total_parsed = 0
 
-        logging.info(
-            "percentage of successfully parsed criteria: %f", total_parsed / len(files)
+def iter_clinical_trials_from_zip(
+    zip_file: str,
+    nct_ids: Optional[Iterable[str]] = None,
+    first_n: Optional[int] = None,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 64,
+    iterparse: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    compact: bool = False,
+    stats: Optional[IngestStats] = None,
+    on_file: Optional[Callable[[FileMetrics], None]] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> Iterator[ClinicalTrial]:
+    """Lazily parses clinical trials directly from a zip archive, e.g. the
+    AllPublicXML.zip dump from ClinicalTrials.gov, without extracting it.
+
+    Members are read sequentially in archive order.
+
+    :param zip_file: path to the zip archive
+    :param nct_ids: parse only members named <nct_id>.xml for these ids
+    :param first_n: parse only first n (matching) members
+    :param workers: number of worker processes; with more than one worker members
+        are parsed in a process pool
+    :param executor: optional executor used instead of creating a process pool
+    :param chunk_size: number of members sent to a worker in a single task
+    :param iterparse: build only the needed part of every xml tree with
+        iterparse_clinical_trial_root, lowers peak memory for large records
+    :param fields: optional names of ClinicalTrial fields to parse, see
+        parse_clinical_trial
+    :param compact: yield memory-compact CompactClinicalTrial objects
+    :param stats: optional IngestStats filled with per-stage timings, bytes read,
+        skipped members and the slowest members
+    :param on_file: optional callback called with FileMetrics of every member
+    :param shard_index: parse only members of this shard, see shard_of
+    :param shard_count: number of shards
+    :return: iterator over ClinicalTrial objects in the archive order.
+    """
+    check_shard(shard_index, shard_count)
+    if nct_ids is not None:
+        nct_ids = set(nct_ids)
+
+    with zipfile.ZipFile(zip_file) as archive:
+        members = itertools.islice(
+            _iter_zip_members(archive, nct_ids, shard_index, shard_count), first_n
+        )
+        yield from _iter_clinical_trials(
+            members,
+            parse_function=functools.partial(
+                (
+                    _parse_bytes
+                    if stats is None and on_file is None
+                    else _parse_bytes_with_metrics
+                ),
+                iterparse=iterparse,
+                fields=None if fields is None else _resolve_fields(fields),
+                compact=compact,
+            ),
+            source_name=operator.itemgetter(0),
+            workers=workers,
+            executor=executor,
+            chunk_size=chunk_size,
+            stats=stats,
+            on_file=on_file,
         )
 
-    return clinical_trials
+
+def parse_clinical_trials_from_zip(
+    zip_file: str,
+    nct_ids: Optional[Iterable[str]] = None,
+    first_n: Optional[int] = None,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 64,
+    iterparse: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    compact: bool = False,
+    stats: Optional[IngestStats] = None,
+    on_file: Optional[Callable[[FileMetrics], None]] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> List[ClinicalTrial]:
+    """Parses clinical trials directly from a zip archive into a list.
+
+    See iter_clinical_trials_from_zip for description of parameters.
+    """
+    return list(
+        tqdm.tqdm(
+            iter_clinical_trials_from_zip(
+                zip_file,
+                nct_ids=nct_ids,
+                first_n=first_n,
+                workers=workers,
+                executor=executor,
+                chunk_size=chunk_size,
+                iterparse=iterparse,
+                fields=fields,
+                compact=compact,
+                stats=stats,
+                on_file=on_file,
+                shard_index=shard_index,
+                shard_count=shard_count,
+            )
+        )
+    )
@@ -1,10 +1,13 @@
+import xml.etree.ElementTree as ET
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
 from dataclasses import dataclass
-from typing import Union, List, Optional
+from typing import Union, List, Optional, Iterator
 
 import defusedxml.ElementTree
 
 from CTnlp.patient.parsers import extract_sections
-from CTnlp.utils import Gender
+from CTnlp.utils import Gender, ordered_map
 
 
 @dataclass
@@ -27,6 +30,94 @@ class Patient:
     is_drinker: Optional[bool] = None
 
 
+def _parse_patient(elem: ET.Element, filename: str, input_type: str) -> Patient:
+    """Creates a Patient from a single topic element, without sections."""
+    text_elem = elem[0] if input_type == "CSIRO" else elem
+    return Patient(
+        unique_id=f"{filename}_{elem.attrib['number']}",
+        patient_id=int(elem.attrib["number"]),
+        description=text_elem.text.strip(),
+    )
+
+
+def _add_sections(patient: Patient) -> Patient:
+    """Fills medical history sections of the patient extracted from description."""
+    current_mh_text, past_mh_text, family_mh_text = extract_sections(
+        patient.description
+    )
+    patient.current_medical_history = current_mh_text
+    patient.past_medical_history = past_mh_text
+    patient.family_medical_history = family_mh_text
+    return patient
+
+
+def _iter_patient_elements(
+    patient_file: str, filename: str, input_type: str
+) -> Iterator[Patient]:
+    """Streams topic elements of the file and clears them once parsed."""
+    depth = 0
+    root = None
+    for event, elem in defusedxml.ElementTree.iterparse(
+        patient_file, events=("start", "end")
+    ):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1:
+            yield _parse_patient(elem, filename, input_type)
+            root.remove(elem)
+
+
+def iter_patients_from_xml(
+    patient_file: str,
+    input_type: str = "TREC",
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 64,
+) -> Iterator[Patient]:
+    """Lazily parses patients from a single XML file, yielding Patient objects in
+    file order as they are parsed.
+
+    Topic elements are streamed with iterparse and freed once parsed, so memory
+    does not grow with the size of the file.
+
+    :param patient_file: str
+    :param input_type: str describes the type of parser that should be used.
+    Currently only two types of xml files are supported: TREC-style and CSIRO-style.
+    :param workers: number of worker processes; with more than one worker sections
+        are extracted in a process pool
+    :param executor: optional executor used instead of creating a process pool
+    :param chunk_size: number of patients sent to a worker in a single task
+    :return: iterator of Patient objects
+    """
+    if input_type not in ("TREC", "CSIRO"):
+        raise ValueError("input_type can be only 'TREC' or 'CSIRO'")
+    filename = patient_file.split("/")[-1]
+    return _iter_patients(
+        _iter_patient_elements(patient_file, filename, input_type),
+        workers,
+        executor,
+        chunk_size,
+    )
+
+
+def _iter_patients(
+    patients: Iterator[Patient],
+    workers: int,
+    executor: Optional[Executor],
+    chunk_size: int,
+) -> Iterator[Patient]:
+    with ExitStack() as stack:
+        if executor is None and workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+        yield from ordered_map(
+            _add_sections, patients, executor=executor, chunk_size=chunk_size
+        )
+
+
 def load_patients_from_xml(
     patient_file: str, input_type: str = "TREC"
 ) -> List[Patient]:
@@ -38,39 +129,4 @@ def load_patients_from_xml(
     Currently only two types of xml files are supported: TREC-style and CSIRO-style.
     :return: List of Patient objects
     """
-    tree = defusedxml.ElementTree.parse(patient_file)
-    filename = patient_file.split("/")[-1]
-    root = tree.getroot()
-
-    patients = []
-    if input_type == "CSIRO":
-        patients.extend(
-            Patient(
-                unique_id=f"{filename}_{elem.attrib['number']}",
-                patient_id=int(elem.attrib["number"]),
-                description=elem[0].text.strip(),
-            )
-            for elem in root
-        )
-
-    elif input_type == "TREC":
-        patients.extend(
-            Patient(
-                unique_id=f"{filename}_{elem.attrib['number']}",
-                patient_id=int(elem.attrib["number"]),
-                description=elem.text.strip(),
-            )
-            for elem in root
-        )
-    else:
-        raise ValueError("input_type can be only 'TREC' or 'CSIRO'")
-
-    for patient in patients:
-        current_mh_text, past_mh_text, family_mh_text = extract_sections(
-            patient.description
-        )
-        patient.current_medical_history = current_mh_text
-        patient.past_medical_history = past_mh_text
-        patient.family_medical_history = family_mh_text
-
-    return patients
+    return list(iter_patients_from_xml(patient_file, input_type))
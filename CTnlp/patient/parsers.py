@@ -5,7 +5,120 @@ TODO: cover more specific cases if history spans across multiple lines for
 """
 import re
 from re import Match
-from typing import Optional, Tuple
+from typing import Optional, Pattern, Tuple
+
+
+def _phrase_regexes(pattern: str) -> Tuple[Pattern, Pattern]:
+    """Compiles a lowercase phrase for searching lowercased ascii text and, for
+    other text, with re.IGNORECASE, which is slower but handles non-ascii case
+    folding exactly as the original patterns did."""
+    return re.compile(pattern), re.compile(pattern, re.IGNORECASE)
+
+
+# phrases of history sections, sentences around them are matched by _scan
+_MEDICAL_HISTORY_REGEXES = _phrase_regexes(r"medical history")
+_HAS_HISTORY_REGEXES = _phrase_regexes(r"has (?:no )?(?:a )?(?:positive )?history")
+_PAST_MEDICAL_HISTORY_LIST_REGEXES = _phrase_regexes(r"past medical history:?\n")
+_FAMILY_HISTORY_REGEXES = _phrase_regexes(r"family history")
+
+# regexes finding the next sentence boundary, keyed by the boundary characters
+_BOUNDARY_REGEXES = {"!.": re.compile(r"[!.]"), ".": re.compile(r"\.")}
+# rest of a sentence up to its dot, unless there is a newline first
+_SENTENCE_REST_REGEX = re.compile(r"[^.\n]*")
+
+# the original section patterns, only matched at sections found by _scan, so
+# the returned re.Match objects have the groups of the original patterns
+_MEDICAL_HISTORY_SECTION_REGEX = re.compile(
+    r"[!\.][^!\.]*medical history.*?\.", re.IGNORECASE
+)
+_HAS_HISTORY_SECTION_REGEX = re.compile(
+    r"[!\.][^!\.]*has (no )?(a )?(positive )?history.*?\.", re.IGNORECASE
+)
+_PAST_MEDICAL_HISTORY_LIST_SECTION_REGEX = re.compile(
+    r"[!\.][^!\.]*past medical history:?\n([\d|-]?[^\n]*\n)*", re.IGNORECASE
+)
+_FAMILY_HISTORY_SECTION_REGEX = re.compile(
+    r"\.[^\.]*family history.*?\.", re.IGNORECASE
+)
+
+
+def _scan(
+    text: str,
+    phrase_regexes: Tuple[Pattern, Pattern],
+    boundaries: str,
+    lines: bool = False,
+) -> Optional[Tuple[int, int]]:
+    """Finds the first section starting at a boundary character and containing
+    the phrase before the next boundary character, like searching for the
+    pattern [boundaries][^boundaries]*phrase followed by .*?\\. (the rest of the
+    sentence) or, if lines, by ([\\d|-]?[^\\n]*\\n)* (all following lines).
+
+    Every part of the text is scanned a bounded number of times, so unlike the
+    backtracking patterns the scan is linear in the length of the text.
+
+    :param text: text to scan
+    :param phrase_regexes: bounded-length phrase without boundary characters,
+        see _phrase_regexes
+    :param boundaries: characters separating sentences
+    :param lines: end the section after the last newline of the text instead of
+        at the end of the sentence
+    :return: start and end of the section or None
+    """
+    if text.isascii():
+        phrase_regex, phrase_text = phrase_regexes[0], text.lower()
+    else:
+        phrase_regex, phrase_text = phrase_regexes[1], text
+    phrase = phrase_regex.search(phrase_text)
+    if phrase is None:
+        return None
+    boundary_regex = _BOUNDARY_REGEXES[boundaries]
+    # the rest of a sentence cannot end for phrases up to this newline
+    newline = -1
+    position = 0
+    while True:
+        # position is just after the previous boundary, so only text after it is
+        # searched for the boundary starting the sentence
+        start = max([text.rfind(char, position, phrase.start()) for char in boundaries])
+        if start == -1 and position > 0:
+            start = position - 1
+
+        next_boundary = boundary_regex.search(text, phrase.start())
+        sentence_end = next_boundary.start() if next_boundary else len(text)
+        if start != -1:
+            # the greedy [^boundaries]* tries the last phrase of the sentence first
+            later_phrase = phrase_regex.search(phrase_text, phrase.end(), sentence_end)
+            while later_phrase is not None:
+                phrase = later_phrase
+                later_phrase = phrase_regex.search(
+                    phrase_text, phrase.end(), sentence_end
+                )
+            if lines:
+                return start, text.rfind("\n") + 1
+            if phrase.end() > newline:
+                stop = _SENTENCE_REST_REGEX.match(text, phrase.end()).end()
+                if stop == len(text):
+                    return None
+                if text[stop] == ".":
+                    return start, stop + 1
+                newline = stop
+        if next_boundary is None:
+            return None
+        position = sentence_end + 1
+        phrase = phrase_regex.search(phrase_text, position)
+        if phrase is None:
+            return None
+
+
+def _match_section(
+    text: str,
+    section_regex: Pattern,
+    phrase_regexes: Tuple[Pattern, Pattern],
+    boundaries: str,
+    lines: bool = False,
+) -> Optional[Match]:
+    """Returns the match of section_regex at the section found by _scan."""
+    span = _scan(text, phrase_regexes, boundaries, lines)
+    return None if span is None else section_regex.match(text, *span)
 
 
 def extract_past_medical_history(patient_description: str) -> Optional[Match]:
@@ -16,30 +129,41 @@ def extract_past_medical_history(patient_description: str) -> Optional[Match]:
     :return: re.Match object or None if didn't find anything
     """
     return (
-        re.search(
-            r"[!\.][^!\.]*medical history.*?\.", patient_description, re.IGNORECASE
+        _match_section(
+            patient_description,
+            _MEDICAL_HISTORY_SECTION_REGEX,
+            _MEDICAL_HISTORY_REGEXES,
+            "!.",
         )
-        or re.search(
-            r"[!\.][^!\.]*has (no )?(a )?(positive )?history.*?\.",
+        or _match_section(
             patient_description,
-            re.IGNORECASE,
+            _HAS_HISTORY_SECTION_REGEX,
+            _HAS_HISTORY_REGEXES,
+            "!.",
         )
-        or re.search(
-            r"[!\.][^!\.]*past medical history:?\n([\d|-]?[^\n]*\n)*",
+        or _match_section(
             patient_description,
-            re.IGNORECASE,
+            _PAST_MEDICAL_HISTORY_LIST_SECTION_REGEX,
+            _PAST_MEDICAL_HISTORY_LIST_REGEXES,
+            "!.",
+            lines=True,
         )
     )
 
 
 def extract_family_history(patient_description: str) -> Optional[Match]:
-    """Extracts a sentence with family history using regex match
+    """Extracts a sentence with family history
 
     :param patient_description: unstructured patient description without specific
             sections
     :return: re.Match object or None if didn't find anything
     """
-    return re.search(r"\.[^\.]*family history.*?\.", patient_description, re.IGNORECASE)
+    return _match_section(
+        patient_description,
+        _FAMILY_HISTORY_SECTION_REGEX,
+        _FAMILY_HISTORY_REGEXES,
+        ".",
+    )
 
 
 def extract_sections(patient_description: str) -> Tuple[str, str, str]:
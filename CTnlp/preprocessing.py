@@ -0,0 +1,91 @@
+"""Module containing tokenization of clinical trial texts."""
+
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from CTnlp.cache import TokenCache
+from CTnlp.clinical_trial import ClinicalTrial
+from CTnlp.utils import ordered_map_misses
+
+_TOKEN_REGEX = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lowercase word tokens."""
+    return _TOKEN_REGEX.findall(text.lower())
+
+
+def _tokenizer_name(tokenizer: Callable[[str], List[str]]) -> str:
+    # callables without a qualified name, e.g. functools.partial, are named by
+    # their type, so they cannot tell tokenizers apart
+    module = getattr(tokenizer, "__module__", type(tokenizer).__module__)
+    name = getattr(tokenizer, "__qualname__", type(tokenizer).__qualname__)
+    return f"{module}.{name}"
+
+
+def _get_text(clinical_trial: ClinicalTrial) -> str:
+    return clinical_trial.text
+
+
+def preprocess_clinical_trials(
+    clinical_trials: Iterable[ClinicalTrial],
+    tokenizer: Callable[[str], List[str]] = tokenize,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 256,
+    cache: Optional[TokenCache] = None,
+    tokenizer_name: Optional[str] = None,
+) -> Iterator[ClinicalTrial]:
+    """Lazily tokenizes text of clinical trials into text_preprocessed.
+
+    Trials are yielded in the same order as they were given, with
+    text_preprocessed set in place.
+
+    :param clinical_trials: iterable of ClinicalTrial objects
+    :param tokenizer: picklable function splitting text into tokens
+    :param workers: number of worker processes; with more than one worker texts
+        are tokenized in a process pool
+    :param executor: optional executor used instead of creating a process pool
+    :param chunk_size: number of texts sent to a worker in a single task
+    :param cache: optional TokenCache; only texts missing from the cache are
+        tokenized and then stored in the cache
+    :param tokenizer_name: name of the tokenizer the cached tokens are keyed by,
+        required with a cache unless the default tokenizer is used, as e.g.
+        lambdas or partials cannot be told apart by their names
+    :return: iterator of ClinicalTrial objects
+    """
+    if cache is not None and tokenizer_name is None:
+        if tokenizer is not tokenize:
+            raise ValueError("tokenizer_name is required to cache a custom tokenizer")
+        tokenizer_name = _tokenizer_name(tokenizer)
+    with ExitStack() as stack:
+        if executor is None and workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+
+        if cache is None:
+            lookups = ((clinical_trial, None) for clinical_trial in clinical_trials)
+        else:
+            lookups = (
+                (ct, cache.get(ct.nct_id, tokenizer_name, ct.text))
+                for ct in clinical_trials
+            )
+        results = ordered_map_misses(
+            tokenizer,
+            lookups,
+            executor=executor,
+            chunk_size=chunk_size,
+            max_pending=2 * max(workers, 1),
+            key=_get_text,
+        )
+        for clinical_trial, tokens, cached in results:
+            if not cached and cache is not None:
+                cache.put(
+                    clinical_trial.nct_id, tokenizer_name, clinical_trial.text, tokens
+                )
+            clinical_trial.text_preprocessed = tokens
+            yield clinical_trial
+
+        if cache is not None:
+            cache.commit()
@@ -1,5 +1,23 @@
 """Module containing utility functions and classes."""
+import os
+from collections import deque
+from concurrent.futures import Executor, Future
 from enum import Enum
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 class Gender(str, Enum):
@@ -9,3 +27,124 @@ class Gender(str, Enum):
     male = "M"
     female = "F"
     all = "A"
+
+
+def chunked(items: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    """Lazily splits items into lists of at most chunk_size elements."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _map_chunk(function: Callable[[T], R], chunk: List[T]) -> List[R]:
+    return [function(item) for item in chunk]
+
+
+def ordered_map(
+    function: Callable[[T], R],
+    items: Iterable[T],
+    executor: Optional[Executor] = None,
+    chunk_size: int = 64,
+    max_pending: Optional[int] = None,
+) -> Iterator[R]:
+    """Lazily applies function to every item and yields results in input order.
+
+    Items are submitted to the executor in chunks of chunk_size and at most
+    max_pending chunks are in flight at once, so memory usage stays bounded
+    regardless of the number of items. Without an executor items are processed
+    one by one in the calling process.
+
+    :param function: picklable callable applied to every item
+    :param items: iterable of items, consumed lazily
+    :param executor: optional executor (e.g. ProcessPoolExecutor)
+    :param chunk_size: number of items sent to a worker in a single task
+    :param max_pending: maximum number of submitted and not yet consumed chunks,
+        defaults to twice the number of CPUs
+    :return: iterator over function results
+    """
+    if executor is None:
+        yield from map(function, items)
+        return
+
+    if max_pending is None:
+        max_pending = 2 * (os.cpu_count() or 1)
+
+    pending: Deque = deque()
+    for chunk in chunked(items, chunk_size):
+        pending.append(executor.submit(_map_chunk, function, chunk))
+        if len(pending) >= max_pending:
+            yield from pending.popleft().result()
+
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _merge_chunk(
+    lookups: List[Tuple[T, Optional[R]]], future: Optional[Future]
+) -> Iterator[Tuple[T, R, bool]]:
+    results = iter(() if future is None else future.result())
+    for item, cached in lookups:
+        if cached is None:
+            yield item, next(results), False
+        else:
+            yield item, cached, True
+
+
+def ordered_map_misses(
+    function: Callable[[Any], R],
+    lookups: Iterable[Tuple[T, Optional[R]]],
+    executor: Optional[Executor] = None,
+    chunk_size: int = 64,
+    max_pending: Optional[int] = None,
+    key: Optional[Callable[[T], Any]] = None,
+) -> Iterator[Tuple[T, R, bool]]:
+    """Lazily yields items with their cached results, applying function only to
+    items without a cached result, in input order.
+
+    Lookups are consumed a chunk at a time and misses of every chunk are
+    submitted to the executor as a single, possibly partial, task. A chunk is
+    yielded as soon as its task is done, so cached results are not held back
+    until a full chunk of misses is found, and at most max_pending chunks are
+    looked up ahead of the consumer.
+
+    :param function: picklable callable applied to items without a cached result
+    :param lookups: iterable of (item, cached result or None) pairs, consumed
+        lazily
+    :param executor: optional executor (e.g. ProcessPoolExecutor); without it
+        misses are processed one by one in the calling process
+    :param chunk_size: number of lookups in a chunk
+    :param max_pending: maximum number of looked up and not yet yielded chunks,
+        defaults to twice the number of CPUs
+    :param key: optional function returning the argument of function for an
+        item, defaults to the item itself
+    :return: iterator over tuples of item, result and whether it was cached
+    """
+    if executor is None:
+        for item, cached in lookups:
+            if cached is None:
+                yield item, function(item if key is None else key(item)), False
+            else:
+                yield item, cached, True
+        return
+
+    if max_pending is None:
+        max_pending = 2 * (os.cpu_count() or 1)
+
+    pending: Deque[Tuple[List[Tuple[T, Optional[R]]], Optional[Future]]] = deque()
+    for chunk in chunked(lookups, chunk_size):
+        misses = [item for item, cached in chunk if cached is None]
+        if key is not None:
+            misses = [key(item) for item in misses]
+        future = executor.submit(_map_chunk, function, misses) if misses else None
+        pending.append((chunk, future))
+        # finished chunks are yielded right away, the oldest one is waited for
+        # only when max_pending chunks are pending
+        while pending and (
+            len(pending) >= max_pending
+            or pending[0][1] is None
+            or pending[0][1].done()
+        ):
+            yield from _merge_chunk(*pending.popleft())
+
+    while pending:
+        yield from _merge_chunk(*pending.popleft())
@@ -8,5 +8,6 @@ setup(
     author="Wojciech Kusa",
     author_email="wojciech.kusa@tuwien.ac.at",
     install_requires=["tqdm>=4.64.0", "defusedxml>=0.7.1"],
+    extras_require={"parquet": ["pyarrow>=8.0.0"], "numpy": ["numpy>=1.21.0"]},
     license="GPL-3.0",
 )
@@ -0,0 +1,8 @@
+import os
+import unittest
+
+# timing benchmarks are slow and only print results, run them on demand with
+# CTNLP_BENCHMARKS=1 python -m unittest discover tests/benchmarks
+benchmark = unittest.skipUnless(
+    os.environ.get("CTNLP_BENCHMARKS"), "set CTNLP_BENCHMARKS=1 to run benchmarks"
+)
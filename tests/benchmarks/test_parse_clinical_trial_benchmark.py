@@ -0,0 +1,105 @@
+"""Benchmark of the single-pass parse_clinical_trial against the find-based path."""
+
+import glob
+import os
+import timeit
+import unittest
+
+import defusedxml.ElementTree as ET
+
+from CTnlp.clinical_trial import ClinicalTrial
+from CTnlp.parsers import (
+    _safe_get_item,
+    _safe_get_nested_item,
+    get_conditions,
+    get_interventions,
+    get_outcomes,
+    parse_clinical_trial,
+    parse_eligibility,
+)
+from tests.benchmarks import benchmark
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+NUMBER = 200
+
+
+def parse_clinical_trial_with_find(root: ET) -> ClinicalTrial:
+    """Reference implementation searching the root separately for every field."""
+    org_study_id = getattr(
+        root.find("id_info").find("org_study_id"), "text", "empty_org_study_id"
+    )
+    nct_id = getattr(root.find("id_info").find("nct_id"), "text", "empty_nct_id")
+    primary_outcomes, secondary_outcomes = get_outcomes(root=root)
+    (
+        gender,
+        minimum_age,
+        maximum_age,
+        healthy_volunteers,
+        criteria,
+        inclusion,
+        exclusion,
+    ) = parse_eligibility(root=root)
+
+    return ClinicalTrial(
+        org_study_id=org_study_id,
+        nct_id=nct_id,
+        brief_summary=_safe_get_nested_item(root=root, tag_name="brief_summary"),
+        detailed_description=_safe_get_nested_item(
+            root=root, tag_name="detailed_description"
+        ),
+        criteria=criteria,
+        gender=gender,
+        minimum_age=minimum_age,
+        maximum_age=maximum_age,
+        accepts_healthy_volunteers=healthy_volunteers,
+        inclusion=inclusion,
+        exclusion=exclusion,
+        brief_title=_safe_get_item(root=root, tag_name="brief_title"),
+        official_title=_safe_get_item(root=root, tag_name="official_title"),
+        primary_outcomes=primary_outcomes,
+        secondary_outcomes=secondary_outcomes,
+        study_type=_safe_get_item(root=root, tag_name="study_type"),
+        conditions=get_conditions(root=root),
+        interventions=get_interventions(root=root),
+    )
+
+
+class TestParseClinicalTrialBenchmark(unittest.TestCase):
+    """Compare single-pass dispatching with repeated find/findall calls."""
+
+    roots = [
+        ET.parse(file).getroot()
+        for file in sorted(glob.glob(os.path.join(input_data, "*.xml")))
+    ]
+
+    def test_same_results(self):
+        for root in self.roots:
+            self.assertEqual(
+                parse_clinical_trial_with_find(root), parse_clinical_trial(root)
+            )
+
+    @benchmark
+    def test_benchmark(self):
+        def _run(parse):
+            return min(
+                timeit.repeat(
+                    lambda: [parse(root) for root in self.roots],
+                    number=NUMBER,
+                    repeat=5,
+                )
+            )
+
+        find_time = _run(parse_clinical_trial_with_find)
+        single_pass_time = _run(parse_clinical_trial)
+        print(
+            f"\nparse_clinical_trial x{NUMBER * len(self.roots)}: "
+            f"find/findall {find_time:.4f}s, single pass {single_pass_time:.4f}s "
+            f"({find_time / single_pass_time:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Benchmark of patient section extraction on pathological descriptions."""
+import timeit
+import unittest
+
+from CTnlp.patient.parsers import extract_family_history, extract_past_medical_history
+from tests.benchmarks import benchmark
+from tests.unit.test_patient_sections import (
+    extract_family_history_regex,
+    extract_past_medical_history_regex,
+)
+
+REPEATS = 2000
+
+# many history phrases in one sentence with a newline before its dot make the
+# backtracking patterns retry .*? from every phrase, quadratic in REPEATS
+PATHOLOGICAL_DESCRIPTIONS = {
+    "medical history": "A man! " + "medical history " * REPEATS + "\n.",
+    "has history": "A man! " + "has no history " * REPEATS + "\n.",
+    "family history": "A man. " + "family history " * REPEATS + "\n.",
+    "long note": ("A man. " + "He was well and walked daily " * REPEATS + ".\n") * 10,
+}
+
+
+def _best_time(function) -> float:
+    return min(timeit.repeat(function, number=1, repeat=3))
+
+
+class TestPatientSectionsBenchmark(unittest.TestCase):
+    """Compare the linear section scanner with the original regular expressions."""
+
+    def test_pathological_descriptions(self):
+        for description in PATHOLOGICAL_DESCRIPTIONS.values():
+            for regex_function, scan_function in [
+                (extract_past_medical_history_regex, extract_past_medical_history),
+                (extract_family_history_regex, extract_family_history),
+            ]:
+                regex_match = regex_function(description)
+                scan_match = scan_function(description)
+                self.assertEqual(
+                    regex_match and regex_match.span(),
+                    scan_match and scan_match.span(),
+                )
+
+    @benchmark
+    def test_pathological_descriptions_benchmark(self):
+        for name, description in PATHOLOGICAL_DESCRIPTIONS.items():
+            regex_time = _best_time(
+                lambda: (
+                    extract_past_medical_history_regex(description),
+                    extract_family_history_regex(description),
+                )
+            )
+            scan_time = _best_time(
+                lambda: (
+                    extract_past_medical_history(description),
+                    extract_family_history(description),
+                )
+            )
+            print(
+                f"\n{name} ({len(description)} chars): regex {regex_time:.4f}s, "
+                f"scan {scan_time:.4f}s ({regex_time / scan_time:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
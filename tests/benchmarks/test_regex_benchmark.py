@@ -0,0 +1,94 @@
+"""Micro-benchmarks of precompiled regular expressions used by the parsers."""
+import logging
+import re
+import timeit
+import unittest
+from typing import Dict, List, Optional
+
+from CTnlp.parsers import get_criteria, parse_age
+from tests.benchmarks import benchmark
+from tests.unit.test_criteria_parser import EXAMPLE_CRITERIA
+
+NUMBER = 500
+
+AGE_STRINGS = ["18 Years", "65 Years", "6 Months", "N/A", "2 Weeks", "30 Days", ""]
+
+
+def parse_age_uncompiled(age_string: str) -> Optional[float]:
+    """Reference implementation compiling patterns on every call."""
+    if not age_string:
+        return None
+    if age_string in {"N/A", "None"}:
+        return None
+
+    age_patterns: Dict[str, int] = {
+        r"(\d{1,3}) Year[s]?": 1,
+        r"(\d{1,3}) Month[s]?": 12,
+        r"(\d{1,3}) Week[s]?": 52,
+        r"(\d{1,3}) Day[s]?": 365,
+        r"(\d{1,3}) Hour[s]?": 8766,
+        r"(\d{1,3}) Minute[s]?": 525960,
+    }
+    for pattern, denominator in age_patterns.items():
+        match = re.search(re.compile(pattern, flags=re.IGNORECASE), age_string)
+        if match is not None:
+            return int(match[1]) / denominator
+
+    logging.warning("couldn't parse age from %s", age_string)
+    return None
+
+
+def get_criteria_uncompiled(criteria_string: str) -> List[str]:
+    """Reference implementation passing pattern strings to the re module."""
+    criteria_list: List[str] = []
+
+    if criteria_string.strip():
+        for criterion in re.split(r" - | \d\. ", criteria_string):
+            if criterion.strip() and criterion.strip() != ":":
+                criterion = re.sub(r"[\r\n\t ]+", " ", criterion)
+                criteria_list.append(criterion.strip())
+
+    return criteria_list
+
+
+def _best_time(function) -> float:
+    return min(timeit.repeat(function, number=NUMBER, repeat=5))
+
+
+class TestRegexBenchmark(unittest.TestCase):
+    """Compare precompiled and memoized regex parsing with per-call compilation."""
+
+    def test_parse_age(self):
+        for age_string in AGE_STRINGS:
+            self.assertEqual(parse_age_uncompiled(age_string), parse_age(age_string))
+
+    @benchmark
+    def test_parse_age_benchmark(self):
+        uncompiled_time = _best_time(
+            lambda: [parse_age_uncompiled(age) for age in AGE_STRINGS]
+        )
+        memoized_time = _best_time(lambda: [parse_age(age) for age in AGE_STRINGS])
+        print(
+            f"\nparse_age x{NUMBER * len(AGE_STRINGS)}: "
+            f"uncompiled {uncompiled_time:.4f}s, memoized {memoized_time:.4f}s "
+            f"({uncompiled_time / memoized_time:.1f}x)"
+        )
+
+    def test_get_criteria(self):
+        self.assertEqual(
+            get_criteria_uncompiled(EXAMPLE_CRITERIA), get_criteria(EXAMPLE_CRITERIA)
+        )
+
+    @benchmark
+    def test_get_criteria_benchmark(self):
+        uncompiled_time = _best_time(lambda: get_criteria_uncompiled(EXAMPLE_CRITERIA))
+        compiled_time = _best_time(lambda: get_criteria(EXAMPLE_CRITERIA))
+        print(
+            f"\nget_criteria x{NUMBER}: "
+            f"uncompiled {uncompiled_time:.4f}s, precompiled {compiled_time:.4f}s "
+            f"({uncompiled_time / compiled_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from CTnlp.discovery import iter_xml_files
+from CTnlp.metrics import IngestStats
+from CTnlp.parsers import (
+    aiter_clinical_trials_from_folder,
+    parse_clinical_trials_from_folder,
+)
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+
+async def collect(async_iterator):
+    return [item async for item in async_iterator]
+
+
+class TestAsyncIngest(unittest.IsolatedAsyncioTestCase):
+    """Test asynchronous parsing of a folder."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.folder = os.path.join(cls.tmp_dir.name, "trials")
+        with open(os.path.join(input_data, "NCT00000102.xml")) as f:
+            template = f.read()
+        for i in range(25):
+            nct_id = f"NCT{i:08d}"
+            subfolder = os.path.join(cls.folder, f"{nct_id[:7]}xxxx")
+            os.makedirs(subfolder, exist_ok=True)
+            with open(os.path.join(subfolder, f"{nct_id}.xml"), "w") as f:
+                f.write(template.replace("NCT00000102", nct_id))
+        with open(os.path.join(cls.folder, "broken.xml"), "w") as f:
+            f.write("<clinical_study>")
+        cls.expected = parse_clinical_trials_from_folder(cls.folder)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    async def test_same_as_sequential(self):
+        cts = await collect(aiter_clinical_trials_from_folder(self.folder))
+        self.assertEqual(25, len(cts))
+        self.assertEqual(self.expected, cts)
+
+    async def test_process_pool(self):
+        cts = await collect(
+            aiter_clinical_trials_from_folder(
+                self.folder, workers=2, chunk_size=3, read_ahead=2, io_workers=2
+            )
+        )
+        self.assertEqual(self.expected, cts)
+
+    async def test_aclose_closes_discovery(self):
+        closed = []
+
+        def files(*args, **kwargs):
+            try:
+                yield from iter_xml_files(*args, **kwargs)
+            finally:
+                closed.append(threading.current_thread())
+
+        with mock.patch("CTnlp.parsers.iter_xml_files", files):
+            cts = aiter_clinical_trials_from_folder(
+                self.folder, chunk_size=1, read_ahead=1
+            )
+            self.assertEqual(self.expected[0], await cts.__anext__())
+            self.assertEqual([], closed)
+            await cts.aclose()
+        # closed, without blocking the event loop on the discovery thread pool
+        self.assertEqual(1, len(closed))
+        self.assertIsNot(threading.current_thread(), closed[0])
+
+    async def test_options(self):
+        stats = IngestStats()
+        cts = await collect(
+            aiter_clinical_trials_from_folder(
+                self.folder,
+                first_n=10,
+                chunk_size=4,
+                fields=["nct_id", "gender"],
+                compact=True,
+                stats=stats,
+            )
+        )
+        expected = parse_clinical_trials_from_folder(
+            self.folder, first_n=10, fields=["nct_id", "gender"], compact=True
+        )
+        self.assertEqual(expected, cts)
+        self.assertEqual([[]] * 9, [ct.inclusion for ct in cts])
+        # broken.xml is sorted first, so it is one of the first 10 files
+        self.assertEqual((10, 9, 1), (stats.files, stats.parsed, len(stats.skipped)))
+
+    async def test_skipped_file(self):
+        metrics = []
+        with self.assertLogs(level="ERROR") as logs:
+            cts = await collect(
+                aiter_clinical_trials_from_folder(
+                    self.folder, chunk_size=5, on_file=metrics.append
+                )
+            )
+        self.assertEqual(25, len(cts))
+        self.assertEqual(26, len(metrics))
+        self.assertTrue(any("broken.xml" in line for line in logs.output))
+
+    async def test_early_stop(self):
+        cts = []
+        async for ct in aiter_clinical_trials_from_folder(
+            self.folder, workers=2, chunk_size=2
+        ):
+            cts.append(ct)
+            if len(cts) == 3:
+                break
+        self.assertEqual(self.expected[:3], cts)
+
+    async def test_empty_folder(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with self.assertLogs(level="ERROR"):
+                self.assertEqual(
+                    [], await collect(aiter_clinical_trials_from_folder(folder))
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+from CTnlp.benchmark import (
+    format_report,
+    generate_topics_file,
+    generate_trial_corpus,
+    main,
+    run_benchmark,
+)
+from CTnlp.parsers import parse_clinical_trials_from_folder
+from CTnlp.patient import load_patients_from_xml
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+trial_file = os.path.join(current_file_directory, "../test_data/trials/NCT00000102.xml")
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    """Test generation of the synthetic benchmark corpus."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_generate_trial_corpus(self):
+        files = generate_trial_corpus(self.tmp_dir.name, 30)
+        self.assertEqual(30, len(files))
+        self.assertTrue(
+            files[0].endswith(os.path.join("NCT0000xxxx", "NCT00000000.xml"))
+        )
+
+        cts = parse_clinical_trials_from_folder(self.tmp_dir.name)
+        self.assertEqual(
+            sorted(f"NCT{i:08d}" for i in range(30)), sorted(ct.nct_id for ct in cts)
+        )
+        self.assertTrue(
+            all(ct.inclusion for ct in cts if "Key Criteria" not in ct.criteria)
+        )
+
+    def test_generate_trial_corpus_is_deterministic(self):
+        files = generate_trial_corpus(os.path.join(self.tmp_dir.name, "a"), 5, seed=1)
+        other_files = generate_trial_corpus(
+            os.path.join(self.tmp_dir.name, "b"), 5, seed=1
+        )
+        for file, other_file in zip(files, other_files):
+            with open(file) as f, open(other_file) as other_f:
+                self.assertEqual(f.read(), other_f.read())
+
+    def test_generate_trial_corpus_from_template(self):
+        generate_trial_corpus(self.tmp_dir.name, 3, templates=[trial_file])
+        cts = parse_clinical_trials_from_folder(self.tmp_dir.name)
+        self.assertEqual(3, len(cts))
+        self.assertTrue(all(ct.org_study_id.startswith("SYN-") for ct in cts))
+
+    def test_generate_topics_file(self):
+        path = generate_topics_file(os.path.join(self.tmp_dir.name, "topics.xml"), 12)
+        patients = load_patients_from_xml(path)
+        self.assertEqual(12, len(patients))
+        self.assertTrue(patients[0].description.startswith("The patient is a"))
+
+
+class TestRunBenchmark(unittest.TestCase):
+    """Test the benchmark harness on a small corpus."""
+
+    def test_run_benchmark(self):
+        report = run_benchmark(n_files=10, n_patients=5)
+        self.assertEqual(
+            [
+                "generate_corpus",
+                "parse_clinical_trials_from_folder",
+                "xml_parse",
+                "parse_eligibility",
+                "parse_criteria",
+                "load_patients_from_xml",
+            ],
+            list(report["stages"]),
+        )
+        self.assertEqual(
+            10, report["stages"]["parse_clinical_trials_from_folder"]["items"]
+        )
+        self.assertEqual(5, report["stages"]["load_patients_from_xml"]["items"])
+        self.assertIn("parse_eligibility", format_report(report))
+
+    def test_main_keeps_folder_and_writes_json(self):
+        with tempfile.TemporaryDirectory() as folder:
+            json_file = os.path.join(folder, "report.json")
+            main(
+                [
+                    "--files",
+                    "4",
+                    "--patients",
+                    "2",
+                    "--folder",
+                    folder,
+                    "--json",
+                    json_file,
+                ]
+            )
+            self.assertTrue(os.path.exists(json_file))
+            self.assertTrue(os.path.exists(os.path.join(folder, "topics.xml")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,7 @@ import unittest
 
 import defusedxml.ElementTree
 
-from CTnlp.parsers import parse_clinical_trial
+from CTnlp.parsers import parse_clinical_trial, parse_clinical_trials_from_folder
 from CTnlp.utils import Gender
 
 current_file_directory = os.path.dirname(os.path.abspath(__file__))
@@ -88,5 +88,58 @@ class TestCriteriaParserFromFile(unittest.TestCase):
         self.assertEqual(expected_text, self.clinical_trial.text)
 
 
+class TestParseClinicalTrialFields(unittest.TestCase):
+    """Test parsing only a subset of clinical trial fields."""
+
+    root = defusedxml.ElementTree.parse(input_data).getroot()
+    full_trial = parse_clinical_trial(root=root)
+    clinical_trial = parse_clinical_trial(
+        root=root, fields=["gender", "minimum_age", "maximum_age", "inclusion"]
+    )
+
+    def test_requested_fields(self):
+        for field_name in [
+            "nct_id",
+            "gender",
+            "minimum_age",
+            "maximum_age",
+            "inclusion",
+        ]:
+            with self.subTest(field_name=field_name):
+                self.assertEqual(
+                    getattr(self.full_trial, field_name),
+                    getattr(self.clinical_trial, field_name),
+                )
+
+    def test_skipped_fields(self):
+        self.assertEqual("", self.clinical_trial.brief_title)
+        self.assertEqual([], self.clinical_trial.conditions)
+        self.assertEqual([], self.clinical_trial.interventions)
+        self.assertEqual("", self.clinical_trial.text)
+
+    def test_criteria_not_split(self):
+        clinical_trial = parse_clinical_trial(root=self.root, fields=["gender"])
+        self.assertEqual([], clinical_trial.inclusion)
+        self.assertEqual(Gender.all, clinical_trial.gender)
+
+    def test_text_field(self):
+        clinical_trial = parse_clinical_trial(root=self.root, fields=["text"])
+        self.assertEqual(self.full_trial.text, clinical_trial.text)
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            parse_clinical_trial(root=self.root, fields=["not_a_field"])
+
+    def test_parse_from_folder(self):
+        folder = os.path.dirname(input_data)
+        for iterparse in [False, True]:
+            with self.subTest(iterparse=iterparse):
+                cts = parse_clinical_trials_from_folder(
+                    folder, iterparse=iterparse, fields=["gender", "conditions"]
+                )
+                self.assertEqual(["Congenital Adrenal Hyperplasia"], cts[0].conditions)
+                self.assertEqual("", cts[0].brief_title)
+
+
 if __name__ == "__main__":
     unittest.main()
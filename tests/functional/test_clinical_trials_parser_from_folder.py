@@ -1,8 +1,13 @@
 import os
+import tempfile
+import types
 import unittest
 
 from CTnlp.clinical_trial import ClinicalTrial
-from CTnlp.parsers import parse_clinical_trials_from_folder
+from CTnlp.parsers import (
+    iter_clinical_trials_from_folder,
+    parse_clinical_trials_from_folder,
+)
 
 current_file_directory = os.path.dirname(os.path.abspath(__file__))
 
@@ -23,5 +28,67 @@ class TestCriteriaParserFromFolder(unittest.TestCase):
             self.assertTrue(isinstance(_ct, ClinicalTrial))
 
 
+class TestParallelParserFromFolder(unittest.TestCase):
+    """Test parsing a folder with a process pool."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(input_data, "NCT00000102.xml")) as f:
+            template = f.read()
+        cls.nct_ids = [f"NCT0000{i:04d}" for i in range(20)]
+        for nct_id in cls.nct_ids:
+            with open(os.path.join(cls.tmp_dir.name, f"{nct_id}.xml"), "w") as f:
+                f.write(template.replace("NCT00000102", nct_id))
+        with open(os.path.join(cls.tmp_dir.name, "broken.xml"), "w") as f:
+            f.write("<clinical_study>")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_same_order_as_sequential(self):
+        sequential = parse_clinical_trials_from_folder(folder_name=self.tmp_dir.name)
+        parallel = parse_clinical_trials_from_folder(
+            folder_name=self.tmp_dir.name, workers=2, chunk_size=3
+        )
+        self.assertEqual(
+            [_ct.nct_id for _ct in sequential], [_ct.nct_id for _ct in parallel]
+        )
+
+    def test_skips_broken_files(self):
+        parallel = parse_clinical_trials_from_folder(
+            folder_name=self.tmp_dir.name, workers=2, chunk_size=3
+        )
+        self.assertEqual(sorted(self.nct_ids), sorted(_ct.nct_id for _ct in parallel))
+
+
+class TestIterClinicalTrialsFromFolder(unittest.TestCase):
+    """Test lazy parsing of a folder."""
+
+    def test_is_lazy_iterator(self):
+        cts = iter_clinical_trials_from_folder(folder_name=input_data)
+        self.assertTrue(isinstance(cts, types.GeneratorType))
+        self.assertTrue(isinstance(next(cts), ClinicalTrial))
+
+    def test_same_as_list(self):
+        self.assertEqual(
+            parse_clinical_trials_from_folder(folder_name=input_data),
+            list(iter_clinical_trials_from_folder(folder_name=input_data)),
+        )
+
+    def test_first_n(self):
+        cts = iter_clinical_trials_from_folder(folder_name=input_data, first_n=1)
+        self.assertEqual(1, len(list(cts)))
+
+    def test_empty_folder(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertEqual([], list(iter_clinical_trials_from_folder(tmp_dir)))
+            self.assertIsNone(parse_clinical_trials_from_folder(tmp_dir))
+            with open(os.path.join(tmp_dir, "broken.xml"), "w") as f:
+                f.write("<clinical_study>")
+            self.assertEqual([], parse_clinical_trials_from_folder(tmp_dir))
+
+
 if __name__ == "__main__":
     unittest.main()
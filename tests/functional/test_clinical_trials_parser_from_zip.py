@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from CTnlp.clinical_trial import ClinicalTrial
+from CTnlp.parsers import (
+    iter_clinical_trials_from_zip,
+    parse_clinical_trials_from_folder,
+    parse_clinical_trials_from_zip,
+)
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+
+class TestClinicalTrialsParserFromZip(unittest.TestCase):
+    """Test parsing clinical trials directly from a zip archive."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.zip_file = os.path.join(cls.tmp_dir.name, "AllPublicXML.zip")
+        with open(os.path.join(input_data, "NCT00000102.xml")) as f:
+            template = f.read()
+        cls.nct_ids = [f"NCT0000{i:04d}" for i in range(10)]
+        with zipfile.ZipFile(cls.zip_file, "w") as archive:
+            archive.writestr("NCT0000xxxx/", "")
+            for nct_id in cls.nct_ids:
+                archive.writestr(
+                    f"NCT0000xxxx/{nct_id}.xml", template.replace("NCT00000102", nct_id)
+                )
+            archive.writestr("NCT0000xxxx/broken.xml", "<clinical_study>")
+            archive.writestr("Contents.txt", "not a trial")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_number_parsed_trials(self):
+        cts = parse_clinical_trials_from_zip(self.zip_file)
+        self.assertEqual(self.nct_ids, [_ct.nct_id for _ct in cts])
+        for _ct in cts:
+            self.assertTrue(isinstance(_ct, ClinicalTrial))
+
+    def test_same_as_from_folder(self):
+        ct_from_folder = parse_clinical_trials_from_folder(input_data)[0]
+        ct_from_zip = parse_clinical_trials_from_zip(
+            self.zip_file, nct_ids=["NCT00000102"]
+        )
+        self.assertEqual([], ct_from_zip)
+        ct_from_zip = parse_clinical_trials_from_zip(
+            self.zip_file, nct_ids=["NCT00000003"]
+        )[0]
+        self.assertEqual(ct_from_folder.criteria, ct_from_zip.criteria)
+        self.assertEqual(ct_from_folder.text, ct_from_zip.text)
+
+    def test_nct_ids_filter(self):
+        cts = iter_clinical_trials_from_zip(
+            self.zip_file, nct_ids={"NCT00000001", "NCT00000007"}
+        )
+        self.assertEqual(["NCT00000001", "NCT00000007"], [_ct.nct_id for _ct in cts])
+
+    def test_first_n(self):
+        cts = iter_clinical_trials_from_zip(self.zip_file, first_n=3)
+        self.assertEqual(self.nct_ids[:3], [_ct.nct_id for _ct in cts])
+
+    def test_parallel(self):
+        cts = iter_clinical_trials_from_zip(self.zip_file, workers=2, chunk_size=3)
+        self.assertEqual(self.nct_ids, [_ct.nct_id for _ct in cts])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import pickle
+import sys
+import unittest
+
+import defusedxml.ElementTree
+
+from CTnlp.clinical_trial import CompactClinicalTrial
+from CTnlp.parsers import parse_clinical_trial, parse_clinical_trials_from_folder
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_folder = os.path.join(current_file_directory, "../test_data/trials")
+input_data = os.path.join(input_folder, "NCT00000102.xml")
+
+
+class TestCompactClinicalTrial(unittest.TestCase):
+    """Test memory-compact clinical trial representation."""
+
+    root = defusedxml.ElementTree.parse(input_data).getroot()
+    clinical_trial = parse_clinical_trial(root=root)
+    compact_trial = parse_clinical_trial(root=root, compact=True)
+
+    def test_type(self):
+        self.assertTrue(isinstance(self.compact_trial, CompactClinicalTrial))
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.compact_trial, "__dict__"))
+
+    def test_text_is_lazy(self):
+        compact_trial = parse_clinical_trial(root=self.root, compact=True)
+        self.assertFalse(hasattr(compact_trial, "_text"))
+        self.assertEqual(self.clinical_trial.text, compact_trial.text)
+        self.assertIs(compact_trial.text, compact_trial.text)
+
+    def test_same_fields(self):
+        self.assertEqual(self.clinical_trial, self.compact_trial.to_clinical_trial())
+        self.assertEqual(
+            self.compact_trial,
+            CompactClinicalTrial.from_clinical_trial(self.clinical_trial),
+        )
+
+    def test_interned_values(self):
+        other = parse_clinical_trial(root=self.root, compact=True)
+        self.assertIs(self.compact_trial.study_type, other.study_type)
+        self.assertIs(self.compact_trial.conditions[0], other.conditions[0])
+        self.assertIs(
+            self.compact_trial.interventions[0].type, other.interventions[0].type
+        )
+
+    def test_smaller_than_clinical_trial(self):
+        self.assertLess(
+            sys.getsizeof(self.compact_trial),
+            sys.getsizeof(self.clinical_trial)
+            + sys.getsizeof(self.clinical_trial.__dict__),
+        )
+
+    def test_pickle(self):
+        self.assertEqual(
+            self.compact_trial, pickle.loads(pickle.dumps(self.compact_trial))
+        )
+
+    def test_pickle_text(self):
+        compact_trial = parse_clinical_trial(root=self.root, compact=True)
+        self.assertEqual(self.clinical_trial.text, compact_trial.text)
+        unpickled = pickle.loads(pickle.dumps(compact_trial))
+        self.assertFalse(hasattr(unpickled, "_text"))
+        self.assertEqual(compact_trial.text, unpickled.text)
+
+        compact_trial.text = "custom text"
+        unpickled = pickle.loads(pickle.dumps(compact_trial))
+        self.assertEqual("custom text", unpickled.text)
+        self.assertEqual(compact_trial, unpickled)
+
+    def test_projected_text(self):
+        compact_trial = parse_clinical_trial(
+            root=self.root, fields=["gender"], compact=True
+        )
+        clinical_trial = parse_clinical_trial(root=self.root, fields=["gender"])
+        self.assertEqual("", clinical_trial.text)
+        self.assertEqual(clinical_trial.text, compact_trial.text)
+        self.assertEqual("", pickle.loads(pickle.dumps(compact_trial)).text)
+        self.assertEqual(clinical_trial, compact_trial.to_clinical_trial())
+        self.assertEqual(
+            "", CompactClinicalTrial.from_clinical_trial(clinical_trial).text
+        )
+
+    def test_parse_from_folder(self):
+        cts = parse_clinical_trials_from_folder(input_folder, compact=True, workers=2)
+        self.assertEqual([self.compact_trial], cts)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from CTnlp.export import TABLES, iter_column_batches, trials_to_columns, write_parquet
+from CTnlp.parsers import parse_clinical_trials_from_folder
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+
+class TestColumnarExport(unittest.TestCase):
+    """Test columnar export of clinical trials."""
+
+    cts = parse_clinical_trials_from_folder(folder_name=input_data)
+    tables = trials_to_columns(cts)
+
+    def test_table_names(self):
+        self.assertEqual(set(TABLES), set(self.tables))
+
+    def test_trials_table(self):
+        trials = self.tables["trials"]
+        self.assertEqual(["NCT00000102"], trials["nct_id"])
+        self.assertEqual(["A"], trials["gender"])
+        self.assertEqual([14], trials["minimum_age"])
+        self.assertEqual([False], trials["accepts_healthy_volunteers"])
+
+    def test_child_tables_size(self):
+        self.assertEqual(2, len(self.tables["inclusion_criteria"]["criterion"]))
+        self.assertEqual(2, len(self.tables["exclusion_criteria"]["criterion"]))
+        self.assertEqual(0, len(self.tables["outcomes"]["measure"]))
+        self.assertEqual(
+            ["Congenital Adrenal Hyperplasia"], self.tables["conditions"]["condition"]
+        )
+        self.assertEqual(["Nifedipine"], self.tables["interventions"]["name"])
+
+    def test_columns_have_equal_length(self):
+        for table, columns in self.tables.items():
+            with self.subTest(table=table):
+                self.assertEqual(1, len({len(values) for values in columns.values()}))
+
+    def test_batches(self):
+        batches = list(iter_column_batches(self.cts * 5, batch_size=2))
+        self.assertEqual(
+            [2, 2, 1], [len(batch["trials"]["nct_id"]) for batch in batches]
+        )
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_write_parquet(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            row_counts = write_parquet(iter(self.cts * 3), tmp_dir, batch_size=2)
+            self.assertEqual(3, row_counts["trials"])
+            self.assertEqual(6, row_counts["inclusion_criteria"])
+            trials = pq.read_table(
+                os.path.join(tmp_dir, "trials.parquet"), columns=["nct_id", "gender"]
+            )
+            self.assertEqual(["NCT00000102"] * 3, trials.column("nct_id").to_pylist())
+            outcomes = pq.read_table(os.path.join(tmp_dir, "outcomes.parquet"))
+            self.assertEqual(0, outcomes.num_rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+from CTnlp.discovery import iter_xml_files, read_manifest
+from CTnlp.parsers import parse_clinical_trials_from_folder
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+
+class TestFileDiscovery(unittest.TestCase):
+    """Test streaming discovery of xml files in a folder of the dump layout."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.folder = cls.tmp_dir.name
+        with open(os.path.join(input_data, "NCT00000102.xml")) as f:
+            template = f.read()
+        for i in [5, 1, 12030, 10170, 200001, 3]:
+            nct_id = f"NCT{i:08d}"
+            subfolder = os.path.join(cls.folder, f"{nct_id[:-4]}xxxx")
+            os.makedirs(subfolder, exist_ok=True)
+            with open(os.path.join(subfolder, f"{nct_id}.xml"), "w") as f:
+                f.write(template.replace("NCT00000102", nct_id))
+        os.makedirs(os.path.join(cls.folder, "other", "nested"))
+        shutil.copy(
+            os.path.join(input_data, "NCT00000102.xml"),
+            os.path.join(cls.folder, "other", "nested"),
+        )
+        for name in [".hidden.xml", "notes.txt", "NCT00000001.json"]:
+            with open(os.path.join(cls.folder, name), "w") as f:
+                f.write("")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def relative(self, files):
+        return [os.path.relpath(file, self.folder) for file in files]
+
+    def test_same_files_as_glob(self):
+        expected = sorted(
+            file
+            for directory, _, _ in os.walk(self.folder)
+            for file in glob.glob(os.path.join(directory, "*.xml"))
+        )
+        self.assertEqual(expected, sorted(iter_xml_files(self.folder)))
+
+    def test_deterministic_order(self):
+        files = self.relative(iter_xml_files(self.folder))
+        self.assertEqual(
+            [
+                "NCT0000xxxx/NCT00000001.xml",
+                "NCT0000xxxx/NCT00000003.xml",
+                "NCT0000xxxx/NCT00000005.xml",
+                "NCT0001xxxx/NCT00010170.xml",
+                "NCT0001xxxx/NCT00012030.xml",
+                "NCT0020xxxx/NCT00200001.xml",
+                "other/nested/NCT00000102.xml",
+            ],
+            files,
+        )
+        for workers in [1, 2, 16]:
+            with self.subTest(workers=workers):
+                self.assertEqual(
+                    files, self.relative(iter_xml_files(self.folder, workers=workers))
+                )
+
+    def test_hidden_folders_and_symlinks(self):
+        with tempfile.TemporaryDirectory() as folder:
+            os.makedirs(os.path.join(folder, ".hidden", "a"))
+            shutil.copy(
+                os.path.join(input_data, "NCT00000102.xml"),
+                os.path.join(folder, ".hidden", "a"),
+            )
+            os.symlink("..", os.path.join(folder, ".hidden", "a", "loop"))
+            os.symlink(os.path.join(folder, ".hidden"), os.path.join(folder, "link"))
+            self.assertEqual(
+                [os.path.join(".hidden", "a", "NCT00000102.xml")],
+                [os.path.relpath(file, folder) for file in iter_xml_files(folder)],
+            )
+
+    def test_prefixes(self):
+        files = iter_xml_files(self.folder, prefixes=["NCT0001", "NCT00000003"])
+        self.assertEqual(
+            [
+                "NCT0000xxxx/NCT00000003.xml",
+                "NCT0001xxxx/NCT00010170.xml",
+                "NCT0001xxxx/NCT00012030.xml",
+            ],
+            self.relative(files),
+        )
+
+    def test_missing_folder(self):
+        with self.assertLogs(level="WARNING"):
+            missing_folder = os.path.join(self.folder, "missing")
+            self.assertEqual([], list(iter_xml_files(missing_folder)))
+
+    def test_manifest(self):
+        manifest = os.path.join(self.folder, "manifest.txt")
+        with open(manifest, "w") as f:
+            f.write(
+                "# files to parse\n"
+                "NCT0001xxxx/NCT00012030.xml\n"
+                "\n"
+                "  NCT0000xxxx/NCT00000005.xml  \n"
+                f"{os.path.join(self.folder, 'NCT0020xxxx', 'NCT00200001.xml')}\n"
+            )
+        self.assertEqual(
+            [
+                "NCT0001xxxx/NCT00012030.xml",
+                "NCT0000xxxx/NCT00000005.xml",
+                os.path.join(self.folder, "NCT0020xxxx", "NCT00200001.xml"),
+            ],
+            list(read_manifest(manifest)),
+        )
+        self.assertEqual(
+            [
+                "NCT0001xxxx/NCT00012030.xml",
+                "NCT0000xxxx/NCT00000005.xml",
+                "NCT0020xxxx/NCT00200001.xml",
+            ],
+            self.relative(iter_xml_files(self.folder, manifest=manifest)),
+        )
+        self.assertEqual(
+            [
+                "NCT0000xxxx/NCT00000005.xml",
+                "NCT0001xxxx/NCT00012030.xml",
+                "NCT0020xxxx/NCT00200001.xml",
+            ],
+            self.relative(iter_xml_files(self.folder, sort=True, manifest=manifest)),
+        )
+
+        cts = parse_clinical_trials_from_folder(
+            self.folder, manifest=manifest, prefixes=["NCT0001", "NCT0000"]
+        )
+        self.assertEqual(["NCT00012030", "NCT00000005"], [ct.nct_id for ct in cts])
+
+    def test_parse_folder(self):
+        cts = parse_clinical_trials_from_folder(self.folder, workers=2, chunk_size=2)
+        self.assertEqual(
+            [
+                "NCT00000001",
+                "NCT00000003",
+                "NCT00000005",
+                "NCT00010170",
+                "NCT00012030",
+                "NCT00200001",
+                "NCT00000102",
+            ],
+            [ct.nct_id for ct in cts],
+        )
+        cts = parse_clinical_trials_from_folder(
+            self.folder, prefixes=["NCT0001"], first_n=1
+        )
+        self.assertEqual(["NCT00010170"], [ct.nct_id for ct in cts])
+
+
+if __name__ == "__main__":
+    unittest.main()
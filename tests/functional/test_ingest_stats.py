@@ -0,0 +1,191 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from CTnlp.cache import TrialCache
+from CTnlp.metrics import STAGES, IngestStats
+from CTnlp.parsers import (
+    iter_clinical_trials_from_folder,
+    parse_clinical_trials_from_folder,
+    parse_clinical_trials_from_zip,
+)
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+
+class TestIngestStats(unittest.TestCase):
+    """Test instrumentation of parsing a folder."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.folder = os.path.join(cls.tmp_dir.name, "trials")
+        os.makedirs(cls.folder)
+        with open(os.path.join(input_data, "NCT00000102.xml")) as f:
+            template = f.read()
+        cls.nct_ids = [f"NCT0000{i:04d}" for i in range(12)]
+        for nct_id in cls.nct_ids:
+            with open(os.path.join(cls.folder, f"{nct_id}.xml"), "w") as f:
+                f.write(template.replace("NCT00000102", nct_id))
+        with open(os.path.join(cls.folder, "broken.xml"), "w") as f:
+            f.write("<clinical_study>")
+        cls.total_bytes = sum(
+            os.path.getsize(os.path.join(cls.folder, name))
+            for name in os.listdir(cls.folder)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_stats(self):
+        stats = IngestStats(slowest_n=3)
+        cts = parse_clinical_trials_from_folder(self.folder, stats=stats)
+        self.assertEqual(parse_clinical_trials_from_folder(self.folder), cts)
+
+        self.assertEqual(13, stats.files)
+        self.assertEqual(12, stats.parsed)
+        self.assertEqual(self.total_bytes, stats.bytes_read)
+        self.assertEqual(1, len(stats.skipped))
+        source, reason = stats.skipped[0]
+        self.assertTrue(source.endswith("broken.xml"))
+        self.assertTrue(reason.startswith("xml parse error"))
+
+        for stage in ("read", "xml_parse", "total"):
+            self.assertEqual(13, stats.stages[stage].count)
+        for stage in ("eligibility", "criteria", "build"):
+            self.assertEqual(12, stats.stages[stage].count)
+
+        slowest_files = stats.slowest_files
+        self.assertEqual(3, len(slowest_files))
+        self.assertEqual(
+            sorted(seconds for _, seconds in slowest_files)[::-1],
+            [seconds for _, seconds in slowest_files],
+        )
+        self.assertEqual(13, stats.summary()["stages"]["total"]["count"])
+        self.assertIn("broken.xml", stats.format())
+
+    def test_on_file(self):
+        metrics = []
+        cts = list(
+            iter_clinical_trials_from_folder(
+                self.folder, workers=2, chunk_size=2, on_file=metrics.append
+            )
+        )
+        self.assertEqual(12, len(cts))
+        self.assertEqual(13, len(metrics))
+        for file_metrics in metrics:
+            self.assertEqual(
+                file_metrics.skipped, file_metrics.source.endswith("broken.xml")
+            )
+            self.assertLessEqual(set(file_metrics.stage_seconds), set(STAGES))
+
+    def test_fields_projection(self):
+        stats = IngestStats()
+        cts = parse_clinical_trials_from_folder(
+            self.folder, fields=["nct_id", "gender"], stats=stats
+        )
+        self.assertEqual([[]] * 12, [ct.inclusion for ct in cts])
+        self.assertEqual(12, stats.stages["eligibility"].count)
+
+    def test_cached_files(self):
+        cache_file = os.path.join(self.tmp_dir.name, "cache.sqlite")
+        with TrialCache(cache_file) as cache:
+            parse_clinical_trials_from_folder(self.folder, cache=cache)
+            stats = IngestStats()
+            parse_clinical_trials_from_folder(self.folder, cache=cache, stats=stats)
+        self.assertEqual((13, 12, 0), (stats.files, stats.cached, stats.parsed))
+        self.assertEqual(1, len(stats.skipped))
+
+    def test_zip(self):
+        zip_file = os.path.join(self.tmp_dir.name, "trials.zip")
+        with zipfile.ZipFile(zip_file, "w") as archive:
+            for name in sorted(os.listdir(self.folder)):
+                archive.write(os.path.join(self.folder, name), name)
+        stats = IngestStats()
+        cts = parse_clinical_trials_from_zip(zip_file, stats=stats)
+        self.assertEqual(12, len(cts))
+        self.assertEqual(
+            (13, 12, self.total_bytes), (stats.files, stats.parsed, stats.bytes_read)
+        )
+        self.assertEqual("broken.xml", stats.skipped[0][0])
+
+
+class TestIngestReport(unittest.TestCase):
+    """Test data quality counters collected while parsing a folder."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.folder = cls.tmp_dir.name
+        with open(os.path.join(input_data, "NCT00000102.xml")) as f:
+            template = f.read()
+        variants = {
+            "NCT00000001": template,
+            "NCT00000002": template.replace("14 Years", "about fourteen"),
+            "NCT00000003": template.replace("Inclusion Criteria:", "Criteria:")
+            .replace("Exclusion Criteria:", "")
+            .replace("<gender>All</gender>", ""),
+            "NCT00000004": template.replace(
+                "<minimum_age>14 Years</minimum_age>", "<minimum_age>N/A</minimum_age>"
+            ),
+        }
+        for nct_id, content in variants.items():
+            with open(os.path.join(cls.folder, f"{nct_id}.xml"), "w") as f:
+                f.write(content.replace("NCT00000102", nct_id))
+        with open(os.path.join(cls.folder, "broken.xml"), "w") as f:
+            f.write("<clinical_study>")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def assert_report(self, stats, cached=False):
+        report = stats.report()
+        if not cached:
+            self.assertEqual(1, report["xml_failures"])
+            self.assertEqual(1, report["criteria_split_failures"])
+            self.assertEqual(0.75, report["criteria_split_rate"])
+            self.assertEqual({"about fourteen": 1}, report["unparseable_ages"])
+        missing_rates = report["missing_rates"]
+        self.assertEqual(0.5, missing_rates["minimum_age"])
+        self.assertEqual(0.25, missing_rates["gender"])
+        self.assertEqual(0.25, missing_rates["inclusion"])
+        self.assertEqual(0.0, missing_rates["brief_title"])
+        self.assertEqual(0.0, missing_rates["conditions"])
+
+    def test_report(self):
+        stats = IngestStats()
+        with self.assertLogs(level="INFO") as logs:
+            cts = parse_clinical_trials_from_folder(self.folder, stats=stats)
+        self.assertEqual(4, len(cts))
+        self.assert_report(stats)
+        self.assertIn(
+            "INFO:root:percentage of successfully parsed criteria: 0.750000",
+            logs.output,
+        )
+        self.assertIn("about fourteen", stats.format())
+
+    def test_report_parallel(self):
+        stats = IngestStats()
+        list(
+            iter_clinical_trials_from_folder(
+                self.folder, workers=2, chunk_size=1, stats=stats
+            )
+        )
+        self.assert_report(stats)
+
+    def test_report_cached(self):
+        with TrialCache(os.path.join(self.folder, "cache.sqlite")) as cache:
+            parse_clinical_trials_from_folder(self.folder, cache=cache)
+            stats = IngestStats()
+            parse_clinical_trials_from_folder(self.folder, cache=cache, stats=stats)
+        self.assertEqual(4, stats.cached)
+        self.assert_report(stats, cached=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
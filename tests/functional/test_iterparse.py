@@ -0,0 +1,54 @@
+import io
+import os
+import unittest
+
+import defusedxml.ElementTree as ET
+
+from CTnlp.parsers import (
+    TRIAL_ELEMENT_TAGS,
+    iterparse_clinical_trial_root,
+    parse_clinical_trial,
+    parse_clinical_trials_from_folder,
+)
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_folder = os.path.join(current_file_directory, "../test_data/trials")
+input_data = os.path.join(input_folder, "NCT00000102.xml")
+
+
+class TestIterparseClinicalTrialRoot(unittest.TestCase):
+    """Test iterparse based extraction of clinical trials."""
+
+    root = iterparse_clinical_trial_root(input_data)
+
+    def test_only_needed_elements_are_kept(self):
+        self.assertEqual("clinical_study", self.root.tag)
+        self.assertTrue(len(self.root) > 0)
+        for element in self.root:
+            self.assertIn(element.tag, TRIAL_ELEMENT_TAGS)
+
+    def test_same_clinical_trial(self):
+        full_root = ET.parse(input_data).getroot()
+        self.assertEqual(
+            parse_clinical_trial(full_root), parse_clinical_trial(self.root)
+        )
+
+    def test_file_object(self):
+        with open(input_data, "rb") as f:
+            root = iterparse_clinical_trial_root(io.BytesIO(f.read()))
+        self.assertEqual(len(self.root), len(root))
+
+    def test_invalid_xml(self):
+        with self.assertRaises(ET.ParseError):
+            iterparse_clinical_trial_root(io.BytesIO(b"<clinical_study>"))
+
+    def test_parse_from_folder(self):
+        self.assertEqual(
+            parse_clinical_trials_from_folder(input_folder),
+            parse_clinical_trials_from_folder(input_folder, iterparse=True),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from CTnlp.patient import iter_patients_from_xml, load_patients_from_xml
+from CTnlp.patient.parsers import extract_sections
+
+DESCRIPTIONS = [
+    "A 58-year-old man with chest pain. He has a medical history of diabetes. "
+    "His father died of a heart attack.",
+    "A 19-year-old female with fever. Her family history is notable for lupus. "
+    "She smokes.",
+    "A 7-year-old boy with a cough.",
+]
+
+TREC_TOPICS = "<topics task='2022 TREC Clinical Trials'>{}</topics>".format(
+    "".join(
+        f"<topic number='{number}'>\n{description}\n</topic>"
+        for number, description in enumerate(DESCRIPTIONS * 10, start=1)
+    )
+)
+
+CSIRO_TOPICS = "<topics>{}</topics>".format(
+    "".join(
+        f"<topic number='{number}'><description>{description}</description></topic>"
+        for number, description in enumerate(DESCRIPTIONS, start=1)
+    )
+)
+
+
+class TestIterPatientsFromXml(unittest.TestCase):
+    """Test streaming patients loader."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.trec_file = os.path.join(self.tmp_dir.name, "trec.xml")
+        self.csiro_file = os.path.join(self.tmp_dir.name, "csiro.xml")
+        with open(self.trec_file, "w") as f:
+            f.write(TREC_TOPICS)
+        with open(self.csiro_file, "w") as f:
+            f.write(CSIRO_TOPICS)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_trec(self):
+        patients = list(iter_patients_from_xml(self.trec_file))
+        self.assertEqual(30, len(patients))
+        self.assertEqual("trec.xml_1", patients[0].unique_id)
+        self.assertEqual(30, patients[-1].patient_id)
+        for patient, description in zip(patients, DESCRIPTIONS * 10):
+            self.assertEqual(description, patient.description)
+            self.assertEqual(
+                extract_sections(description),
+                (
+                    patient.current_medical_history,
+                    patient.past_medical_history,
+                    patient.family_medical_history,
+                ),
+            )
+
+    def test_csiro(self):
+        patients = load_patients_from_xml(self.csiro_file, input_type="CSIRO")
+        self.assertEqual(DESCRIPTIONS, [patient.description for patient in patients])
+        self.assertEqual(
+            "Her family history is notable for lupus.",
+            patients[1].family_medical_history,
+        )
+
+    def test_executor_keeps_order(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            patients = list(
+                iter_patients_from_xml(self.trec_file, executor=executor, chunk_size=4)
+            )
+        self.assertEqual(load_patients_from_xml(self.trec_file), patients)
+
+    def test_workers(self):
+        patients = list(iter_patients_from_xml(self.trec_file, workers=2))
+        self.assertEqual(load_patients_from_xml(self.trec_file), patients)
+
+    def test_invalid_input_type(self):
+        with self.assertRaises(ValueError):
+            iter_patients_from_xml(self.trec_file, input_type="other")
+
+
+if __name__ == "__main__":
+    unittest.main()
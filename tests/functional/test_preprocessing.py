@@ -0,0 +1,115 @@
+import dataclasses
+import functools
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from CTnlp.cache import TokenCache
+from CTnlp.parsers import parse_clinical_trials_from_folder
+from CTnlp.preprocessing import preprocess_clinical_trials, tokenize
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+
+def upper_tokenize(text):
+    return text.upper().split()
+
+
+class TestPreprocessClinicalTrials(unittest.TestCase):
+    """Test tokenization of clinical trial texts into text_preprocessed."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp_dir.name, "tokens.sqlite")
+        self.cts = parse_clinical_trials_from_folder(input_data)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_tokenize(self):
+        self.assertEqual(
+            ["type", "2", "diabetes", "hba1c", "7"],
+            tokenize("Type 2 Diabetes (HbA1c > 7%)"),
+        )
+
+    def test_text_preprocessed_is_populated(self):
+        cts = list(preprocess_clinical_trials(self.cts))
+        self.assertEqual(self.cts, cts)
+        self.assertEqual(tokenize(cts[0].text), cts[0].text_preprocessed)
+
+    def test_executor(self):
+        expected = [tokenize(ct.text) for ct in self.cts]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            cts = list(
+                preprocess_clinical_trials(self.cts, executor=executor, chunk_size=1)
+            )
+        self.assertEqual(expected, [ct.text_preprocessed for ct in cts])
+
+    def test_cache(self):
+        with TokenCache(self.cache_file) as cache:
+            list(preprocess_clinical_trials(self.cts, cache=cache))
+        ct = self.cts[0]
+        with TokenCache(self.cache_file) as cache:
+            self.assertEqual(1, len(cache))
+            cache.put(ct.nct_id, "CTnlp.preprocessing.tokenize", ct.text, ["cached"])
+            cts = list(preprocess_clinical_trials(self.cts, cache=cache))
+        self.assertEqual(["cached"], cts[0].text_preprocessed)
+
+    def test_cache_is_keyed_by_text_and_tokenizer(self):
+        ct = self.cts[0]
+        with TokenCache(self.cache_file) as cache:
+            list(preprocess_clinical_trials(self.cts, cache=cache))
+            list(
+                preprocess_clinical_trials(
+                    self.cts, upper_tokenize, cache=cache, tokenizer_name="upper"
+                )
+            )
+            self.assertEqual(2, len(cache))
+            self.assertEqual(upper_tokenize(ct.text), ct.text_preprocessed)
+
+            ct.text = "changed text"
+            list(preprocess_clinical_trials(self.cts, cache=cache))
+            self.assertEqual(["changed", "text"], ct.text_preprocessed)
+
+    def test_tokenizer_name(self):
+        split = functools.partial(str.split, sep=" ")
+        cts = list(preprocess_clinical_trials(self.cts, tokenizer=split))
+        self.assertEqual(self.cts[0].text.split(" "), cts[0].text_preprocessed)
+
+        with TokenCache(self.cache_file) as cache:
+            with self.assertRaises(ValueError):
+                list(preprocess_clinical_trials(self.cts, split, cache=cache))
+            for name, tokenizer in [
+                ("a", lambda text: ["a"]),
+                ("b", lambda text: ["b"]),
+            ]:
+                cts = list(
+                    preprocess_clinical_trials(
+                        self.cts, tokenizer, cache=cache, tokenizer_name=name
+                    )
+                )
+                self.assertEqual([name], cts[0].text_preprocessed)
+
+    def test_cached_tokens_are_not_read_ahead(self):
+        cts = [
+            dataclasses.replace(self.cts[0], nct_id=f"NCT{i:08d}") for i in range(300)
+        ]
+        with TokenCache(self.cache_file) as cache:
+            list(preprocess_clinical_trials(cts[1:-1], cache=cache))
+            lookups = []
+            get = cache.get
+            cache.get = lambda *key: lookups.append(key) or get(*key)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = preprocess_clinical_trials(
+                    cts, executor=executor, chunk_size=16, cache=cache
+                )
+                self.assertEqual(cts[0], next(results))
+                self.assertLessEqual(len(lookups), 2 * 16)
+                self.assertEqual(300, 1 + sum(1 for _ in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
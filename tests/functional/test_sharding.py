@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from array import array
+
+from CTnlp.bm25 import BM25Index
+from CTnlp.cache import TrialCache
+from CTnlp.discovery import shard_of
+from CTnlp.index import TrialIndex
+from CTnlp.metrics import IngestStats
+from CTnlp.parsers import (
+    iter_clinical_trials_from_folder,
+    parse_clinical_trials_from_folder,
+    parse_clinical_trials_from_zip,
+)
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+SHARD_COUNT = 3
+
+
+class TestSharding(unittest.TestCase):
+    """Test parsing a folder in shards and merging outputs of the shards."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.folder = os.path.join(cls.tmp_dir.name, "trials")
+        os.makedirs(cls.folder)
+        with open(os.path.join(input_data, "NCT00000102.xml")) as f:
+            template = f.read()
+        cls.nct_ids = [f"NCT{i:08d}" for i in range(12)]
+        for i, nct_id in enumerate(cls.nct_ids):
+            with open(os.path.join(cls.folder, f"{nct_id}.xml"), "w") as f:
+                f.write(
+                    template.replace("NCT00000102", nct_id).replace(
+                        "Congenital Adrenal Hyperplasia", f"condition {i}"
+                    )
+                )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def parse_shard(self, shard_index, **kwargs):
+        return parse_clinical_trials_from_folder(
+            self.folder, shard_index=shard_index, shard_count=SHARD_COUNT, **kwargs
+        )
+
+    def test_shard_of(self):
+        self.assertEqual(1, shard_of("NCT00000102", 4))
+        self.assertEqual(1, shard_of(os.path.join("a", "NCT00000102.xml"), 4))
+        self.assertEqual(
+            [0, 1, 1, 2, 0, 0, 2, 0, 2, 0, 0, 1],
+            [shard_of(nct_id, SHARD_COUNT) for nct_id in self.nct_ids],
+        )
+
+    def test_shards_partition_trials(self):
+        shards = [
+            [ct.nct_id for ct in self.parse_shard(shard_index)]
+            for shard_index in range(SHARD_COUNT)
+        ]
+        for shard_index, nct_ids in enumerate(shards):
+            self.assertTrue(nct_ids)
+            for nct_id in nct_ids:
+                self.assertEqual(shard_index, shard_of(nct_id, SHARD_COUNT))
+        self.assertEqual(self.nct_ids, sorted(sum(shards, [])))
+
+    def test_zip_shards(self):
+        zip_file = os.path.join(self.tmp_dir.name, "trials.zip")
+        with zipfile.ZipFile(zip_file, "w") as archive:
+            for nct_id in self.nct_ids:
+                archive.write(
+                    os.path.join(self.folder, f"{nct_id}.xml"),
+                    f"NCT0000xxxx/{nct_id}.xml",
+                )
+        for shard_index in range(SHARD_COUNT):
+            with self.subTest(shard_index=shard_index):
+                self.assertEqual(
+                    self.parse_shard(shard_index),
+                    parse_clinical_trials_from_zip(
+                        zip_file, shard_index=shard_index, shard_count=SHARD_COUNT
+                    ),
+                )
+
+    def test_invalid_shard(self):
+        for shard_index, shard_count in [(3, 3), (-1, 3), (0, 0)]:
+            with self.subTest(shard_index=shard_index, shard_count=shard_count):
+                with self.assertRaises(ValueError):
+                    list(
+                        iter_clinical_trials_from_folder(
+                            self.folder,
+                            shard_index=shard_index,
+                            shard_count=shard_count,
+                        )
+                    )
+
+    def test_merge_caches_and_reports(self):
+        cache_files, report_files = [], []
+        for shard_index in range(SHARD_COUNT):
+            cache_file = os.path.join(self.tmp_dir.name, f"cache_{shard_index}.sqlite")
+            report_file = os.path.join(self.tmp_dir.name, f"report_{shard_index}.json")
+            stats = IngestStats()
+            with TrialCache(cache_file) as cache:
+                self.parse_shard(shard_index, cache=cache, stats=stats)
+            stats.save(report_file)
+            cache_files.append(cache_file)
+            report_files.append(report_file)
+
+        merged_file = os.path.join(self.tmp_dir.name, "cache_merged.sqlite")
+        with TrialCache(merged_file) as cache:
+            self.assertEqual(12, cache.merge(*cache_files))
+            stats = IngestStats()
+            cts = parse_clinical_trials_from_folder(
+                self.folder, cache=cache, stats=stats
+            )
+        self.assertEqual(parse_clinical_trials_from_folder(self.folder), cts)
+        self.assertEqual((12, 0), (stats.cached, stats.parsed))
+
+        with TrialCache(merged_file) as cache:
+            with self.assertRaises(FileNotFoundError):
+                cache.merge(os.path.join(self.tmp_dir.name, "missing"))
+
+        merged_stats = IngestStats()
+        for report_file in report_files:
+            merged_stats.merge(IngestStats.load(report_file))
+        self.assertEqual((12, 12), (merged_stats.files, merged_stats.parsed))
+        self.assertEqual(12, merged_stats.stages["total"].count)
+        self.assertEqual(10, len(merged_stats.slowest_files))
+        self.assertEqual(0.0, merged_stats.missing_rates["conditions"])
+
+    def test_merge_indexes(self):
+        shards = [self.parse_shard(shard_index) for shard_index in range(SHARD_COUNT)]
+        cts = sum(shards, [])
+
+        merged_index = TrialIndex.merge(TrialIndex(shard) for shard in shards)
+        self.assertEqual(12, len(merged_index))
+        bitmap = merged_index.query(conditions=["condition 3"])
+        self.assertEqual(
+            ["NCT00000003"], [ct.nct_id for ct in merged_index.trials(bitmap)]
+        )
+
+        expected = BM25Index.build(cts)
+        merged = BM25Index.merge([BM25Index.build(shard) for shard in shards])
+        self.assertEqual(expected.doc_ids, merged.doc_ids)
+        self.assertEqual(expected.vocabulary, merged.vocabulary)
+        for name in ["doc_lengths", "postings_docs", "postings_tfs"]:
+            self.assertEqual(
+                array("I", getattr(expected, name)), array("I", getattr(merged, name))
+            )
+        self.assertEqual(expected.search("condition 5"), merged.search("condition 5"))
+
+        index_folder = os.path.join(self.tmp_dir.name, "bm25_shard")
+        BM25Index.build(shards[0]).save(index_folder)
+        with BM25Index.load(index_folder) as loaded:
+            merged = BM25Index.merge([loaded, BM25Index.build(shards[1])])
+            self.assertEqual(len(shards[0]) + len(shards[1]), len(merged))
+
+        with self.assertRaises(ValueError):
+            BM25Index.merge([BM25Index.build(cts), BM25Index.build(cts, k1=2.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import dataclasses
+import os
+import shutil
+import tempfile
+import unittest
+
+from CTnlp.cache import TrialCache
+from CTnlp.parsers import (
+    iter_clinical_trials_from_folder,
+    parse_clinical_trials_from_folder,
+)
+
+current_file_directory = os.path.dirname(os.path.abspath(__file__))
+
+input_data = os.path.join(current_file_directory, "../test_data/trials")
+
+
+class TestTrialCache(unittest.TestCase):
+    """Test on-disk cache of parsed clinical trials."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.trials_folder = os.path.join(self.tmp_dir.name, "trials")
+        shutil.copytree(input_data, self.trials_folder)
+        self.trial_file = os.path.join(self.trials_folder, "NCT00000102.xml")
+        self.cache_file = os.path.join(self.tmp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache_is_populated(self):
+        with TrialCache(self.cache_file) as cache:
+            cts = parse_clinical_trials_from_folder(self.trials_folder, cache=cache)
+        with TrialCache(self.cache_file) as cache:
+            self.assertEqual(1, len(cache))
+            self.assertEqual(cts[0], cache.get(self.trial_file))
+
+    def test_unchanged_file_is_loaded_from_cache(self):
+        with TrialCache(self.cache_file) as cache:
+            ct = parse_clinical_trials_from_folder(self.trials_folder, cache=cache)[0]
+            cache.put(self.trial_file, dataclasses.replace(ct, nct_id="cached"))
+        with TrialCache(self.cache_file) as cache:
+            cts = parse_clinical_trials_from_folder(self.trials_folder, cache=cache)
+        self.assertEqual("cached", cts[0].nct_id)
+
+    def test_modified_file_is_parsed_again(self):
+        with TrialCache(self.cache_file) as cache:
+            ct = parse_clinical_trials_from_folder(self.trials_folder, cache=cache)[0]
+            cache.put(self.trial_file, dataclasses.replace(ct, nct_id="cached"))
+        stat = os.stat(self.trial_file)
+        os.utime(self.trial_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with TrialCache(self.cache_file) as cache:
+            cts = parse_clinical_trials_from_folder(self.trials_folder, cache=cache)
+            self.assertEqual("NCT00000102", cts[0].nct_id)
+            self.assertEqual("NCT00000102", cache.get(self.trial_file).nct_id)
+
+    def test_projected_trials_are_not_cached(self):
+        with TrialCache(self.cache_file) as cache:
+            parse_clinical_trials_from_folder(
+                self.trials_folder, cache=cache, fields=["gender"]
+            )
+            self.assertEqual(0, len(cache))
+
+    def test_parallel_with_cache(self):
+        with TrialCache(self.cache_file) as cache:
+            cts = parse_clinical_trials_from_folder(
+                self.trials_folder, workers=2, cache=cache
+            )
+            cached_cts = parse_clinical_trials_from_folder(
+                self.trials_folder, workers=2, cache=cache
+            )
+        self.assertEqual(cts, cached_cts)
+
+    def test_cached_trials_are_not_read_ahead(self):
+        with open(self.trial_file) as f:
+            template = f.read()
+        for i in range(300):
+            nct_id = f"NCT{i:08d}"
+            with open(os.path.join(self.trials_folder, f"{nct_id}.xml"), "w") as f:
+                f.write(template.replace("NCT00000102", nct_id))
+        with TrialCache(self.cache_file) as cache:
+            parse_clinical_trials_from_folder(self.trials_folder, cache=cache)
+        # two modified files are parsed again, all other files are cached
+        for nct_id in ["NCT00000000", "NCT00000299"]:
+            with open(os.path.join(self.trials_folder, f"{nct_id}.xml"), "a") as f:
+                f.write("\n")
+
+        with TrialCache(self.cache_file) as cache:
+            lookups = []
+            get = cache.get
+            cache.get = lambda file: lookups.append(file) or get(file)
+            cts = iter_clinical_trials_from_folder(
+                self.trials_folder, workers=2, chunk_size=16, cache=cache
+            )
+            self.assertEqual("NCT00000000", next(cts).nct_id)
+            self.assertLessEqual(len(lookups), 4 * 16)
+            self.assertEqual(300, 1 + sum(1 for _ in cts))
+
+
+if __name__ == "__main__":
+    unittest.main()
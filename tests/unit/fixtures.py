@@ -0,0 +1,47 @@
+"""Clinical trials shared by unit tests."""
+
+from CTnlp.clinical_trial import ClinicalTrial, Intervention
+from CTnlp.utils import Gender
+
+
+def make_trial(
+    nct_id,
+    gender=Gender.all,
+    minimum_age=None,
+    maximum_age=None,
+    accepts_healthy_volunteers=True,
+    conditions=(),
+    interventions=(),
+):
+    return ClinicalTrial(
+        org_study_id=nct_id,
+        nct_id=nct_id,
+        brief_title="",
+        official_title="",
+        brief_summary="",
+        detailed_description="",
+        study_type="Interventional",
+        criteria="",
+        inclusion=[],
+        exclusion=[],
+        gender=gender,
+        minimum_age=minimum_age,
+        maximum_age=maximum_age,
+        accepts_healthy_volunteers=accepts_healthy_volunteers,
+        primary_outcomes=[],
+        secondary_outcomes=[],
+        conditions=list(conditions),
+        interventions=[
+            Intervention(type="Drug", name=name, description=None)
+            for name in interventions
+        ],
+    )
+
+
+TRIALS = [
+    make_trial("NCT1", Gender.all, 18, 65, False, ["Diabetes"], ["Metformin"]),
+    make_trial("NCT2", Gender.female, 18, None, True, ["Breast Cancer"]),
+    make_trial("NCT3", Gender.male, None, 17, False, ["Asthma"], ["Albuterol"]),
+    make_trial("NCT4", Gender.unknown, 40, 80, True, ["diabetes "]),
+    make_trial("NCT5", Gender.all, 65, 65, False, ["Heart Failure"]),
+]
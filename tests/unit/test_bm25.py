@@ -0,0 +1,121 @@
+import math
+import tempfile
+import unittest
+from collections import Counter
+
+from CTnlp.bm25 import BM25Index, tokenize
+from CTnlp.patient import Patient
+from tests.unit.fixtures import make_trial
+
+
+def make_text_trial(nct_id, title, inclusion=()):
+    clinical_trial = make_trial(nct_id)
+    clinical_trial.brief_title = title
+    clinical_trial.inclusion = list(inclusion)
+    clinical_trial.text = title
+    return clinical_trial
+
+
+TRIALS = [
+    make_text_trial("NCT1", "Metformin for type 2 diabetes", ["Type 2 diabetes"]),
+    make_text_trial("NCT2", "Breast cancer screening in women", ["Women over 40"]),
+    make_text_trial("NCT3", "Asthma in children", ["Diagnosed asthma"]),
+    make_text_trial("NCT4", "Diabetes diabetes diabetes prevention program"),
+    make_text_trial("NCT5", "Heart failure after diabetes", ["Heart failure"]),
+]
+
+
+def brute_force_scores(query, documents, k1=1.2, b=0.75):
+    tokenized = [tokenize(document) for document in documents]
+    average_length = sum(map(len, tokenized)) / len(tokenized)
+    scores = {}
+    for doc, tokens in enumerate(tokenized):
+        counts = Counter(tokens)
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in tokenized)
+            if not counts[term]:
+                continue
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * len(tokens) / average_length)
+            score += idf * counts[term] * (k1 + 1) / (counts[term] + norm)
+        if score:
+            scores[doc] = score
+    return scores
+
+
+class TestBM25Index(unittest.TestCase):
+    def setUp(self):
+        self.index = BM25Index.build(TRIALS)
+
+    def test_scores_match_brute_force(self):
+        query = "elderly diabetes patient with heart failure"
+        expected = brute_force_scores(query, [ct.text for ct in TRIALS])
+        scores = self.index.score(tokenize(query))
+        self.assertEqual(set(expected), set(scores))
+        for doc, score in expected.items():
+            self.assertAlmostEqual(score, scores[doc])
+
+    def test_search_top_k(self):
+        results = self.index.search("heart failure and diabetes", k=2)
+        self.assertEqual(["NCT5", "NCT4"], [nct_id for nct_id, _ in results])
+        self.assertGreater(results[0][1], results[1][1])
+
+    def test_search_unknown_terms(self):
+        self.assertEqual([], self.index.search("xylophone"))
+
+    def test_inclusion_field(self):
+        index = BM25Index.build(TRIALS, field="inclusion")
+        self.assertEqual(index.field, "inclusion")
+        self.assertEqual(["NCT2"], [nct_id for nct_id, _ in index.search("women")])
+
+    def test_text_preprocessed(self):
+        clinical_trial = make_text_trial("NCT6", "Asthma in adults")
+        clinical_trial.text_preprocessed = ["copd"]
+        index = BM25Index.build([clinical_trial], tokenizer=str.split)
+        self.assertEqual({"Asthma", "in", "adults"}, set(index.vocabulary))
+        index = BM25Index.build([clinical_trial], use_preprocessed=True)
+        self.assertEqual({"copd"}, set(index.vocabulary))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as folder:
+            self.index.save(folder)
+            with BM25Index.load(folder) as loaded:
+                self.assertEqual(len(self.index), len(loaded))
+                for query in ["diabetes", "asthma children", "breast cancer"]:
+                    self.assertEqual(self.index.search(query), loaded.search(query))
+
+    def test_save_and_load_empty(self):
+        index = BM25Index.build([])
+        with tempfile.TemporaryDirectory() as folder:
+            index.save(folder)
+            with BM25Index.load(folder) as loaded:
+                self.assertEqual(0, len(loaded))
+                self.assertEqual([], loaded.search("diabetes"))
+
+    def test_tokenizer_is_saved(self):
+        index = BM25Index.build(TRIALS, tokenizer=str.split)
+        self.assertEqual(["NCT3"], [nct_id for nct_id, _ in index.search("Asthma")])
+        with self.assertRaises(ValueError):
+            index.search("Asthma", tokenizer=tokenize)
+        with tempfile.TemporaryDirectory() as folder:
+            index.save(folder)
+            with self.assertRaises(ValueError):
+                BM25Index.load(folder)
+            with BM25Index.load(folder, tokenizer=str.split) as loaded:
+                self.assertEqual(index.search("Asthma"), loaded.search("Asthma"))
+        with self.assertRaises(ValueError):
+            BM25Index.merge([index, self.index])
+
+    def test_search_patients(self):
+        patients = [
+            Patient("p_1", 1, "A 7 year old with asthma."),
+            Patient("p_2", 2, "A woman with a family history of breast cancer."),
+        ]
+        results = self.index.search_patients(patients, k=1)
+        self.assertEqual(["NCT3"], [nct_id for nct_id, _ in results["p_1"]])
+        self.assertEqual(["NCT2"], [nct_id for nct_id, _ in results["p_2"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
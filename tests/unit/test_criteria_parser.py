@@ -145,5 +145,38 @@ class TestCriteriaParser(unittest.TestCase):
                 self.assertEqual(exclusion, self.exclusion[index_i])
 
 
+class TestCriteriaHeaders(unittest.TestCase):
+    """Test locating inclusion and exclusion headers."""
+
+    def test_header_variants(self):
+        inclusion, exclusion = parse_criteria(
+            "Inclusive Criteria: - first - second EXCLUSIVE CRITERIA: - third"
+        )
+        self.assertEqual(["first", "second"], inclusion)
+        self.assertEqual(["third"], exclusion)
+
+    def test_exclusion_before_inclusion_is_ignored(self):
+        inclusion, exclusion = parse_criteria(
+            "Exclusion criteria are listed below. Inclusion criteria: - first"
+        )
+        self.assertEqual(["first"], inclusion)
+        self.assertEqual([], exclusion)
+
+    def test_no_inclusion_header(self):
+        self.assertIsNone(parse_criteria("Exclusion Criteria: - first"))
+        self.assertIsNone(parse_criteria("Inclusion Criteria"))
+
+    def test_custom_headers(self):
+        criteria = "Eligibility: - first - second Ineligibility: - third"
+        self.assertIsNone(parse_criteria(criteria))
+        inclusion, exclusion = parse_criteria(
+            criteria,
+            inclusion_headers=["eligibility"],
+            exclusion_headers=["ineligibility"],
+        )
+        self.assertEqual(["first", "second"], inclusion)
+        self.assertEqual(["third"], exclusion)
+
+
 if __name__ == "__main__":
     unittest.main()
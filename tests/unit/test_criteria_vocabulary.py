@@ -0,0 +1,105 @@
+import pickle
+import unittest
+
+from CTnlp.clinical_trial import CompactClinicalTrial
+from CTnlp.criteria import CriteriaVocabulary, normalize_criterion
+from tests.unit.fixtures import make_trial
+
+
+def make_criteria_trial(nct_id, inclusion, exclusion):
+    clinical_trial = make_trial(nct_id)
+    clinical_trial.inclusion = inclusion
+    clinical_trial.exclusion = exclusion
+    return clinical_trial
+
+
+class TestNormalizeCriterion(unittest.TestCase):
+    def test_normalize(self):
+        for criterion in [
+            "Pregnant or breastfeeding women",
+            "pregnant or  breastfeeding\nwomen.",
+            "- Pregnant or breastfeeding women;",
+            "2. PREGNANT OR BREASTFEEDING WOMEN",
+        ]:
+            self.assertEqual(
+                "pregnant or breastfeeding women", normalize_criterion(criterion)
+            )
+
+    def test_keeps_meaningful_prefix(self):
+        self.assertEqual("age ≥ 18 years", normalize_criterion("Age ≥ 18 years"))
+        self.assertEqual("18 years or older", normalize_criterion("18 years or older"))
+        self.assertEqual("pregnant women", normalize_criterion("b) Pregnant women"))
+
+    def test_keeps_genus_initial(self):
+        for criterion in ["S. aureus infection", "H. pylori infection"]:
+            self.assertEqual(criterion.casefold(), normalize_criterion(criterion))
+        vocabulary = CriteriaVocabulary()
+        self.assertNotEqual(
+            vocabulary.add("S. pneumoniae pneumonia"),
+            vocabulary.add("K. pneumoniae pneumonia"),
+        )
+
+
+class TestCriteriaVocabulary(unittest.TestCase):
+    def setUp(self):
+        self.cts = [
+            make_criteria_trial(
+                "NCT1", ["Age ≥ 18 years", "Type 2 diabetes"], ["Pregnant women"]
+            ),
+            make_criteria_trial("NCT2", ["age ≥ 18 years."], ["Pregnant women"]),
+            make_criteria_trial("NCT3", [], ["pregnant women", "Dementia"]),
+        ]
+        self.vocabulary = CriteriaVocabulary()
+        self.vocabulary.add_clinical_trials(self.cts)
+
+    def test_ids(self):
+        self.assertEqual(4, len(self.vocabulary))
+        self.assertEqual([0, 1], self.cts[0].inclusion_ids)
+        self.assertEqual([2], self.cts[0].exclusion_ids)
+        self.assertEqual([0], self.cts[1].inclusion_ids)
+        self.assertEqual([2, 3], self.cts[2].exclusion_ids)
+        self.assertEqual(2, self.vocabulary.get_id("PREGNANT WOMEN"))
+        self.assertIsNone(self.vocabulary.get_id("Heart failure"))
+
+    def test_strings_are_shared(self):
+        # built at runtime, so the strings are distinct objects before sharing
+        cts = [
+            make_criteria_trial(nct_id, ["".join(["Pregnant ", "women"])], [])
+            for nct_id in ["NCT4", "NCT5"]
+        ]
+        self.assertIsNot(cts[0].inclusion[0], cts[1].inclusion[0])
+        self.vocabulary.add_clinical_trials(cts)
+        self.assertIs(cts[0].inclusion[0], cts[1].inclusion[0])
+
+    def test_criteria_are_not_replaced(self):
+        self.assertEqual(["age ≥ 18 years."], self.cts[1].inclusion)
+        self.assertEqual(["pregnant women", "Dementia"], self.cts[2].exclusion)
+
+    def test_share_strings_false_keeps_criteria(self):
+        ct = make_criteria_trial("NCT4", ["pregnant women"], [])
+        self.vocabulary.add_clinical_trials([ct], share_strings=False)
+        self.assertEqual(["pregnant women"], ct.inclusion)
+        self.assertEqual([2], ct.inclusion_ids)
+
+    def test_frequency_stats(self):
+        self.assertEqual(3, self.vocabulary.frequency("Pregnant women"))
+        self.assertEqual(0, self.vocabulary.frequency("Heart failure"))
+        self.assertEqual(
+            [("Pregnant women", 3), ("Age ≥ 18 years", 2)],
+            self.vocabulary.most_common(2),
+        )
+        self.assertEqual(
+            {"total": 7, "unique": 4, "duplicate_ratio": 1 - 4 / 7, "singletons": 2},
+            self.vocabulary.stats(),
+        )
+
+    def test_compact_clinical_trial(self):
+        ct = CompactClinicalTrial.from_clinical_trial(make_trial("NCT5"))
+        ct.inclusion = ["Pregnant women"]
+        self.vocabulary.add_clinical_trials([ct])
+        self.assertEqual([2], ct.inclusion_ids)
+        self.assertEqual([2], pickle.loads(pickle.dumps(ct)).inclusion_ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
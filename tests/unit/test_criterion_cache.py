@@ -0,0 +1,89 @@
+import unittest
+
+from CTnlp.parsers import CriterionCache, classify_criteria
+
+
+class CountingClassifier:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, criterion):
+        self.calls.append(criterion)
+        return len(criterion)
+
+
+class TestCriterionCache(unittest.TestCase):
+    def setUp(self):
+        self.classifier = CountingClassifier()
+
+    def test_memoizes_folded_criteria(self):
+        cache = CriterionCache(self.classifier)
+        results = cache.map(["Pregnant women", "pregnant  women", "Dementia"])
+        self.assertEqual([14, 14, 8], results)
+        self.assertEqual(["Pregnant women", "Dementia"], self.classifier.calls)
+        self.assertEqual(
+            {"hits": 1, "store_hits": 0, "misses": 2, "size": 2, "hit_rate": 1 / 3},
+            cache.stats(),
+        )
+
+    def test_distinct_criteria(self):
+        cache = CriterionCache(self.classifier)
+        cache.map(["S. pneumoniae infection", "K. pneumoniae infection", "- Adults"])
+        cache.map(["Adults", "Adults."])
+        self.assertEqual(
+            [
+                "S. pneumoniae infection",
+                "K. pneumoniae infection",
+                "- Adults",
+                "Adults",
+                "Adults.",
+            ],
+            self.classifier.calls,
+        )
+
+    def test_lru_eviction(self):
+        cache = CriterionCache(self.classifier, maxsize=2)
+        cache.map(["a", "b", "a", "c", "a", "b"])
+        self.assertEqual(["a", "b", "c", "b"], self.classifier.calls)
+        self.assertEqual(2, len(cache))
+
+    def test_unbounded(self):
+        cache = CriterionCache(self.classifier, maxsize=None)
+        cache.map([str(i) for i in range(100)])
+        self.assertEqual(100, len(cache))
+
+    def test_store(self):
+        store = {}
+        CriterionCache(self.classifier, store=store).map(["Pregnant women"])
+        self.assertEqual({"pregnant women": 14}, store)
+
+        cache = CriterionCache(self.classifier, store=store)
+        self.assertEqual(14, cache("PREGNANT WOMEN"))
+        self.assertEqual(14, cache("Pregnant women"))
+        self.assertEqual(1, len(self.classifier.calls))
+        self.assertEqual((1, 1, 0), (cache.hits, cache.store_hits, cache.misses))
+        self.assertEqual(1.0, cache.hit_rate)
+
+    def test_clear(self):
+        cache = CriterionCache(self.classifier)
+        cache("a")
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0.0, cache.hit_rate)
+
+    def test_classify_criteria(self):
+        cache = CriterionCache(self.classifier)
+        criteria = """
+        Inclusion Criteria:
+          - Adults
+          - adults
+        Exclusion Criteria:
+          - Adults
+        """
+        self.assertEqual(([6, 6], [6]), classify_criteria(criteria, cache))
+        self.assertEqual(["Adults"], self.classifier.calls)
+        self.assertIsNone(classify_criteria("No headers", cache))
+
+
+if __name__ == "__main__":
+    unittest.main()
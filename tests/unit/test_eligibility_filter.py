@@ -0,0 +1,81 @@
+import unittest
+
+from CTnlp.index import TrialIndex
+from CTnlp.patient import Patient
+from CTnlp.utils import Gender
+from tests.unit.fixtures import TRIALS
+
+try:
+    import numpy as np
+
+    from CTnlp.eligibility import StructuredEligibilityFilter
+except ImportError:
+    np = None
+
+
+def make_patients():
+    patients = []
+    for gender in Gender:
+        for age in [None, 0.5, 17, 18, 30, 65, 70]:
+            for is_healthy in [None, False, True]:
+                patients.append(
+                    Patient(
+                        unique_id=f"topics_{len(patients)}",
+                        patient_id=len(patients),
+                        description="",
+                        gender=gender,
+                        age=age,
+                        is_healthy=is_healthy,
+                    )
+                )
+    return patients
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestStructuredEligibilityFilter(unittest.TestCase):
+    """Test vectorized structured eligibility filter."""
+
+    patients = make_patients()
+
+    def setUp(self):
+        self.eligibility_filter = StructuredEligibilityFilter(TRIALS)
+
+    def test_matrix_shape(self):
+        matrix = self.eligibility_filter.candidate_matrix(self.patients)
+        self.assertEqual((len(self.patients), len(TRIALS)), matrix.shape)
+        self.assertEqual(bool, matrix.dtype)
+
+    def test_same_as_trial_index(self):
+        index = TrialIndex(TRIALS)
+        candidate_lists = self.eligibility_filter.candidate_lists(
+            self.patients, batch_size=5
+        )
+        for patient, positions in zip(self.patients, candidate_lists):
+            with self.subTest(patient=patient.unique_id):
+                bitmap = index.query(
+                    gender=patient.gender,
+                    age=patient.age,
+                    is_healthy=patient.is_healthy,
+                )
+                self.assertEqual(index.positions(bitmap), positions.tolist())
+
+    def test_candidate_nct_ids(self):
+        patient = Patient(
+            unique_id="topics_1",
+            patient_id=1,
+            description="",
+            gender=Gender.male,
+            age=10,
+            is_healthy=False,
+        )
+        self.assertEqual(
+            {"topics_1": ["NCT3"]},
+            self.eligibility_filter.candidate_nct_ids([patient]),
+        )
+
+    def test_no_patients(self):
+        self.assertEqual([], self.eligibility_filter.candidate_lists([]))
+
+
+if __name__ == "__main__":
+    unittest.main()
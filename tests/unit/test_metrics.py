@@ -0,0 +1,112 @@
+import unittest
+
+from CTnlp.metrics import FileMetrics, Histogram, IngestStats
+
+
+class TestHistogram(unittest.TestCase):
+    def test_add(self):
+        histogram = Histogram()
+        for seconds in [0.0, 1e-6, 3e-6, 0.001, 0.5]:
+            histogram.add(seconds)
+        self.assertEqual(5, histogram.count)
+        self.assertAlmostEqual(0.501004, histogram.total)
+        self.assertEqual(0.5, histogram.max)
+        self.assertEqual(
+            [(1e-6, 2), (4e-6, 1), (1.024e-3, 1), (0.524288, 1)], histogram.buckets()
+        )
+        self.assertEqual(1e-6, histogram.percentile(40))
+        self.assertEqual(0.5, histogram.percentile(100))
+
+    def test_empty(self):
+        histogram = Histogram()
+        self.assertEqual(0.0, histogram.mean)
+        self.assertEqual(0.0, histogram.percentile(99))
+
+    def test_merge(self):
+        histogram, other = Histogram(), Histogram()
+        histogram.add(1e-5)
+        other.add(1.0)
+        other.add(1e-5)
+        histogram.merge(other)
+        self.assertEqual(3, histogram.count)
+        self.assertEqual(1.0, histogram.max)
+        self.assertEqual(2, histogram.buckets()[0][1])
+
+
+def make_metrics(source, seconds, skip_reason=None):
+    return FileMetrics(
+        source,
+        bytes_read=100,
+        stage_seconds={"read": seconds / 2, "xml_parse": seconds / 2},
+        skip_reason=skip_reason,
+    )
+
+
+class TestIngestStats(unittest.TestCase):
+    def test_record(self):
+        stats = IngestStats(slowest_n=2)
+        stats.record(make_metrics("a.xml", 0.1))
+        stats.record(make_metrics("b.xml", 0.3, "xml parse error"))
+        stats.record(make_metrics("c.xml", 0.2))
+        stats.record(FileMetrics("d.xml", cached=True))
+        self.assertEqual(
+            (4, 2, 1, 300), (stats.files, stats.parsed, stats.cached, stats.bytes_read)
+        )
+        self.assertEqual([("b.xml", "xml parse error")], stats.skipped)
+        self.assertEqual(1, stats.xml_failures)
+
+    def test_merge_report(self):
+        stats, other = IngestStats(), IngestStats()
+        stats.record(
+            FileMetrics("a.xml", unparseable_ages=["ten"], missing_fields=("gender",))
+        )
+        other.record(FileMetrics("b.xml", criteria_split_failed=True))
+        other.record(
+            FileMetrics("c.xml", cached=True, missing_fields=("gender", "conditions"))
+        )
+        stats.merge(other)
+        self.assertEqual(1, stats.criteria_split_failures)
+        self.assertEqual(0.5, stats.criteria_split_rate)
+        self.assertEqual({"ten": 1}, stats.unparseable_ages)
+        self.assertEqual(2 / 3, stats.missing_rates["gender"])
+        self.assertEqual(1 / 3, stats.missing_rates["conditions"])
+        self.assertEqual(0.0, stats.missing_rates["criteria"])
+        self.assertEqual(
+            ["b.xml", "c.xml"], [source for source, _ in stats.slowest_files]
+        )
+        self.assertEqual(3, stats.stages["total"].count)
+
+    def test_merge(self):
+        stats, other = IngestStats(slowest_n=2), IngestStats()
+        stats.record(make_metrics("a.xml", 0.1))
+        other.record(make_metrics("b.xml", 0.3, "xml parse error"))
+        other.record(make_metrics("c.xml", 0.05))
+        stats.merge(other)
+        self.assertEqual((3, 2, 300), (stats.files, stats.parsed, stats.bytes_read))
+        self.assertEqual(3, stats.stages["read"].count)
+        self.assertEqual(
+            ["b.xml", "a.xml"], [source for source, _ in stats.slowest_files]
+        )
+        self.assertEqual([("b.xml", "xml parse error")], stats.skipped)
+        self.assertEqual(1, stats.xml_failures)
+
+    def test_merge_report(self):
+        stats, other = IngestStats(), IngestStats()
+        stats.record(
+            FileMetrics("a.xml", unparseable_ages=["ten"], missing_fields=("gender",))
+        )
+        other.record(FileMetrics("b.xml", criteria_split_failed=True))
+        other.record(
+            FileMetrics("c.xml", cached=True, missing_fields=("gender", "conditions"))
+        )
+        stats.merge(other)
+        self.assertEqual(1, stats.criteria_split_failures)
+        self.assertEqual(0.5, stats.criteria_split_rate)
+        self.assertEqual({"ten": 1}, stats.unparseable_ages)
+        self.assertEqual(2 / 3, stats.missing_rates["gender"])
+        self.assertEqual(1 / 3, stats.missing_rates["conditions"])
+        self.assertEqual(0.0, stats.missing_rates["criteria"])
+
+
+if __name__ == "__main__":
+    unittest.main()
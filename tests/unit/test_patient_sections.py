@@ -0,0 +1,139 @@
+import random
+import re
+import unittest
+
+from CTnlp.patient.parsers import (
+    extract_family_history,
+    extract_past_medical_history,
+    extract_sections,
+)
+
+
+def extract_past_medical_history_regex(patient_description):
+    """Reference implementation with the original backtracking patterns."""
+    return (
+        re.search(
+            r"[!\.][^!\.]*medical history.*?\.", patient_description, re.IGNORECASE
+        )
+        or re.search(
+            r"[!\.][^!\.]*has (no )?(a )?(positive )?history.*?\.",
+            patient_description,
+            re.IGNORECASE,
+        )
+        or re.search(
+            r"[!\.][^!\.]*past medical history:?\n([\d|-]?[^\n]*\n)*",
+            patient_description,
+            re.IGNORECASE,
+        )
+    )
+
+
+def extract_family_history_regex(patient_description):
+    """Reference implementation with the original backtracking pattern."""
+    return re.search(r"\.[^\.]*family history.*?\.", patient_description, re.IGNORECASE)
+
+
+DESCRIPTIONS = [
+    "",
+    "A 7-year-old boy with a cough.",
+    "A 58-year-old man with chest pain. He has a medical history of diabetes. "
+    "His father died of a heart attack.",
+    "A 19-year-old female with fever. Her family history is notable for lupus. "
+    "She smokes.",
+    "A woman with fatigue. Family history of anemia. Past medical history of "
+    "hypothyroidism. She takes levothyroxine.",
+    "A man with a rash! He has no positive history of allergies. He is afebrile.",
+    "Patient with dyspnea.\nPast Medical History:\n1. COPD\n- Hypertension\nsmoker\n",
+    "Medical history of asthma. No dot after family history",
+    "A man. Medical history\nof asthma. Family history of\ncancer.",
+    "A girl.family history. medical history.",
+    "A man. Family history of diabetes and medical history of gout.",
+]
+
+TOKENS = [
+    ".",
+    "!",
+    "\n",
+    " ",
+    "x",
+    ":",
+    "1",
+    "-",
+    "medical history",
+    "Past Medical History:",
+    "has ",
+    "no ",
+    "a ",
+    "positive ",
+    "history",
+    "family history",
+    "FAMILY HISTORY",
+    "MEDİCAL HİSTORY",
+    "famıly hıstory",
+    "ſ",
+]
+
+
+def _span(match):
+    return match and match.span()
+
+
+class TestSectionScanner(unittest.TestCase):
+    """Compare the linear section scanner with the original regular expressions."""
+
+    def assert_same_spans(self, description):
+        self.assertEqual(
+            _span(extract_past_medical_history_regex(description)),
+            _span(extract_past_medical_history(description)),
+            description,
+        )
+        self.assertEqual(
+            _span(extract_family_history_regex(description)),
+            _span(extract_family_history(description)),
+            description,
+        )
+
+    def test_descriptions(self):
+        for description in DESCRIPTIONS:
+            self.assert_same_spans(description)
+
+    def test_random_descriptions(self):
+        rng = random.Random(0)
+        for _ in range(5000):
+            self.assert_same_spans(
+                "".join(rng.choice(TOKENS) for _ in range(rng.randint(0, 14)))
+            )
+
+    def test_group(self):
+        match = extract_family_history(DESCRIPTIONS[3])
+        self.assertEqual(". Her family history is notable for lupus.", match.group())
+        self.assertEqual(match.group(), match.group(0))
+        self.assertEqual(match.group(), match[0])
+
+    def test_groups(self):
+        for description in DESCRIPTIONS:
+            match = extract_past_medical_history(description)
+            expected = extract_past_medical_history_regex(description)
+            self.assertEqual(expected and expected.groups(), match and match.groups())
+
+    def test_extract_sections(self):
+        self.assertEqual(
+            (
+                "A woman with fatigue. She takes levothyroxine.",
+                "Past medical history of hypothyroidism.",
+                "Family history of anemia.",
+            ),
+            extract_sections(DESCRIPTIONS[4]),
+        )
+        self.assertEqual(
+            (
+                "Patient with dyspnea.\n",
+                "Past Medical History:\n1. COPD\n- Hypertension\nsmoker",
+                "",
+            ),
+            extract_sections(DESCRIPTIONS[6]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
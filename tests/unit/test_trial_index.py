@@ -0,0 +1,88 @@
+import unittest
+
+from CTnlp.index import TrialIndex
+from CTnlp.patient import Patient
+from CTnlp.utils import Gender
+from tests.unit.fixtures import TRIALS, make_trial
+
+
+def nct_ids(trials):
+    return [trial.nct_id for trial in trials]
+
+
+class TestTrialIndex(unittest.TestCase):
+    """Test candidate retrieval with the trial index."""
+
+    index = TrialIndex(TRIALS)
+
+    def brute_force(self, gender=None, age=None, is_healthy=None):
+        """Reference linear scan over the trials."""
+        result = []
+        for trial in TRIALS:
+            if gender == Gender.male and trial.gender == Gender.female:
+                continue
+            if gender == Gender.female and trial.gender == Gender.male:
+                continue
+            if age is not None:
+                if trial.minimum_age is not None and age < trial.minimum_age:
+                    continue
+                if trial.maximum_age is not None and age > trial.maximum_age:
+                    continue
+            if is_healthy and not trial.accepts_healthy_volunteers:
+                continue
+            result.append(trial)
+        return result
+
+    def test_size(self):
+        self.assertEqual(5, len(self.index))
+
+    def test_no_filters(self):
+        self.assertEqual(TRIALS, self.index.trials(self.index.query()))
+
+    def test_against_linear_scan(self):
+        for gender in Gender:
+            for age in [None, 0.5, 10, 17, 18, 30, 40, 65, 66, 90]:
+                for is_healthy in [None, False, True]:
+                    with self.subTest(gender=gender, age=age, is_healthy=is_healthy):
+                        bitmap = self.index.query(
+                            gender=gender, age=age, is_healthy=is_healthy
+                        )
+                        self.assertEqual(
+                            nct_ids(self.brute_force(gender, age, is_healthy)),
+                            nct_ids(self.index.trials(bitmap)),
+                        )
+
+    def test_conditions(self):
+        bitmap = self.index.query(conditions=["DIABETES"])
+        self.assertEqual(["NCT1", "NCT4"], nct_ids(self.index.trials(bitmap)))
+        self.assertEqual([0, 3], self.index.positions(bitmap))
+
+    def test_interventions(self):
+        bitmap = self.index.query(interventions=["albuterol", "unknown"])
+        self.assertEqual(["NCT3"], nct_ids(self.index.trials(bitmap)))
+
+    def test_candidates(self):
+        patient = Patient(
+            unique_id="topics_1",
+            patient_id=1,
+            description="",
+            conditions=["Diabetes"],
+            gender=Gender.female,
+            age=45,
+            is_healthy=False,
+        )
+        self.assertEqual(
+            ["NCT1", "NCT2", "NCT4"], nct_ids(self.index.candidates(patient))
+        )
+        self.assertEqual(
+            ["NCT1", "NCT4"],
+            nct_ids(self.index.candidates(patient, match_conditions=True)),
+        )
+
+    def test_empty_index(self):
+        index = TrialIndex([])
+        self.assertEqual([], index.trials(index.query(age=30)))
+
+
+if __name__ == "__main__":
+    unittest.main()